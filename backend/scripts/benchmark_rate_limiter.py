@@ -0,0 +1,89 @@
+"""
+限流器并发基准：多线程同时请求同一个限流键，检查放行次数是否严格等于上限。
+
+    python scripts/benchmark_rate_limiter.py --threads 64 --requests 5000 --limit 500
+    python scripts/benchmark_rate_limiter.py --redis-url redis://127.0.0.1:6379/0
+
+同时运行旧的 get + set 计数方式作为对照，用来展示非原子实现在并发下会超发。
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def configure(args):
+    if args.redis_url:
+        cache = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": args.redis_url}
+    else:
+        cache = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    window = 3600
+    settings.configure(
+        # services/__init__ imports modules that load the models
+        INSTALLED_APPS=[
+            "django.contrib.contenttypes", "django.contrib.auth", "django.contrib.sessions",
+            "rest_framework_simplejwt.token_blacklist", "wangumi_app",
+        ],
+        CACHES={"default": cache},
+        RATE_LIMITS={
+            "bench_sliding_window": {"algorithm": "sliding_window", "limit": args.limit, "window": window},
+            # 补充速率极低，基准期间只能消耗初始的 limit 个令牌
+            "bench_token_bucket": {"algorithm": "token_bucket", "limit": args.limit, "window": window * 1000},
+        },
+    )
+    django.setup()
+
+
+def naive_hit(key, limit):
+    """旧实现：先 get 再 set，两个请求可以读到同一个计数"""
+    from django.core.cache import cache
+
+    current = cache.get(key, 0)
+    if current >= limit:
+        return False
+    time.sleep(0)  # 让出 GIL，模拟两次网络往返之间的间隙
+    cache.set(key, current + 1, 3600)
+    return True
+
+
+def run(name, func, args):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        allowed = sum(pool.map(lambda _: func(), range(args.requests)))
+    elapsed = time.perf_counter() - start
+    verdict = "OK" if allowed == args.limit else "OVER" if allowed > args.limit else "UNDER"
+    print(
+        f"{name:<16} allowed={allowed:<6} limit={args.limit:<6} {verdict:<5} "
+        f"{args.requests / elapsed:,.0f} req/s"
+    )
+    return allowed == args.limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--redis-url", default=None, help="使用 Redis 缓存与 Lua 令牌桶")
+    args = parser.parse_args()
+    configure(args)
+
+    from django.core.cache import cache
+    from wangumi_app.services.rate_limiter import hit
+
+    cache.clear()
+    identity = [f"bench:{time.time()}"]
+    ok = run("sliding_window", lambda: hit("bench_sliding_window", identity).allowed, args)
+    ok &= run("token_bucket", lambda: hit("bench_token_bucket", identity).allowed, args)
+    run("naive get/set", lambda: naive_hit(f"naive:{identity[0]}", args.limit), args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
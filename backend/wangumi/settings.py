@@ -198,6 +198,26 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+
+# 两级缓存：进程内 LRU（L1）+ 所有 worker 共享的 L2。配置了 REDIS_URL 时 L2 使用 Redis，
+# 否则退回进程内缓存（单进程开发与测试）。计数、锁和鉴权相关的命名空间不进 L1。
+CACHES = {
+    "default": {
+        "BACKEND": "wangumi_app.cache_backends.TwoTierCache",
+        "LOCATION": "wangumi-l1",
+        "OPTIONS": {
+            "L2": "shared",
+            "L1_TTL": float(os.getenv("CACHE_L1_TTL_SECONDS", "5")),
+            "L1_MAX_ENTRIES": int(os.getenv("CACHE_L1_MAX_ENTRIES", "4096")),
+            "L1_EXCLUDE_NAMESPACES": ["auth", "rate_limit", "verification_rate", "sms", "keyword_filter"],
+        },
+    },
+    "shared": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+        if os.getenv("REDIS_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "wangumi-shared"}
+    ),
+}
 SMS_CODE_TTL_SECONDS = int(os.getenv("SMS_CODE_TTL_SECONDS", "300"))
 SMS_DEFAULT_REGION_CODE = os.getenv("SMS_DEFAULT_REGION_CODE", "+86")
 SMS_CODE_SECRET = os.getenv("SMS_CODE_SECRET", SECRET_KEY)
@@ -205,6 +225,11 @@ VERIFICATION_CODE_REQUEST_INTERVAL_SECONDS = int(os.getenv("VERIFICATION_CODE_RE
 VERIFICATION_CODE_DAILY_LIMIT_PER_TARGET = int(os.getenv("VERIFICATION_CODE_DAILY_LIMIT_PER_TARGET", "10"))
 VERIFICATION_CODE_DAILY_LIMIT_PER_IP = int(os.getenv("VERIFICATION_CODE_DAILY_LIMIT_PER_IP", "50"))
 
+# 首页时间线：粉丝数超过阈值的用户改为读扩散；每个用户时间线保留的最大条数
+TIMELINE_FANOUT_FOLLOWER_LIMIT = int(os.getenv("TIMELINE_FANOUT_FOLLOWER_LIMIT", "1000"))
+TIMELINE_MAX_ENTRIES = int(os.getenv("TIMELINE_MAX_ENTRIES", "500"))
+TIMELINE_FOLLOW_BACKFILL = int(os.getenv("TIMELINE_FOLLOW_BACKFILL", "20"))
+
 WEEKLY_COLLECTION_API = os.getenv(
     "WEEKLY_COLLECTION_API",
     "https://example.com/api/weekly-collections",
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class WangumiAppConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "wangumi_app"
+
+    def ready(self):
+        # 注册模型信号（缓存失效等）
+        from wangumi_app import signals  # noqa: F401
@@ -0,0 +1,36 @@
+"""
+JWT 认证：在 SimpleJWT 的基础上校验令牌版本号，并短暂缓存认证用户
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from wangumi_app.services.token_versions import TOKEN_VERSION_CLAIM, get_user_and_token_version
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    与 JWTAuthentication 用法相同，区别在于：
+    - 用户对象按 ID 缓存，普通请求不再查询 User 表
+    - 令牌中的 ver 必须等于用户当前的令牌版本，登出所有设备/封禁后旧令牌立即失效
+      （没有 ver 的旧令牌视为版本 0）
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user, version = get_user_and_token_version(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        return user
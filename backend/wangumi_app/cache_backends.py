@@ -0,0 +1,287 @@
+"""
+Two-tier Django cache backend.
+
+L1 is a small in-process LRU shared by the threads of one worker; L2 is
+another configured cache alias shared by all workers (Redis in production).
+Reads try L1, then L2; writes go to L2 and refresh L1. Atomic operations
+(``add``, ``incr``, ``touch``) always go straight to L2 so counters and locks
+stay correct across workers.
+
+L1 entries live at most ``L1_TTL`` seconds, which bounds how stale another
+worker's write can look. Namespaces whose values must never be stale
+(``L1_EXCLUDE_NAMESPACES``) bypass L1 entirely. The namespace of a key is the
+part before its first ``:``.
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+_NS_VERSION_PREFIX = "__nsver__"
+
+# Shared per process (Django creates one cache object per thread), keyed by
+# the cache LOCATION like the LocMem backend does.
+_l1_stores = {}
+_l1_stores_lock = threading.Lock()
+
+
+class _L1Store:
+    def __init__(self):
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.namespace_versions = {}
+        self.metrics = defaultdict(Counter)
+        self.lock = threading.Lock()
+
+
+def _get_store(location: str) -> _L1Store:
+    with _l1_stores_lock:
+        return _l1_stores.setdefault(location, _L1Store())
+
+
+def namespace_of(key: str) -> str:
+    return key.split(":", 1)[0] if ":" in key else "default"
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._l2_alias = options.get("L2", "shared")
+        self._l1_ttl = float(options.get("L1_TTL", 5))
+        self._l1_max_entries = int(options.get("L1_MAX_ENTRIES", 4096))
+        self._l1_exclude = frozenset(options.get("L1_EXCLUDE_NAMESPACES", ()))
+        self._lock_timeout = float(options.get("LOCK_TIMEOUT", 10))
+        self._store = _get_store(location or "default")
+
+    @property
+    def _l2(self) -> BaseCache:
+        return caches[self._l2_alias]
+
+    # -- keys ---------------------------------------------------------------
+
+    def _namespace_version(self, namespace: str) -> int:
+        now = time.monotonic()
+        cached = self._store.namespace_versions.get(namespace)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        version = self._l2.get(f"{_NS_VERSION_PREFIX}:{namespace}", 0)
+        self._store.namespace_versions[namespace] = (now + self._l1_ttl, version)
+        return version
+
+    def _physical_key(self, key, version=None) -> str:
+        """Key used in both tiers: the logical key plus its namespace version."""
+        key = str(key)
+        namespace_version = self._namespace_version(namespace_of(key))
+        if namespace_version:
+            key = f"{key}#v{namespace_version}"
+        return self.make_and_validate_key(key, version=version)
+
+    def _use_l1(self, key) -> bool:
+        return self._l1_ttl > 0 and namespace_of(str(key)) not in self._l1_exclude
+
+    # -- L1 -----------------------------------------------------------------
+
+    def _l1_get(self, physical_key):
+        now = time.monotonic()
+        with self._store.lock:
+            entry = self._store.entries.get(physical_key)
+            if entry is None:
+                return _MISSING
+            expires_at, payload = entry
+            if expires_at <= now:
+                del self._store.entries[physical_key]
+                return _MISSING
+            self._store.entries.move_to_end(physical_key)
+        return pickle.loads(payload)
+
+    def _l1_set(self, physical_key, value, timeout):
+        ttl = self._l1_ttl
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            if timeout <= 0:
+                self._l1_delete(physical_key)
+                return
+            ttl = min(ttl, timeout)
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._store.lock:
+            self._store.entries[physical_key] = (time.monotonic() + ttl, payload)
+            self._store.entries.move_to_end(physical_key)
+            while len(self._store.entries) > self._l1_max_entries:
+                self._store.entries.popitem(last=False)
+
+    def _l1_delete(self, *physical_keys):
+        with self._store.lock:
+            for physical_key in physical_keys:
+                self._store.entries.pop(physical_key, None)
+
+    def _record(self, key, outcome: str):
+        self._store.metrics[namespace_of(str(key))][outcome] += 1
+
+    # -- cache API ----------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        physical_key = self._physical_key(key, version)
+        use_l1 = self._use_l1(key)
+        if use_l1:
+            value = self._l1_get(physical_key)
+            if value is not _MISSING:
+                self._record(key, "l1_hits")
+                return value
+        value = self._l2.get(physical_key, _MISSING)
+        if value is _MISSING:
+            self._record(key, "misses")
+            return default
+        self._record(key, "l2_hits")
+        if use_l1:
+            self._l1_set(physical_key, value, None)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        physical_key = self._physical_key(key, version)
+        self._l2.set(physical_key, value, self._l2_timeout(timeout))
+        if self._use_l1(key):
+            self._l1_set(physical_key, value, timeout)
+        else:
+            self._l1_delete(physical_key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        physical_key = self._physical_key(key, version)
+        self._l1_delete(physical_key)
+        return self._l2.add(physical_key, value, self._l2_timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        physical_key = self._physical_key(key, version)
+        self._l1_delete(physical_key)
+        return self._l2.touch(physical_key, self._l2_timeout(timeout))
+
+    def incr(self, key, delta=1, version=None):
+        physical_key = self._physical_key(key, version)
+        self._l1_delete(physical_key)
+        try:
+            return self._l2.incr(physical_key, delta)
+        except ValueError:
+            raise ValueError("Key '%s' not found" % key)
+
+    def delete(self, key, version=None):
+        physical_key = self._physical_key(key, version)
+        self._l1_delete(physical_key)
+        return self._l2.delete(physical_key)
+
+    def has_key(self, key, version=None):
+        physical_key = self._physical_key(key, version)
+        if self._use_l1(key) and self._l1_get(physical_key) is not _MISSING:
+            return True
+        return self._l2.has_key(physical_key)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        physical_keys = {}
+        for key in keys:
+            physical_key = self._physical_key(key, version)
+            if self._use_l1(key):
+                value = self._l1_get(physical_key)
+                if value is not _MISSING:
+                    self._record(key, "l1_hits")
+                    found[key] = value
+                    continue
+            physical_keys[physical_key] = key
+        if physical_keys:
+            # One L2 round trip for everything L1 could not serve.
+            loaded = self._l2.get_many(list(physical_keys))
+            for physical_key, key in physical_keys.items():
+                if physical_key not in loaded:
+                    self._record(key, "misses")
+                    continue
+                self._record(key, "l2_hits")
+                found[key] = loaded[physical_key]
+                if self._use_l1(key):
+                    self._l1_set(physical_key, loaded[physical_key], None)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        physical = {self._physical_key(key, version): (key, value) for key, value in data.items()}
+        failed = self._l2.set_many(
+            {physical_key: value for physical_key, (_, value) in physical.items()},
+            self._l2_timeout(timeout),
+        )
+        for physical_key, (key, value) in physical.items():
+            if self._use_l1(key):
+                self._l1_set(physical_key, value, timeout)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        physical_keys = [self._physical_key(key, version) for key in keys]
+        self._l1_delete(*physical_keys)
+        self._l2.delete_many(physical_keys)
+
+    def clear(self):
+        with self._store.lock:
+            self._store.entries.clear()
+            self._store.namespace_versions.clear()
+        self._l2.clear()
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        ``get_or_set`` with stampede protection: on a miss only one caller
+        (across workers, via a lock taken with ``add`` on L2) computes the value;
+        the others wait for it up to ``LOCK_TIMEOUT`` seconds and only compute it
+        themselves if it never shows up.
+        """
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout=timeout, version=version)
+            return self.get(key, default, version=version)
+
+        lock_key = self._physical_key(f"{key}:lock", version)
+        if self._l2.add(lock_key, 1, self._lock_timeout):
+            try:
+                value = default()
+                self.set(key, value, timeout=timeout, version=version)
+                return value
+            finally:
+                self._l2.delete(lock_key)
+
+        physical_key = self._physical_key(key, version)
+        deadline = time.monotonic() + self._lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.01)
+            value = self._l2.get(physical_key, _MISSING)
+            if value is not _MISSING:
+                if self._use_l1(key):
+                    self._l1_set(physical_key, value, timeout)
+                return value
+        value = default()
+        self.set(key, value, timeout=timeout, version=version)
+        return value
+
+    def _l2_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    # -- versioned namespaces & metrics -------------------------------------
+
+    def invalidate_namespace(self, namespace: str) -> int:
+        """
+        Make every key of ``namespace`` unreachable by bumping its version.
+
+        Other workers pick the new version up within ``L1_TTL`` seconds; the old
+        entries simply expire.
+        """
+        version_key = f"{_NS_VERSION_PREFIX}:{namespace}"
+        self._l2.add(version_key, 0, None)
+        version = self._l2.incr(version_key)
+        self._store.namespace_versions[namespace] = (time.monotonic() + self._l1_ttl, version)
+        return version
+
+    def metrics(self) -> dict:
+        """Hit/miss counters of this worker per namespace."""
+        with self._store.lock:
+            return {namespace: dict(counts) for namespace, counts in self._store.metrics.items()}
+
+    def reset_metrics(self) -> None:
+        with self._store.lock:
+            self._store.metrics.clear()
@@ -0,0 +1,37 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.models import Activity
+from wangumi_app.services.activity_payloads import build_payloads_for
+
+
+class Command(BaseCommand):
+    help = "为没有展示快照的历史动态分批回填 payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="每批处理的动态数量")
+
+    def handle(self, *args: Any, **options: Any):
+        batch_size = max(1, options["batch_size"])
+        last_id = 0
+        updated = 0
+
+        # 按主键分批推进，避免 OFFSET 越翻越慢
+        while True:
+            batch = list(
+                Activity.objects.filter(id__gt=last_id, payload={}).order_by("id")[:batch_size]
+            )
+            if not batch:
+                break
+
+            payloads = build_payloads_for(batch)
+            for activity in batch:
+                activity.payload = payloads[activity.id]
+            Activity.objects.bulk_update(batch, ["payload"])
+
+            updated += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f"已回填 {updated} 条动态 (last_id={last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"动态快照回填完成: updated={updated}"))
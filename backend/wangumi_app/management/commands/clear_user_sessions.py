@@ -0,0 +1,15 @@
+from typing import Any
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.session_security import prune_session_index
+
+
+class Command(BaseCommand):
+    help = "清理过期会话（clearsessions）并删除已失效会话的 用户 -> 会话 索引，建议定期执行"
+
+    def handle(self, *args: Any, **options: Any):
+        call_command("clearsessions")
+        deleted = prune_session_index()
+        self.stdout.write(self.style.SUCCESS(f"会话索引清理完成: deleted={deleted}"))
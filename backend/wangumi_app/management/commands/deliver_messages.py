@@ -0,0 +1,33 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.delivery_queue import DatabaseDeliveryQueue
+
+
+class Command(BaseCommand):
+    help = "发送数据库投递队列中的验证码邮件/短信（可多进程并行运行）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="每批领取的消息数")
+        parser.add_argument("--once", action="store_true", help="发送完当前到期的消息后退出")
+        parser.add_argument("--interval", type=float, default=1.0, help="队列为空时的轮询间隔（秒）")
+        parser.add_argument("--requeue-dead", action="store_true", help="先把死信消息重新放回队列")
+
+    def handle(self, *args: Any, **options: Any):
+        delivery_queue = DatabaseDeliveryQueue()
+        if options["requeue_dead"]:
+            requeued = delivery_queue.requeue_dead()
+            self.stdout.write(f"死信重新入队: {requeued}")
+
+        processed = 0
+        while True:
+            claimed = delivery_queue.process_due(options["batch_size"])
+            processed += claimed
+            if claimed:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"投递完成: processed={processed}"))
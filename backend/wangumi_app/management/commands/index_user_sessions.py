@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.session_security import index_existing_sessions
+
+
+class Command(BaseCommand):
+    help = "为上线会话索引之前创建的登录会话补建 用户 -> 会话 索引（只需执行一次）"
+
+    def handle(self, *args: Any, **options: Any):
+        indexed = index_existing_sessions()
+        self.stdout.write(self.style.SUCCESS(f"会话索引补建完成: indexed={indexed}"))
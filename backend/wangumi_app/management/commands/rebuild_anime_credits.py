@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.credits import rebuild_all_credits
+
+
+class Command(BaseCommand):
+    help = "用一条集合 SQL 重建所有番剧的演职员文档（绕过模型保存的批量导入后执行）"
+
+    def handle(self, *args: Any, **options: Any):
+        total = rebuild_all_credits()
+        self.stdout.write(self.style.SUCCESS(f"演职员文档重建完成: anime={total}"))
@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.genres import rebuild_genre_links
+
+
+class Command(BaseCommand):
+    help = "按 Anime.genres 重建类型表与条目-类型关联表（绕过模型保存的批量导入后执行）"
+
+    def handle(self, *args: Any, **options: Any):
+        total = rebuild_genre_links()
+        self.stdout.write(self.style.SUCCESS(f"类型关联重建完成: links={total}"))
@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.moderation_queue import rebuild_moderation_targets
+
+
+class Command(BaseCommand):
+    help = "按举报表重建审核队列（按被举报对象聚合、重算优先级）"
+
+    def handle(self, *args: Any, **options: Any):
+        total = rebuild_moderation_targets()
+        self.stdout.write(self.style.SUCCESS(f"审核队列重建完成: targets={total}"))
@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.follow_counts import reconcile_follow_counts
+
+
+class Command(BaseCommand):
+    help = "校正用户主页上的关注/粉丝冗余计数"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="每批写回的 Profile 数量")
+
+    def handle(self, *args: Any, **options: Any):
+        fixed = reconcile_follow_counts(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"关注计数校正完成: fixed={fixed}"))
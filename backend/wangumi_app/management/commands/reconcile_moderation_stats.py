@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.moderation_stats import reconcile_moderation_stats
+
+
+class Command(BaseCommand):
+    help = "补建并校正管理后台使用的用户内容/举报统计"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="每批写回的统计行数量")
+
+    def handle(self, *args: Any, **options: Any):
+        fixed = reconcile_moderation_stats(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"用户统计校正完成: fixed={fixed}"))
@@ -0,0 +1,16 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.content_sweeps import run_pending_sweeps
+
+
+class Command(BaseCommand):
+    help = "执行等待中或中断的封禁/解封内容处理任务"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="每批更新的内容行数")
+
+    def handle(self, *args: Any, **options: Any):
+        ran = run_pending_sweeps(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"内容处理任务执行完成: jobs={ran}"))
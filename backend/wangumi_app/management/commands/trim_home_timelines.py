@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from wangumi_app.services.home_timeline import trim_all_timelines
+
+
+class Command(BaseCommand):
+    help = "裁剪超过上限的首页时间线"
+
+    def handle(self, *args: Any, **options: Any):
+        deleted = trim_all_timelines()
+        self.stdout.write(self.style.SUCCESS(f"首页时间线裁剪完成: deleted={deleted}"))
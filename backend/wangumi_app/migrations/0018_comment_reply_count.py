@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0017_merge_20251202_1559'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # 用现有回复数据回填冗余计数
+        migrations.RunSQL(
+            """
+            UPDATE wangumi_app_comment AS c
+            SET reply_count = r.cnt
+            FROM (
+                SELECT review_id, COUNT(*) AS cnt
+                FROM wangumi_app_reply
+                GROUP BY review_id
+            ) AS r
+            WHERE r.review_id = c.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0019_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='payload',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0020_activity_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # 用现有关注关系回填冗余计数
+        migrations.RunSQL(
+            """
+            UPDATE wangumi_app_userprofile AS p
+            SET follower_count = COALESCE(
+                    (SELECT COUNT(*) FROM wangumi_app_userfollow f WHERE f.following_id = p.user_id), 0),
+                following_count = COALESCE(
+                    (SELECT COUNT(*) FROM wangumi_app_userfollow f WHERE f.follower_id = p.user_id), 0);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,47 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0024_outboundmessage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserModerationStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='moderation_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('comments', models.PositiveIntegerField(default=0)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('items_created', models.PositiveIntegerField(default=0)),
+                ('reports_filed', models.PositiveIntegerField(default=0)),
+                ('reports_received', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        # 用现有数据回填所有用户的计数
+        migrations.RunSQL(
+            """
+            INSERT INTO wangumi_app_usermoderationstats
+                (user_id, comments, replies, items_created, reports_filed, reports_received)
+            SELECT u.id,
+                (SELECT COUNT(*) FROM wangumi_app_comment c WHERE c.user_id = u.id),
+                (SELECT COUNT(*) FROM wangumi_app_reply r WHERE r.user_id = u.id),
+                (SELECT COUNT(*) FROM wangumi_app_anime a WHERE a.created_by_id = u.id),
+                (SELECT COUNT(*) FROM wangumi_app_report rp WHERE rp.reporter_id = u.id),
+                (SELECT COUNT(*) FROM wangumi_app_report rp
+                    JOIN django_content_type ct ON ct.id = rp.content_type_id AND ct.app_label = 'wangumi_app'
+                    WHERE (ct.model = 'comment' AND rp.object_id IN
+                              (SELECT id FROM wangumi_app_comment WHERE user_id = u.id))
+                       OR (ct.model = 'reply' AND rp.object_id IN
+                              (SELECT id FROM wangumi_app_reply WHERE user_id = u.id))
+                       OR (ct.model = 'anime' AND rp.object_id IN
+                              (SELECT id FROM wangumi_app_anime WHERE created_by_id = u.id)))
+            FROM auth_user u;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0025_usermoderationstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_banned',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='reply',
+            name='is_banned',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='ContentSweepJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('HIDE', '软删除内容'), ('RESTORE', '恢复内容')], max_length=10)),
+                ('status', models.CharField(choices=[('PENDING', '等待执行'), ('RUNNING', '执行中'), ('DONE', '已完成'), ('CANCELLED', '已取消'), ('FAILED', '执行失败')], default='PENDING', max_length=10)),
+                ('stage', models.CharField(blank=True, max_length=20)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('admin_log', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='content_sweep', to='wangumi_app.adminlog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'status'], name='sweep_user_status_idx')],
+            },
+        ),
+    ]
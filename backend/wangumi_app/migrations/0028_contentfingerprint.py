@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('wangumi_app', '0027_moderationtarget'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('simhash', models.BigIntegerField()),
+                ('band0', models.IntegerField()),
+                ('band1', models.IntegerField()),
+                ('band2', models.IntegerField()),
+                ('band3', models.IntegerField()),
+                ('cluster_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('flagged', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_content_fingerprint')],
+                'indexes': [
+                    models.Index(fields=['band0', 'created_at'], name='fingerprint_band0_idx'),
+                    models.Index(fields=['band1', 'created_at'], name='fingerprint_band1_idx'),
+                    models.Index(fields=['band2', 'created_at'], name='fingerprint_band2_idx'),
+                    models.Index(fields=['band3', 'created_at'], name='fingerprint_band3_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# 从现有 Anime.genres（JSON 数组）回填类别表与关联表，与 services/genres.py 的归一化一致：去除首尾空白、忽略空值
+BACKFILL_GENRES = """
+INSERT INTO wangumi_app_genre (name, created_at)
+SELECT DISTINCT btrim(item.value), NOW()
+FROM wangumi_app_anime AS anime
+CROSS JOIN LATERAL jsonb_array_elements_text(
+    CASE WHEN jsonb_typeof(anime.genres) = 'array' THEN anime.genres ELSE '[]'::jsonb END
+) AS item(value)
+WHERE btrim(item.value) <> '' AND char_length(btrim(item.value)) <= 100
+ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO wangumi_app_animegenre (anime_id, genre_id)
+SELECT DISTINCT anime.id, genre.id
+FROM wangumi_app_anime AS anime
+CROSS JOIN LATERAL jsonb_array_elements_text(
+    CASE WHEN jsonb_typeof(anime.genres) = 'array' THEN anime.genres ELSE '[]'::jsonb END
+) AS item(value)
+JOIN wangumi_app_genre AS genre ON genre.name = btrim(item.value)
+ON CONFLICT DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0029_keyword_filter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnimeGenre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anime', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='genre_links', to='wangumi_app.anime')),
+                ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anime_links', to='wangumi_app.genre')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('anime', 'genre'), name='unique_anime_genre')],
+                'indexes': [models.Index(fields=['genre', 'anime'], name='anime_genre_genre_idx')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_GENRES, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,64 @@
+import json
+
+from django.db import migrations, models
+
+
+def _parse(raw):
+    # 旧数据为 JSON 数组或每行一个链接的文本
+    raw = (raw or "").strip()
+    if not raw:
+        return []
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        return [line.strip() for line in raw.splitlines() if line.strip()]
+    return parsed if isinstance(parsed, list) else []
+
+
+def text_to_json(apps, schema_editor):
+    Episode = apps.get_model('wangumi_app', 'Episode')
+    batch = []
+    for episode in Episode.objects.exclude(online_urls_text='').only('id', 'online_urls_text').iterator(chunk_size=2000):
+        episode.online_urls = _parse(episode.online_urls_text)
+        batch.append(episode)
+        if len(batch) >= 2000:
+            Episode.objects.bulk_update(batch, ['online_urls'])
+            batch = []
+    Episode.objects.bulk_update(batch, ['online_urls'])
+
+
+def json_to_text(apps, schema_editor):
+    Episode = apps.get_model('wangumi_app', 'Episode')
+    batch = []
+    for episode in Episode.objects.exclude(online_urls=[]).only('id', 'online_urls').iterator(chunk_size=2000):
+        episode.online_urls_text = json.dumps(episode.online_urls, ensure_ascii=False)
+        batch.append(episode)
+        if len(batch) >= 2000:
+            Episode.objects.bulk_update(batch, ['online_urls_text'])
+            batch = []
+    Episode.objects.bulk_update(batch, ['online_urls_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0030_genres'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='episode',
+            old_name='online_urls',
+            new_name='online_urls_text',
+        ),
+        migrations.AddField(
+            model_name='episode',
+            name='online_urls',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(text_to_json, json_to_text),
+        migrations.RemoveField(
+            model_name='episode',
+            name='online_urls_text',
+        ),
+    ]
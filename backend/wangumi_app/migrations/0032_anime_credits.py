@@ -0,0 +1,21 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0031_episode_online_urls_json'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnimeCredits',
+            fields=[
+                ('anime', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='credits', serialize=False, to='wangumi_app.anime')),
+                ('characters', models.JSONField(default=list)),
+                ('staff', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
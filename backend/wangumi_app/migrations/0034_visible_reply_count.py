@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wangumi_app', '0033_comment_hidden_idx'),
+    ]
+
+    operations = [
+        # 冗余回复数改为只统计未隐藏的回复，按现有数据重新回填
+        migrations.RunSQL(
+            """
+            UPDATE wangumi_app_comment AS c
+            SET reply_count = COALESCE(r.cnt, 0)
+            FROM wangumi_app_comment AS src
+            LEFT JOIN (
+                SELECT review_id, COUNT(*) AS cnt
+                FROM wangumi_app_reply
+                WHERE NOT is_banned
+                GROUP BY review_id
+            ) AS r ON r.review_id = src.id
+            WHERE src.id = c.id AND c.reply_count <> COALESCE(r.cnt, 0);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
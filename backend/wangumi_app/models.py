@@ -35,6 +35,11 @@ class UserProfile(models.Model):
     # 性别、地区（可选）
     gender = models.CharField(max_length=20, blank=True, null=True)
     location = models.CharField(max_length=100, blank=True, null=True)
+    # 关注/粉丝数冗余计数，由关注接口维护，reconcile_follow_counts 命令校正
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # JWT 版本号：登出所有设备/封禁时自增，令牌中的 ver 与之不一致即失效
+    token_version = models.PositiveIntegerField(default=0)
     # 全文搜索字段
     search_vector = SearchVectorField(null=True)
     def __str__(self):
@@ -124,6 +129,31 @@ class Anime(models.Model):
         ]
 
 
+class Genre(models.Model):
+    """规范化的番剧类别表，由 Anime.genres 同步维护，用于按类别筛选与统计"""
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class AnimeGenre(models.Model):
+    """番剧-类别关联表"""
+    anime = models.ForeignKey(Anime, on_delete=models.CASCADE, related_name='genre_links')
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name='anime_links')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['anime', 'genre'], name='unique_anime_genre')
+        ]
+        # 按类别查番剧走 (genre, anime) 索引；按番剧查类别由唯一约束 (anime, genre) 覆盖
+        indexes = [models.Index(fields=['genre', 'anime'], name='anime_genre_genre_idx')]
+
+    def __str__(self):
+        return f"{self.anime_id} -> {self.genre_id}"
+
+
 class Episode(models.Model):
     anime = models.ForeignKey(Anime, on_delete=models.CASCADE)
     episode_number = models.IntegerField()
@@ -133,7 +163,7 @@ class Episode(models.Model):
     #播放信息
     release_date = models.DateField(null=True)
     duration = models.CharField(max_length=20, blank=True)
-    online_urls = models.TextField(blank=True)#存储多个播放链接，格式可为JSON或分行文本
+    online_urls = models.JSONField(default=list, blank=True)#播放链接列表
 
     #分类信息
     episode_type = models.IntegerField(default=1)    #(正片/OVA等)
@@ -191,6 +221,8 @@ class Comment(models.Model):
     content = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     likes = models.IntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)  # 冗余的可见（未隐藏）回复数，由信号与隐藏/恢复操作原子维护
+    is_banned = models.BooleanField(default=False)  # 封禁作者时软删除
 
     # 添加评论范围标识
     COMMENT_SCOPE = [
@@ -202,6 +234,10 @@ class Comment(models.Model):
     ]
     scope = models.CharField(max_length=10, choices=COMMENT_SCOPE, default='ANIME')
 
+    class Meta:
+        # 动态流按 "被隐藏的评论" 过滤，部分索引只收录少量被隐藏的行
+        indexes = [models.Index(fields=['id'], condition=models.Q(is_banned=True), name='comment_hidden_idx')]
+
     def __str__(self):
         return f"{self.user.username} - {self.score}分"
 
@@ -211,6 +247,7 @@ class Reply(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    is_banned = models.BooleanField(default=False)  # 封禁作者时软删除
 
 
 class Like(models.Model):
@@ -277,6 +314,126 @@ class Report(models.Model):
     def __str__(self):
         return f"{self.reporter.username}举报{self.content_type}({self.object_id})"
 
+
+class ModerationTarget(models.Model):
+    """审核队列：按被举报对象聚合举报，管理员按优先级领取（租约）并一次性处理该对象的全部举报"""
+    STATUS_CHOICES = [
+        ('OPEN', '待处理'),
+        ('RESOLVED', '已处理'),
+        ('REJECTED', '已驳回'),
+    ]
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    report_count = models.PositiveIntegerField(default=0)  # 累计举报数
+    pending_count = models.PositiveIntegerField(default=0)  # 待处理举报数
+    categories = models.JSONField(default=dict, blank=True)  # 待处理举报的分类计数 {category: count}
+    first_reported_at = models.DateTimeField()
+    last_reported_at = models.DateTimeField()
+    priority = models.FloatField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
+
+    # 领取租约：过期后其他管理员可以重新领取
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    lease_until = models.DateTimeField(null=True, blank=True)
+
+    resolved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    resolution = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_moderation_target')
+        ]
+        indexes = [models.Index(fields=['status', '-priority'], name='moderation_queue_idx')]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id} ({self.status}, {self.pending_count})"
+
+
+class ContentFingerprint(models.Model):
+    """评论/回复的 SimHash 指纹：64 位指纹切成四段 16 位分桶并分别建索引，用于快速查找近似重复内容"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    simhash = models.BigIntegerField()  # 以有符号 64 位整数存储
+    band0 = models.IntegerField()
+    band1 = models.IntegerField()
+    band2 = models.IntegerField()
+    band3 = models.IntegerField()
+
+    cluster_id = models.BigIntegerField(null=True, blank=True, db_index=True)  # 近似重复内容的簇，取簇内最早指纹的 id
+    flagged = models.BooleanField(default=False)  # 簇规模达到阈值后自动标记，供管理员批量处理
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_content_fingerprint')
+        ]
+        indexes = [
+            models.Index(fields=['band0', 'created_at'], name='fingerprint_band0_idx'),
+            models.Index(fields=['band1', 'created_at'], name='fingerprint_band1_idx'),
+            models.Index(fields=['band2', 'created_at'], name='fingerprint_band2_idx'),
+            models.Index(fields=['band3', 'created_at'], name='fingerprint_band3_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id} ({self.simhash & 0xFFFFFFFFFFFFFFFF:016x})"
+
+
+class FilterKeyword(models.Model):
+    """评论/回复关键词过滤词表，由管理员维护；变更后各进程自动重建匹配自动机"""
+    ACTION_CHOICES = [
+        ('BLOCK', '拒绝发布'),
+        ('MASK', '打码显示'),
+        ('FLAG', '标记待审核'),  # 如剧透关键词
+    ]
+    word = models.CharField(max_length=100, unique=True)  # 存储归一化（小写、半角）后的形式
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='BLOCK')
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.word} ({self.action})"
+
+
+class KeywordFlag(models.Model):
+    """命中“标记待审核”关键词的评论/回复，供管理员复核"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    keywords = models.JSONField(default=list)
+    reviewed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_keyword_flag')
+        ]
+        indexes = [models.Index(fields=['reviewed', '-created_at'], name='keyword_flag_review_idx')]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id} {self.keywords}"
+
+
+class UserModerationStats(models.Model):
+    """用户内容与举报的冗余计数，由信号维护，供管理后台用户列表直接读取"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='moderation_stats')
+    comments = models.PositiveIntegerField(default=0)
+    replies = models.PositiveIntegerField(default=0)
+    items_created = models.PositiveIntegerField(default=0)  # 创建的番剧条目
+    reports_filed = models.PositiveIntegerField(default=0)  # 发起的举报
+    reports_received = models.PositiveIntegerField(default=0)  # 针对其评论/回复/条目的举报
+
+    def __str__(self):
+        return f"{self.user_id} stats"
+
 """
 角色阵容与制作团队
 """
@@ -449,6 +606,20 @@ class AnimeStaff(models.Model):
         role_name = self.role.name
         return f"{self.person.pers_name} - {role_name} @ {self.anime.title}"
 
+
+class AnimeCredits(models.Model):
+    """
+    预计算的番剧演职员文档：角色（含声优）与制作人员列表。
+    关联表变化后按番剧增量重建，批量导入后用 rebuild_anime_credits 命令整体重建；详情页只读这一行。
+    """
+    anime = models.OneToOneField(Anime, on_delete=models.CASCADE, primary_key=True, related_name="credits")
+    characters = models.JSONField(default=list)  # [{"name", "avatar", "voiceActors": [...]}]
+    staff = models.JSONField(default=list)  # [{"role", "name", "character"?}]
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"credits of {self.anime_id}"
+
 """验证码存储表，用于注册/找回密码等功能"""
 class VerificationCode(models.Model):
     target = models.CharField(max_length=100, unique=True)  # 手机号或邮箱
@@ -461,6 +632,41 @@ class VerificationCode(models.Model):
     def __str__(self):
         return f"{self.target} -> {self.code}"
 
+
+class UserSession(models.Model):
+    """用户 -> 会话 key 索引，登录时写入，封禁/改密/退出所有设备时按用户直接删除会话"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    session_key = models.CharField(max_length=40, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.session_key}"
+
+
+class OutboundMessage(models.Model):
+    """待投递的验证码邮件/短信（数据库投递队列），由 deliver_messages 命令的 worker 发送"""
+    STATUS_CHOICES = [
+        ('PENDING', '待发送'),
+        ('SENT', '已发送'),
+        ('DEAD', '发送失败'),
+    ]
+    channel = models.CharField(max_length=10)  # email / sms
+    recipient = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)  # 重试退避时间，也用作 worker 领取后的租约
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='outbound_status_due_idx')]
+
+    def __str__(self):
+        return f"{self.channel}:{self.recipient} ({self.status})"
+
 """
 Activity / Feed（用户动态流）
 """
@@ -478,12 +684,29 @@ class Activity(models.Model):
     ]
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    # 写入时快照的展示数据（标题、范围、缩略图、摘要），读取动态时无需再关联目标对象
+    payload = models.JSONField(default=dict, blank=True)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [models.Index(fields=['user', 'created_at'])]
         verbose_name = "用户动态"
         verbose_name_plural = "用户动态流"
+
+
+class TimelineEntry(models.Model):
+    """首页时间线：关注者动态写扩散后的物化行，每个用户只保留有限条"""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="timeline_entries")
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="timeline_entries")
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")  # 冗余动态发布者，便于读取时做隐私过滤
+    created_at = models.DateTimeField()  # 与动态创建时间一致
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "activity"], name="unique_timeline_owner_activity")
+        ]
+        indexes = [models.Index(fields=["owner", "-created_at"], name="timeline_owner_created_idx")]
+
 """"
 通知模型
 """
@@ -595,4 +818,38 @@ class AdminLog(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.admin.username} - {self.get_action_type_display()} - {self.created_at}"
\ No newline at end of file
+        return f"{self.admin.username} - {self.get_action_type_display()} - {self.created_at}"
+
+
+class ContentSweepJob(models.Model):
+    """封禁/解封时对用户内容的后台分批软删除/恢复任务，进度按 AdminLog 查询"""
+    ACTIONS = [
+        ('HIDE', '软删除内容'),
+        ('RESTORE', '恢复内容'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', '等待执行'),
+        ('RUNNING', '执行中'),
+        ('DONE', '已完成'),
+        ('CANCELLED', '已取消'),
+        ('FAILED', '执行失败'),
+    ]
+    admin_log = models.OneToOneField(AdminLog, on_delete=models.CASCADE, related_name='content_sweep')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    # 断点：当前处理到的内容类型与该类型下最后处理的主键（按主键递增分批）
+    stage = models.CharField(max_length=20, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'status'], name='sweep_user_status_idx')]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.user_id} ({self.status})"
@@ -0,0 +1,124 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+
+from wangumi_app.models import Anime, Character, Comment, Episode, Like, Person, WatchStatus
+from wangumi_app.services.generic_prefetch import prefetch_generic_targets
+from wangumi_app.utils import resolve_cover_url
+
+EXCERPT_LENGTH = 50
+
+
+def _excerpt(text: Optional[str]) -> str:
+    return (text or "")[:EXCERPT_LENGTH]
+
+
+def _describe(obj) -> Tuple[Optional[str], str]:
+    """Return ``(title, thumbnail)`` of an object a comment can be attached to."""
+    if isinstance(obj, Anime):
+        return obj.title, resolve_cover_url(obj) or ""
+    if isinstance(obj, Episode):
+        return f"{obj.anime.title} - {obj.title}", resolve_cover_url(obj.anime) or ""
+    if isinstance(obj, Character):
+        return obj.name, obj.image or ""
+    if isinstance(obj, Person):
+        return obj.pers_name, obj.pers_img or ""
+    return None, ""
+
+
+def _comment_target(comment: Comment):
+    try:
+        return comment.content_object
+    except ObjectDoesNotExist:
+        return None
+
+
+def build_activity_payload(instance) -> dict:
+    """
+    Snapshot what the activity feed displays for ``instance``.
+
+    The payload holds ``title``, ``scope``, ``thumbnail`` and ``excerpt`` so
+    feeds render without joining back to the target, and keep rendering after
+    the target has been deleted. Titles match what the feed used to resolve on
+    read: the commented object for comments, the comment text for likes and
+    the anime title for watch statuses and new items. A missing target yields
+    a payload whose title is ``None``.
+    """
+    if instance is None:
+        return {"title": None, "scope": None, "thumbnail": "", "excerpt": ""}
+    if isinstance(instance, Comment):
+        title, thumbnail = _describe(_comment_target(instance))
+        return {
+            "title": title,
+            "scope": instance.scope,
+            "thumbnail": thumbnail,
+            "excerpt": _excerpt(instance.content),
+        }
+    if isinstance(instance, Like):
+        comment = instance.comment
+        _, thumbnail = _describe(_comment_target(comment))
+        return {
+            "title": _excerpt(comment.content),
+            "scope": comment.scope,
+            "thumbnail": thumbnail,
+            "excerpt": _excerpt(comment.content),
+        }
+    if isinstance(instance, WatchStatus):
+        return {
+            "title": instance.anime.title,
+            "scope": "ANIME",
+            "thumbnail": resolve_cover_url(instance.anime) or "",
+            "excerpt": instance.get_status_display(),
+        }
+    if isinstance(instance, Anime):
+        return {
+            "title": instance.title,
+            "scope": "ITEM",
+            "thumbnail": resolve_cover_url(instance) or "",
+            "excerpt": _excerpt(instance.description),
+        }
+    return {"title": str(instance), "scope": None, "thumbnail": "", "excerpt": ""}
+
+
+def hidden_activities(prefix: str = "") -> Q:
+    """
+    Filter for activities about hidden content: comments soft-deleted by
+    moderation (``is_banned``) and likes of such comments. ``prefix`` is the
+    path to the activity, e.g. ``"activity__"`` for timeline entries.
+    """
+    content_type, object_id = f"{prefix}content_type", f"{prefix}object_id__in"
+    return Q(**{
+        content_type: ContentType.objects.get_for_model(Comment),
+        object_id: Comment.objects.filter(is_banned=True).values("pk"),
+    }) | Q(**{
+        content_type: ContentType.objects.get_for_model(Like),
+        object_id: Like.objects.filter(comment__is_banned=True).values("pk"),
+    })
+
+
+def build_payloads_for(activities: Sequence) -> Dict[int, dict]:
+    """
+    Build payloads for activities stored without one.
+
+    Targets are resolved with one query per content type, and the objects the
+    resulting comments point at with one more round, so a whole page or backfill
+    batch costs a handful of queries. Returns ``{activity_id: payload}``.
+    """
+    activities = list(activities)
+    prefetch_generic_targets(activities)
+
+    comments = []
+    for activity in activities:
+        target = activity.content_object
+        if isinstance(target, Comment):
+            comments.append(target)
+        elif isinstance(target, Like):
+            comments.append(target.comment)
+    prefetch_generic_targets(comments)
+
+    return {activity.id: build_activity_payload(activity.content_object) for activity in activities}
+
+
+__all__ = ["EXCERPT_LENGTH", "build_activity_payload", "build_payloads_for", "hidden_activities"]
@@ -0,0 +1,219 @@
+"""
+Cached anime detail documents.
+
+The detail page payload (basic info, meta with episode counts and the latest
+episodes, characters and staff)
+is assembled once and cached under ``anime_detail:<id>:<version>``, where the
+version is the anime's :mod:`content version <wangumi_app.services.content_versions>`.
+Signals on the anime, its episodes, staff and cast bump it, so the next read
+builds the document under a fresh key and the old one just expires.
+
+Misses go through the cache backend's ``get_or_set``: one worker builds the
+document while concurrent requests for the same key wait for it instead of
+all hitting the database.
+
+Comments change far more often than the rest of the page, so only the latest
+``ANIME_DETAIL_COMMENT_LIMIT`` of them are served, from a separate short-lived
+entry with its own version, bumped whenever a comment on the anime is saved or
+deleted. The list pages share a single version bumped by any change to what
+they render; popularity, which moves on every watch, only marks them stale
+and the version follows at most every ``ANIME_LIST_COUNTER_REFRESH_SECONDS``.
+"""
+import time
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+
+from wangumi_app.models import Anime, Comment
+from wangumi_app.services.content_versions import (
+    Version, bump_versions, get_version, get_versions, publish_versions
+)
+from wangumi_app.services.credits import get_credits
+from wangumi_app.services.episodes import summarize_episodes
+from wangumi_app.utils import resolve_cover_url
+
+STATUS_DISPLAY = {
+    "FINISHED": "已完结",
+    "RELEASING": "连载中",
+    "NOT_YET_RELEASED": "未开播",
+    "CANCELLED": "已取消",
+    "HIATUS": "暂停连载",
+}
+
+
+def _get_setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+DETAIL_VERSIONS = "anime_version"
+COMMENT_VERSIONS = "anime_comments_version"
+LIST_VERSIONS = "anime_list_version"
+LIST_COUNTERS_STALE = "anime_list_counters_stale"
+
+# Anime columns the list pages render or sort on (views.anime_views._build_anime_list_response).
+LIST_FIELDS = frozenset({
+    "title", "cover_url", "cover_image", "rating", "popularity", "description", "updated_at", "genres", "is_admin",
+})
+# Rendered counters that change too often to retire the lists on every write.
+LIST_COUNTER_FIELDS = frozenset({"popularity"})
+
+
+def detail_versions(anime_id: int) -> List[Version]:
+    """Versions of the detail document and its comment section."""
+    return get_versions([(DETAIL_VERSIONS, anime_id), (COMMENT_VERSIONS, anime_id)])
+
+
+def list_version() -> Version:
+    """Version of the list pages, moved on read once stale counters are old enough."""
+    version = get_version(LIST_VERSIONS, "all")
+    refresh = int(_get_setting("ANIME_LIST_COUNTER_REFRESH_SECONDS", 60))
+    if time.time() - version[1] >= refresh and cache.get(LIST_COUNTERS_STALE):
+        cache.delete(LIST_COUNTERS_STALE)
+        publish_versions(LIST_VERSIONS, ["all"])
+        version = get_version(LIST_VERSIONS, "all")
+    return version
+
+
+def episodes_version(anime_id: int) -> Version:
+    """Episode changes bump the detail version, so episode listings share it."""
+    return get_version(DETAIL_VERSIONS, anime_id)
+
+
+def build_anime_detail(anime_id: int) -> Optional[dict]:
+    """The detail payload without comments, or ``None`` when the anime does not exist."""
+    anime = Anime.objects.select_related("created_by").filter(pk=anime_id).first()
+    if anime is None:
+        return None
+
+    # Cast and staff come precomputed from one AnimeCredits row (see services.credits).
+    characters_payload, staff_payload = get_credits(anime.id)
+
+    # Long series are listed through the episode endpoint; only counts and the latest few are embedded.
+    episodes = summarize_episodes(anime.id)
+    if episodes.latest_number:
+        update_progress = f"已更新至第{episodes.latest_number}集"
+    elif anime.total_episodes:
+        update_progress = f"共{anime.total_episodes}集"
+    else:
+        update_progress = "暂无更新信息"
+
+    return {
+        "basic": {
+            "id": anime.id,
+            "title": anime.title,
+            "titleJapanese": anime.title_cn,
+            "cover": resolve_cover_url(anime),
+            "rating": anime.rating,
+            "summary": anime.description,
+        },
+        "meta": {
+            "category": anime.genres or [],
+            "status": STATUS_DISPLAY.get((anime.status or "").upper(), anime.status or "未知"),
+            "episodes": anime.total_episodes,
+            "episodes_detail": episodes.latest,
+            "episodeCount": episodes.total,
+            "episodeCountsByType": episodes.counts_by_type,
+            "releaseDate": anime.release_date.isoformat() if anime.release_date else None,
+            "updateProgress": update_progress,
+            "createdBy": getattr(anime.created_by, "username", None),
+            "createdAt": anime.created_at.isoformat() if anime.created_at else None,
+            "isAdmin": anime.is_admin,
+        },
+        "relations": {
+            "characters": characters_payload,
+            "staff": staff_payload,
+        },
+    }
+
+
+def get_anime_detail(anime_id: int) -> Optional[dict]:
+    """The cached detail document of the anime's current version."""
+    return cache.get_or_set(
+        f"anime_detail:{anime_id}:{get_version(DETAIL_VERSIONS, anime_id)[0]}",
+        lambda: build_anime_detail(anime_id),
+        int(_get_setting("ANIME_DETAIL_CACHE_SECONDS", 3600)),
+    )
+
+
+def _load_comments(anime_id: int) -> List[dict]:
+    comments = (
+        Comment.objects.filter(
+            content_type=ContentType.objects.get_for_model(Anime),
+            object_id=anime_id,
+            scope="ANIME",
+            is_banned=False,
+        )
+        .select_related("user")
+        .order_by("-created_at")[: int(_get_setting("ANIME_DETAIL_COMMENT_LIMIT", 20))]
+    )
+    return [
+        {
+            "user": comment.user.username if comment.user else "匿名",
+            "content": comment.content,
+            "createdAt": comment.created_at.isoformat() if comment.created_at else None,
+        }
+        for comment in comments
+    ]
+
+
+def get_anime_comments(anime_id: int) -> List[dict]:
+    """The latest comments of the anime, cached briefly."""
+    return cache.get_or_set(
+        f"anime_comments:{anime_id}:{get_version(COMMENT_VERSIONS, anime_id)[0]}",
+        lambda: _load_comments(anime_id),
+        int(_get_setting("ANIME_DETAIL_COMMENT_CACHE_SECONDS", 60)),
+    )
+
+
+def bump_anime_detail(anime_ids: Iterable[int]) -> None:
+    """Retire the cached detail documents of ``anime_ids`` once the current transaction commits."""
+    bump_versions(DETAIL_VERSIONS, anime_ids)
+
+
+def bump_anime_list() -> None:
+    """Retire every anime list page (any anime was added, removed or changed)."""
+    bump_versions(LIST_VERSIONS, ["all"])
+
+
+def bump_anime_list_for(update_fields: Optional[Iterable[str]] = None) -> None:
+    """Retire the list pages after an anime save of ``update_fields`` (``None``: every field)."""
+    fields = LIST_FIELDS if update_fields is None else LIST_FIELDS.intersection(update_fields)
+    if not fields:
+        return
+    if fields <= LIST_COUNTER_FIELDS:
+        transaction.on_commit(lambda: cache.set(LIST_COUNTERS_STALE, True, None))
+        return
+    bump_anime_list()
+
+
+def invalidate_anime_comments(anime_id: int) -> None:
+    bump_versions(COMMENT_VERSIONS, [anime_id])
+
+
+def invalidate_comments_of(comment_ids: Iterable[int]) -> None:
+    """Retire the comment sections showing any of ``comment_ids``; for ``update()`` writes that skip the signals."""
+    anime_ids = set(
+        Comment.objects.filter(pk__in=list(comment_ids), content_type=ContentType.objects.get_for_model(Anime))
+        .values_list("object_id", flat=True)
+    )
+    if anime_ids:
+        bump_versions(COMMENT_VERSIONS, anime_ids)
+
+
+__all__ = [
+    "STATUS_DISPLAY",
+    "build_anime_detail",
+    "bump_anime_detail",
+    "bump_anime_list",
+    "bump_anime_list_for",
+    "detail_versions",
+    "episodes_version",
+    "get_anime_comments",
+    "get_anime_detail",
+    "invalidate_anime_comments",
+    "invalidate_comments_of",
+    "list_version",
+]
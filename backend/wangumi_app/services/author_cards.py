@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from wangumi_app.models import UserProfile
+
+DEFAULT_AVATAR_URL = "/avatars/default.jpg"
+
+User = get_user_model()
+
+
+def _get_setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _card_ttl() -> float:
+    return float(_get_setting("AUTHOR_CARD_TTL_SECONDS", 60))
+
+
+def _card_capacity() -> int:
+    return int(_get_setting("AUTHOR_CARD_CACHE_SIZE", 4096))
+
+
+class _AuthorCardCache:
+    """
+    Process-local LRU of author cards with a short TTL.
+
+    Entries are invalidated explicitly when a user edits their own profile; the
+    TTL bounds staleness for edits made by other processes.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, dict]:
+        now = time.monotonic()
+        found: Dict[int, dict] = {}
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is None:
+                    continue
+                expires_at, card = entry
+                if expires_at <= now:
+                    del self._entries[user_id]
+                    continue
+                self._entries.move_to_end(user_id)
+                found[user_id] = card
+        return found
+
+    def set_many(self, cards: Dict[int, dict]) -> None:
+        ttl = _card_ttl()
+        if ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        capacity = _card_capacity()
+        with self._lock:
+            for user_id, card in cards.items():
+                self._entries[user_id] = (expires_at, card)
+                self._entries.move_to_end(user_id)
+            while len(self._entries) > capacity:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = _AuthorCardCache()
+
+
+def _avatar_url(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    return UserProfile._meta.get_field("avatar").storage.url(name)
+
+
+def _load_cards(user_ids) -> Dict[int, dict]:
+    rows = User.objects.filter(id__in=user_ids).values(
+        "id", "username", "userprofile__nickname", "userprofile__avatar"
+    )
+    return {
+        row["id"]: {
+            "user_id": row["id"],
+            "username": row["username"],
+            "nickname": row["userprofile__nickname"] or "",
+            "avatar": _avatar_url(row["userprofile__avatar"]),
+        }
+        for row in rows
+    }
+
+
+def get_author_cards(user_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Return ``{user_id: card}`` for every existing user in ``user_ids``.
+
+    A card holds ``user_id``, ``username``, ``nickname`` and ``avatar`` (the avatar
+    URL, or ``None`` when the user has not uploaded one). Cache misses are loaded
+    with a single query joining the profile table, so rendering a page of authors
+    costs at most one round trip regardless of its size.
+    """
+    ids = {int(user_id) for user_id in user_ids if user_id is not None}
+    if not ids:
+        return {}
+
+    cards = _cache.get_many(ids)
+    missing = ids.difference(cards)
+    if missing:
+        loaded = _load_cards(missing)
+        _cache.set_many(loaded)
+        cards.update(loaded)
+    return {user_id: dict(card) for user_id, card in cards.items()}
+
+
+def get_author_card(user_id: int) -> Optional[dict]:
+    """Return the card of a single user, or ``None`` if the user does not exist."""
+    return get_author_cards([user_id]).get(user_id)
+
+
+def avatar_or_default(card: Optional[dict], default: Optional[str] = DEFAULT_AVATAR_URL) -> Optional[str]:
+    """Return the avatar URL of ``card``, falling back to ``default``."""
+    if card and card.get("avatar"):
+        return card["avatar"]
+    return default
+
+
+def invalidate_author_cards(*user_ids: int) -> None:
+    """Drop cached cards so the next read reflects a profile change."""
+    _cache.delete_many(user_ids)
+
+
+def clear_author_card_cache() -> None:
+    _cache.clear()
+
+
+__all__ = [
+    "DEFAULT_AVATAR_URL",
+    "avatar_or_default",
+    "clear_author_card_cache",
+    "get_author_card",
+    "get_author_cards",
+    "invalidate_author_cards",
+]
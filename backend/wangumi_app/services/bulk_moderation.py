@@ -0,0 +1,165 @@
+"""
+Bulk moderation actions: handle N reports, hide N comments or ban N users.
+
+Every action validates the requested ids against one locked read, applies a
+single set-based UPDATE to the items that passed, and writes its audit rows
+with ``bulk_create``. Items that cannot be applied (missing, already handled,
+...) are reported individually instead of failing the whole batch. The
+result is a list of ``{"id": ..., "success": bool, "error": str | None}`` in
+request order.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from wangumi_app.models import AdminLog, Comment, Report, User, UserBanLog
+from wangumi_app.services.anime_detail import invalidate_comments_of
+from wangumi_app.services.content_sweeps import start_sweep
+from wangumi_app.services.moderation_queue import sync_target
+from wangumi_app.services.session_security import invalidate_sessions_and_tokens_bulk
+from wangumi_app.services.token_versions import invalidate_cached_users
+
+MAX_BULK_ITEMS = 200
+
+
+def _unique_ids(ids: Iterable[int]) -> List[int]:
+    return list(OrderedDict.fromkeys(int(item) for item in ids))
+
+
+def _results(ids: List[int], errors: Dict[int, str]) -> List[dict]:
+    return [{"id": item, "success": item not in errors, "error": errors.get(item)} for item in ids]
+
+
+def _log_row(admin, action_type: str, description: str, meta: Optional[dict], **target) -> AdminLog:
+    meta = meta or {}
+    return AdminLog(
+        admin=admin,
+        action_type=action_type,
+        description=description,
+        ip_address=meta.get("ip_address"),
+        user_agent=meta.get("user_agent", ""),
+        **target,
+    )
+
+
+def bulk_handle_reports(
+    admin, report_ids: Iterable[int], action: str, resolution: str = "", meta: Optional[dict] = None
+) -> List[dict]:
+    """Mark pending reports RESOLVED or REJECTED; already handled reports fail."""
+    ids = _unique_ids(report_ids)
+    now = timezone.now()
+    with transaction.atomic():
+        reports = {report.pk: report for report in Report.objects.select_for_update().filter(pk__in=ids)}
+        errors = {
+            item: "举报记录不存在" if item not in reports else "举报已处理"
+            for item in ids
+            if item not in reports or reports[item].status != "PENDING"
+        }
+        handled = [reports[item] for item in ids if item not in errors]
+        Report.objects.filter(pk__in=[report.pk for report in handled]).update(
+            status=action, moderator=admin, handled_at=now, resolution=resolution
+        )
+        # UPDATE bypasses the Report signals: resync each affected queue target once.
+        for content_type_id, object_id in {(r.content_type_id, r.object_id) for r in handled}:
+            sync_target(content_type_id, object_id)
+        AdminLog.objects.bulk_create([
+            _log_row(
+                admin, "HANDLE_REPORT", f"批量处理举报 #{report.pk}: {action}", meta,
+                target_content_type_id=report.content_type_id,
+                target_object_id=report.object_id,
+            )
+            for report in handled
+        ])
+    return _results(ids, errors)
+
+
+def bulk_hide_comments(admin, comment_ids: Iterable[int], reason: str = "", meta: Optional[dict] = None) -> List[dict]:
+    """Soft-delete comments (``is_banned``); missing or already hidden comments fail."""
+    ids = _unique_ids(comment_ids)
+    with transaction.atomic():
+        comments = {
+            pk: (user_id, banned)
+            for pk, user_id, banned in Comment.objects.select_for_update()
+            .filter(pk__in=ids)
+            .values_list("pk", "user_id", "is_banned")
+        }
+        errors = {
+            item: "评论不存在" if item not in comments else "评论已隐藏"
+            for item in ids
+            if item not in comments or comments[item][1]
+        }
+        hidden = [item for item in ids if item not in errors]
+        Comment.objects.filter(pk__in=hidden).update(is_banned=True)
+        invalidate_comments_of(hidden)
+        comment_type = ContentType.objects.get_for_model(Comment)
+        AdminLog.objects.bulk_create([
+            _log_row(
+                admin, "DELETE_CONTENT", f"批量隐藏评论 #{item}" + (f"，理由：{reason}" if reason else ""), meta,
+                target_user_id=comments[item][0],
+                target_content_type=comment_type,
+                target_object_id=item,
+            )
+            for item in hidden
+        ])
+    return _results(ids, errors)
+
+
+def bulk_ban_users(
+    admin,
+    user_ids: Iterable[int],
+    reason: str,
+    ban_duration: Optional[int] = 7,
+    delete_content: bool = False,
+    meta: Optional[dict] = None,
+) -> List[dict]:
+    """
+    Deactivate users, revoke all their sessions and tokens in one batched pass,
+    and optionally schedule their content sweeps. Missing users, users already
+    banned and the acting admin themselves fail.
+    """
+    ids = _unique_ids(user_ids)
+    ban_until = timezone.now() + timedelta(days=ban_duration) if ban_duration else None
+    with transaction.atomic():
+        users = {user.pk: user for user in User.objects.select_for_update().filter(pk__in=ids)}
+        errors = {}
+        for item in ids:
+            if item not in users:
+                errors[item] = "用户不存在"
+            elif item == admin.pk:
+                errors[item] = "不能封禁自己"
+            elif not users[item].is_active:
+                errors[item] = "用户已被封禁"
+        banned = [users[item] for item in ids if item not in errors]
+        banned_ids = [user.pk for user in banned]
+
+        User.objects.filter(pk__in=banned_ids).update(is_active=False)
+        # Cached users (and token versions) are only dropped once the bans are committed.
+        transaction.on_commit(lambda: invalidate_cached_users(banned_ids))
+        invalidate_sessions_and_tokens_bulk(banned_ids)
+        UserBanLog.objects.bulk_create([
+            UserBanLog(
+                user=user, action="BAN", reason=reason, ban_duration=ban_duration,
+                ban_until=ban_until, operated_by=admin,
+            )
+            for user in banned
+        ])
+        logs = AdminLog.objects.bulk_create([
+            _log_row(
+                admin, "BAN_USER",
+                f"批量封禁用户 {user.username}，理由：{reason}" + (f"，时长：{ban_duration}天" if ban_duration else ""),
+                meta,
+                target_user=user,
+            )
+            for user in banned
+        ])
+        if delete_content:
+            for log in logs:
+                start_sweep(log.target_user_id, "HIDE", log)
+    return _results(ids, errors)
+
+
+__all__ = ["MAX_BULK_ITEMS", "bulk_ban_users", "bulk_handle_reports", "bulk_hide_comments"]
@@ -0,0 +1,187 @@
+"""
+Background sweeps that soft-delete or restore all content of a banned user.
+
+A sweep walks each content table in primary-key order and flips ``is_banned``
+in batches of ``CONTENT_SWEEP_BATCH_SIZE`` rows, one short transaction per
+batch, recording a resumable cursor (``stage``, ``last_id``) and progress on
+its :class:`~wangumi_app.models.ContentSweepJob`.
+
+Each batch locks the job row first. Starting a new sweep for a user cancels
+that user's active sweeps through the same row, so a ban racing a running
+restore (or the reverse) waits for the in-flight batch and then wins: the
+older sweep stops before its next batch and never overwrites the newer one.
+"""
+import logging
+import threading
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from wangumi_app.models import AdminLog, Anime, Comment, ContentSweepJob, Reply
+from wangumi_app.services.anime_detail import invalidate_comments_of
+from wangumi_app.services.reply_threads import adjust_reply_counts
+
+logger = logging.getLogger(__name__)
+
+# (stage name, model, owner field), swept in this order.
+SWEEP_STAGES = (
+    ("comment", Comment, "user_id"),
+    ("reply", Reply, "user_id"),
+    ("anime", Anime, "created_by_id"),
+)
+ACTIVE_STATUSES = ("PENDING", "RUNNING")
+
+
+def _batch_size() -> int:
+    return int(getattr(settings, "CONTENT_SWEEP_BATCH_SIZE", 500))
+
+
+def _stale_after() -> timedelta:
+    return timedelta(seconds=int(getattr(settings, "CONTENT_SWEEP_STALE_SECONDS", 300)))
+
+
+def _base_queryset(model, owner_field: str, user_id: int, action: str):
+    queryset = model.objects.filter(**{owner_field: user_id})
+    # Restoring only touches rows that are hidden, like the old in-request restore.
+    return queryset.filter(is_banned=True) if action == "RESTORE" else queryset
+
+
+def start_sweep(user_id: int, action: str, admin_log: AdminLog) -> ContentSweepJob:
+    """
+    Record a sweep for ``user_id`` and schedule it once the caller's transaction commits.
+
+    Any active sweep of the same user is cancelled first.
+    """
+    cancel_sweeps(user_id)
+    job = ContentSweepJob.objects.create(admin_log=admin_log, user_id=user_id, action=action)
+    if getattr(settings, "CONTENT_SWEEP_IN_THREAD", True):
+        transaction.on_commit(lambda: _run_in_thread(job.pk))
+    return job
+
+
+def cancel_sweeps(user_id: int) -> int:
+    """Cancel the active sweeps of ``user_id``; waits for a batch in flight to commit."""
+    return ContentSweepJob.objects.filter(user_id=user_id, status__in=ACTIVE_STATUSES).update(
+        status="CANCELLED", finished_at=timezone.now()
+    )
+
+
+def _run_in_thread(job_id: int) -> None:
+    def target():
+        try:
+            run_sweep(job_id)
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=target, name=f"content-sweep-{job_id}", daemon=True).start()
+
+
+def _claim(job_id: int) -> Optional[ContentSweepJob]:
+    """Mark the job RUNNING unless another worker owns it; stale RUNNING jobs are taken over."""
+    stale_before = timezone.now() - _stale_after()
+    with transaction.atomic():
+        job = ContentSweepJob.objects.select_for_update(skip_locked=True).filter(pk=job_id).first()
+        if job is None:
+            return None
+        if job.status == "RUNNING" and job.updated_at > stale_before:
+            return None
+        if job.status not in ACTIVE_STATUSES:
+            return None
+        if job.total is None:
+            job.total = sum(
+                _base_queryset(model, field, job.user_id, job.action).count()
+                for _, model, field in SWEEP_STAGES
+            )
+        job.status = "RUNNING"
+        job.save(update_fields=["status", "total", "updated_at"])
+    return job
+
+
+def _run_batch(job_id: int, batch_size: int) -> bool:
+    """Process one batch; returns False when the job is finished or no longer running."""
+    with transaction.atomic():
+        job = ContentSweepJob.objects.select_for_update().get(pk=job_id)
+        if job.status != "RUNNING":
+            return False
+        stage_names = [name for name, _, _ in SWEEP_STAGES]
+        index = stage_names.index(job.stage) if job.stage in stage_names else 0
+        _, model, field = SWEEP_STAGES[index]
+
+        ids = list(
+            _base_queryset(model, field, job.user_id, job.action)
+            .filter(pk__gt=job.last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if ids:
+            hide = job.action == "HIDE"
+            if model is Reply:
+                adjust_reply_counts(Reply.objects.filter(pk__in=ids, is_banned=not hide), -1 if hide else 1)
+            model.objects.filter(pk__in=ids).update(is_banned=hide)
+            if model is Comment:
+                invalidate_comments_of(ids)
+            job.stage, job.last_id = stage_names[index], ids[-1]
+            job.processed += len(ids)
+        elif index + 1 < len(SWEEP_STAGES):
+            job.stage, job.last_id = stage_names[index + 1], 0
+        else:
+            job.status, job.finished_at = "DONE", timezone.now()
+        job.save(update_fields=["stage", "last_id", "processed", "status", "finished_at", "updated_at"])
+        return job.status == "RUNNING"
+
+
+def run_sweep(job_id: int, batch_size: Optional[int] = None) -> Optional[ContentSweepJob]:
+    """Run (or resume) a sweep to completion; returns the job, or None if it was not claimable."""
+    if _claim(job_id) is None:
+        return None
+    try:
+        while _run_batch(job_id, batch_size or _batch_size()):
+            pass
+    except Exception as exc:
+        logger.exception("内容处理任务 %s 失败", job_id)
+        ContentSweepJob.objects.filter(pk=job_id, status="RUNNING").update(
+            status="FAILED", error=str(exc)[:1000], finished_at=timezone.now()
+        )
+    return ContentSweepJob.objects.get(pk=job_id)
+
+
+def run_pending_sweeps(batch_size: Optional[int] = None) -> int:
+    """Run every pending or stalled sweep, oldest first; returns how many were run."""
+    stale_before = timezone.now() - _stale_after()
+    job_ids = list(
+        ContentSweepJob.objects.filter(Q(status="PENDING") | Q(status="RUNNING", updated_at__lte=stale_before))
+        .order_by("created_at")
+        .values_list("pk", flat=True)
+    )
+    return sum(1 for job_id in job_ids if run_sweep(job_id, batch_size) is not None)
+
+
+def sweep_progress(job: ContentSweepJob) -> dict:
+    return {
+        "job_id": job.id,
+        "admin_log_id": job.admin_log_id,
+        "user_id": job.user_id,
+        "action": job.action,
+        "status": job.status,
+        "stage": job.stage or None,
+        "processed": job.processed,
+        "total": job.total,
+        "error": job.error or None,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+__all__ = [
+    "SWEEP_STAGES",
+    "cancel_sweeps",
+    "run_pending_sweeps",
+    "run_sweep",
+    "start_sweep",
+    "sweep_progress",
+]
@@ -0,0 +1,82 @@
+"""
+Content versions kept in the shared cache.
+
+A version is ``(token, changed_at)``: ``token`` is replaced whenever the
+object changes and ``changed_at`` is the time of that change. Cached documents
+are keyed by the token and conditional GETs derive their ``ETag`` and
+``Last-Modified`` from the version, so neither needs a database query.
+
+Bumps are published after the current transaction commits so a reader can
+never cache the old rows under the new token. A missing version (never bumped,
+or evicted) is created on first read with the current time, which costs one
+rebuild and one full response at most.
+"""
+import time
+import uuid
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+Version = Tuple[str, float]
+
+PROFILE_VERSIONS = "profile_version"
+
+
+def _key(namespace: str, key: Hashable) -> str:
+    return f"{namespace}:{key}"
+
+
+def _new_version() -> Version:
+    return uuid.uuid4().hex, time.time()
+
+
+def get_versions(items: Iterable[Tuple[str, Hashable]]) -> List[Version]:
+    """Versions of ``(namespace, key)`` pairs, in order, with one cache round trip."""
+    keys = [_key(namespace, key) for namespace, key in items]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _new_version(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def get_version(namespace: str, key: Hashable) -> Version:
+    return get_versions([(namespace, key)])[0]
+
+
+def publish_versions(namespace: str, keys: Iterable[Hashable]) -> None:
+    """Give every key of ``namespace`` in ``keys`` a new version right away."""
+    changed_at = time.time()
+    versions: Dict[str, Version] = {_key(namespace, key): (uuid.uuid4().hex, changed_at) for key in keys}
+    cache.set_many(versions, None)
+
+
+def bump_versions(namespace: str, keys: Iterable[Hashable]) -> None:
+    """Give every key of ``namespace`` in ``keys`` a new version once the transaction commits."""
+    keys = {key for key in keys if key is not None}
+    if not keys:
+        return
+    transaction.on_commit(lambda: publish_versions(namespace, keys))
+
+
+def profile_version(user_id: int) -> Version:
+    return get_version(PROFILE_VERSIONS, user_id)
+
+
+def bump_profiles(user_ids: Iterable[int]) -> None:
+    """The profile page of each user changed (account, profile row or follow counters)."""
+    bump_versions(PROFILE_VERSIONS, user_ids)
+
+
+__all__ = [
+    "PROFILE_VERSIONS",
+    "Version",
+    "bump_profiles",
+    "bump_versions",
+    "get_version",
+    "get_versions",
+    "profile_version",
+    "publish_versions",
+]
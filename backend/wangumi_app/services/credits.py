@@ -0,0 +1,212 @@
+"""
+Precomputed credits documents (cast with voice actors, and staff) per anime.
+
+``AnimeCredits`` holds the two lists the detail page shows, so reading them is
+a single-row lookup instead of joins over ``CharacterAppearance``,
+``CharacterVoice`` and ``AnimeStaff``.
+
+* Incremental: signals on the link rows (and on the characters, people and
+  roles they point at) call :func:`schedule_credits_refresh`. Affected anime
+  are collected per thread and refreshed once, right after the transaction
+  commits, so an import that rewrites hundreds of links in one transaction
+  rebuilds each anime a single time.
+* Bulk: :func:`rebuild_all_credits` recomputes every document in one
+  set-based ``INSERT ... SELECT`` (``rebuild_anime_credits`` command) after
+  imports that bypass model signals.
+* A missing document is built on first read.
+"""
+import threading
+from typing import Iterable, List, Tuple
+
+from django.db import connection, transaction
+
+from wangumi_app.models import (
+    Anime, AnimeCredits, AnimeStaff, Character, CharacterAppearance, CharacterVoice, Person, StaffRole
+)
+
+
+def build_credits(anime_id: int) -> Tuple[List[dict], List[dict]]:
+    """``(characters, staff)`` of one anime, read from the link tables."""
+    appearances = list(
+        CharacterAppearance.objects.filter(anime_id=anime_id)
+        .select_related("character")
+        .order_by("order", "id")
+    )
+    voices_by_character = {}
+    voices = (
+        CharacterVoice.objects.filter(character_id__in=[appearance.character_id for appearance in appearances])
+        .select_related("person")
+        .order_by("id")
+    )
+    for voice in voices:
+        voices_by_character.setdefault(voice.character_id, []).append(voice.person.pers_name)
+    characters = [
+        {
+            "name": appearance.character.name,
+            "avatar": appearance.character.image or "",
+            "voiceActors": voices_by_character.get(appearance.character_id, []),
+        }
+        for appearance in appearances
+    ]
+
+    staff = []
+    members = (
+        AnimeStaff.objects.filter(anime_id=anime_id)
+        .select_related("person", "role", "character")
+        .order_by("order", "id")
+    )
+    for member in members:
+        entry = {
+            "role": member.role.name if member.role else "",
+            "name": member.person.pers_name if member.person else "",
+        }
+        if member.character:
+            entry["character"] = member.character.name
+        staff.append(entry)
+    return characters, staff
+
+
+def refresh_credits(anime_ids: Iterable[int]) -> int:
+    """Rebuild the documents of ``anime_ids``; returns how many were written."""
+    existing = set(Anime.objects.filter(pk__in=set(anime_ids)).values_list("pk", flat=True))
+    for anime_id in existing:
+        characters, staff = build_credits(anime_id)
+        AnimeCredits.objects.update_or_create(anime_id=anime_id, defaults={"characters": characters, "staff": staff})
+    return len(existing)
+
+
+def get_credits(anime_id: int) -> Tuple[List[dict], List[dict]]:
+    """``(characters, staff)`` from the precomputed row, building it when missing."""
+    row = AnimeCredits.objects.filter(anime_id=anime_id).values_list("characters", "staff").first()
+    if row is None:
+        characters, staff = build_credits(anime_id)
+        AnimeCredits.objects.get_or_create(anime_id=anime_id, defaults={"characters": characters, "staff": staff})
+        return characters, staff
+    return row
+
+
+class _Pending(threading.local):
+    def __init__(self):
+        self.anime_ids = set()
+
+
+_pending = _Pending()
+
+
+def schedule_credits_refresh(anime_ids: Iterable[int]) -> None:
+    """
+    Refresh the documents of ``anime_ids`` once the current transaction commits.
+
+    Ids queued during one transaction are refreshed together by the first
+    callback; later callbacks of the same transaction find nothing left to do.
+    Commit callbacks run in registration order, so anything the caller queues
+    with ``on_commit`` after this call (e.g. retiring cached detail documents)
+    already sees the new rows.
+    """
+    _pending.anime_ids.update(anime_id for anime_id in anime_ids if anime_id is not None)
+
+    def flush():
+        anime_ids, _pending.anime_ids = _pending.anime_ids, set()
+        if not anime_ids:
+            return
+        with transaction.atomic():
+            refresh_credits(anime_ids)
+
+    transaction.on_commit(flush)
+
+
+def anime_ids_for_characters(character_ids: Iterable[int]) -> set:
+    """Anime whose cast or staff lists show any of ``character_ids``."""
+    character_ids = list(character_ids)
+    return set(
+        CharacterAppearance.objects.filter(character_id__in=character_ids).values_list("anime_id", flat=True)
+    ) | set(AnimeStaff.objects.filter(character_id__in=character_ids).values_list("anime_id", flat=True))
+
+
+def anime_ids_for_person(person_id: int) -> set:
+    """Anime crediting the person as staff or through a voiced character."""
+    voiced = CharacterVoice.objects.filter(person_id=person_id).values_list("character_id", flat=True)
+    return set(AnimeStaff.objects.filter(person_id=person_id).values_list("anime_id", flat=True)) | set(
+        CharacterAppearance.objects.filter(character_id__in=voiced).values_list("anime_id", flat=True)
+    )
+
+
+def anime_ids_for_role(role_id: int) -> set:
+    return set(AnimeStaff.objects.filter(role_id=role_id).values_list("anime_id", flat=True))
+
+
+def _rebuild_sql() -> str:
+    tables = {
+        "anime": Anime._meta.db_table,
+        "credits": AnimeCredits._meta.db_table,
+        "appearance": CharacterAppearance._meta.db_table,
+        "voice": CharacterVoice._meta.db_table,
+        "staff": AnimeStaff._meta.db_table,
+        "character": Character._meta.db_table,
+        "person": Person._meta.db_table,
+        "role": StaffRole._meta.db_table,
+    }
+    # Same documents as build_credits: voices in id order, cast and staff by
+    # ("order", id), "character" only on staff rows that have one.
+    return """
+WITH voices AS (
+    SELECT voice.character_id, jsonb_agg(person.pers_name ORDER BY voice.id) AS names
+    FROM {voice} AS voice
+    JOIN {person} AS person ON person.pers_id = voice.person_id
+    GROUP BY voice.character_id
+),
+cast_docs AS (
+    SELECT appearance.anime_id,
+           jsonb_agg(
+               jsonb_build_object(
+                   'name', ch.name,
+                   'avatar', COALESCE(ch.image, ''),
+                   'voiceActors', COALESCE(voices.names, '[]'::jsonb)
+               )
+               ORDER BY appearance."order", appearance.id
+           ) AS doc
+    FROM {appearance} AS appearance
+    JOIN {character} AS ch ON ch.id = appearance.character_id
+    LEFT JOIN voices ON voices.character_id = appearance.character_id
+    GROUP BY appearance.anime_id
+),
+staff_docs AS (
+    SELECT staff.anime_id,
+           jsonb_agg(
+               jsonb_build_object('role', COALESCE(role.name, ''), 'name', COALESCE(person.pers_name, ''))
+               || CASE WHEN ch.id IS NULL THEN '{{}}'::jsonb ELSE jsonb_build_object('character', ch.name) END
+               ORDER BY staff."order", staff.id
+           ) AS doc
+    FROM {staff} AS staff
+    JOIN {person} AS person ON person.pers_id = staff.person_id
+    JOIN {role} AS role ON role.id = staff.role_id
+    LEFT JOIN {character} AS ch ON ch.id = staff.character_id
+    GROUP BY staff.anime_id
+)
+INSERT INTO {credits} (anime_id, characters, staff, updated_at)
+SELECT anime.id, COALESCE(cast_docs.doc, '[]'::jsonb), COALESCE(staff_docs.doc, '[]'::jsonb), NOW()
+FROM {anime} AS anime
+LEFT JOIN cast_docs ON cast_docs.anime_id = anime.id
+LEFT JOIN staff_docs ON staff_docs.anime_id = anime.id
+ON CONFLICT (anime_id) DO UPDATE
+SET characters = EXCLUDED.characters, staff = EXCLUDED.staff, updated_at = EXCLUDED.updated_at
+""".format(**tables)
+
+
+def rebuild_all_credits() -> int:
+    """Recompute every anime's document in one statement; returns the number of rows written."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_rebuild_sql())
+        return cursor.rowcount
+
+
+__all__ = [
+    "anime_ids_for_characters",
+    "anime_ids_for_person",
+    "anime_ids_for_role",
+    "build_credits",
+    "get_credits",
+    "rebuild_all_credits",
+    "refresh_credits",
+    "schedule_credits_refresh",
+]
@@ -0,0 +1,283 @@
+"""
+Delivery queue for verification emails and SMS.
+
+Requests only enqueue a :class:`Delivery`; workers send them in batches so a
+slow provider never blocks a request. Emails in one batch share a single SMTP
+connection. Failed deliveries are retried with exponential backoff and
+dead-lettered after ``DELIVERY_MAX_ATTEMPTS`` attempts.
+
+Two backends are available through ``DELIVERY_QUEUE_BACKEND``:
+
+* ``"database"`` (default) - rows in :class:`~wangumi_app.models.OutboundMessage`,
+  sent by the ``deliver_messages`` management command. Messages survive
+  restarts and deploys; run at least one worker next to the web processes.
+* ``"local"`` - an in-process queue drained by a pool of worker threads, for
+  tests and development without a worker. Queued messages are lost if the
+  process exits.
+"""
+import logging
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from wangumi_app.models import OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_EMAIL = "email"
+CHANNEL_SMS = "sms"
+
+
+@dataclass
+class Delivery:
+    channel: str
+    recipient: str
+    subject: str = ""
+    body: str = ""
+    attempts: int = 0
+    id: Optional[int] = None
+
+
+class DeliveryError(Exception):
+    """Raised by a sender when the provider did not accept a message."""
+
+
+# A sender delivers one batch of a channel and returns one error (or None) per message.
+Sender = Callable[[list[Delivery]], list[Optional[Exception]]]
+_senders: dict[str, Sender] = {}
+
+
+def register_sender(channel: str, sender: Sender) -> None:
+    _senders[channel] = sender
+
+
+def send_email_batch(deliveries: list[Delivery]) -> list[Optional[Exception]]:
+    """Send a batch of emails over one SMTP connection."""
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        return [exc] * len(deliveries)
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@wangumi.local")
+    errors: list[Optional[Exception]] = []
+    try:
+        for delivery in deliveries:
+            message = EmailMessage(
+                delivery.subject, delivery.body, from_email, [delivery.recipient], connection=connection
+            )
+            try:
+                errors.append(None if message.send() else DeliveryError("邮件未被服务器接受"))
+            except Exception as exc:
+                errors.append(exc)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            logger.warning("关闭 SMTP 连接失败", exc_info=True)
+    return errors
+
+
+register_sender(CHANNEL_EMAIL, send_email_batch)
+
+
+def deliver(deliveries: list[Delivery]) -> list[Optional[Exception]]:
+    """Send ``deliveries`` grouped by channel; returns errors in input order."""
+    errors: list[Optional[Exception]] = [None] * len(deliveries)
+    by_channel: dict[str, list[int]] = {}
+    for index, delivery in enumerate(deliveries):
+        by_channel.setdefault(delivery.channel, []).append(index)
+    for channel, indexes in by_channel.items():
+        sender = _senders.get(channel)
+        if sender is None:
+            for index in indexes:
+                errors[index] = DeliveryError(f"未注册的投递渠道: {channel}")
+            continue
+        try:
+            results = sender([deliveries[index] for index in indexes])
+        except Exception as exc:
+            results = [exc] * len(indexes)
+        for index, error in zip(indexes, results):
+            errors[index] = error
+    return errors
+
+
+def max_attempts() -> int:
+    return int(getattr(settings, "DELIVERY_MAX_ATTEMPTS", 5))
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt after ``attempts`` failed ones."""
+    base = float(getattr(settings, "DELIVERY_RETRY_BASE_SECONDS", 5))
+    cap = float(getattr(settings, "DELIVERY_RETRY_MAX_SECONDS", 300))
+    return min(base * 2 ** max(attempts - 1, 0), cap)
+
+
+def _batch_size() -> int:
+    return int(getattr(settings, "DELIVERY_BATCH_SIZE", 50))
+
+
+class LocalDeliveryQueue:
+    """In-process queue drained by a lazily started pool of daemon threads (tests / development only)."""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or int(getattr(settings, "DELIVERY_LOCAL_WORKERS", 2))
+        self.dead_letters: deque[tuple[Delivery, str]] = deque(maxlen=1000)
+        self._queue: "queue.Queue[Delivery]" = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, delivery: Delivery) -> None:
+        self._ensure_workers()
+        self._queue.put(delivery)
+
+    def join(self) -> None:
+        """Block until every queued delivery has been attempted once."""
+        self._queue.join()
+
+    def _ensure_workers(self) -> None:
+        if len(self._threads) >= self.workers:
+            return
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run, name=f"delivery-worker-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < _batch_size():
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._process(batch)
+            except Exception:
+                logger.exception("投递批次处理失败")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _process(self, batch: list[Delivery]) -> None:
+        for delivery, error in zip(batch, deliver(batch)):
+            if error is None:
+                continue
+            delivery.attempts += 1
+            if delivery.attempts >= max_attempts():
+                logger.error("投递失败进入死信: %s -> %s: %s", delivery.channel, delivery.recipient, error)
+                self.dead_letters.append((delivery, str(error)))
+                continue
+            timer = threading.Timer(retry_delay(delivery.attempts), self._queue.put, (delivery,))
+            timer.daemon = True
+            timer.start()
+
+
+class DatabaseDeliveryQueue:
+    """Queue persisted in ``OutboundMessage``; survives restarts and is shared by all workers."""
+
+    def enqueue(self, delivery: Delivery) -> None:
+        OutboundMessage.objects.create(
+            channel=delivery.channel,
+            recipient=delivery.recipient,
+            subject=delivery.subject,
+            body=delivery.body,
+        )
+
+    def process_due(self, batch_size: Optional[int] = None) -> int:
+        """
+        Claim and send one batch of due messages; returns how many were claimed.
+
+        Rows are claimed with ``SKIP LOCKED`` and leased by moving
+        ``next_attempt_at`` forward, so several workers can run side by side
+        and a crashed worker's messages are picked up again after the lease.
+        """
+        now = timezone.now()
+        lease = timedelta(seconds=float(getattr(settings, "DELIVERY_LEASE_SECONDS", 300)))
+        with transaction.atomic():
+            rows = list(
+                OutboundMessage.objects.select_for_update(skip_locked=True)
+                .filter(status="PENDING", next_attempt_at__lte=now)
+                .order_by("next_attempt_at")[: batch_size or _batch_size()]
+            )
+            if not rows:
+                return 0
+            OutboundMessage.objects.filter(pk__in=[row.pk for row in rows]).update(next_attempt_at=now + lease)
+
+        deliveries = [
+            Delivery(row.channel, row.recipient, row.subject, row.body, attempts=row.attempts, id=row.pk)
+            for row in rows
+        ]
+        errors = deliver(deliveries)
+        sent_ids = [delivery.id for delivery, error in zip(deliveries, errors) if error is None]
+        if sent_ids:
+            OutboundMessage.objects.filter(pk__in=sent_ids).update(
+                status="SENT", sent_at=timezone.now(), attempts=F("attempts") + 1, last_error=""
+            )
+        for delivery, error in zip(deliveries, errors):
+            if error is None:
+                continue
+            attempts = delivery.attempts + 1
+            dead = attempts >= max_attempts()
+            if dead:
+                logger.error("投递失败进入死信: %s -> %s: %s", delivery.channel, delivery.recipient, error)
+            OutboundMessage.objects.filter(pk=delivery.id).update(
+                status="DEAD" if dead else "PENDING",
+                attempts=attempts,
+                next_attempt_at=timezone.now() + timedelta(seconds=retry_delay(attempts)),
+                last_error=str(error)[:1000],
+            )
+        return len(rows)
+
+    def requeue_dead(self) -> int:
+        return OutboundMessage.objects.filter(status="DEAD").update(
+            status="PENDING", attempts=0, next_attempt_at=timezone.now()
+        )
+
+
+_queues: dict[str, object] = {}
+_queues_lock = threading.Lock()
+
+
+def get_delivery_queue():
+    backend = getattr(settings, "DELIVERY_QUEUE_BACKEND", "database")
+    with _queues_lock:
+        if backend not in _queues:
+            if backend == "local":
+                _queues[backend] = LocalDeliveryQueue()
+            elif backend == "database":
+                _queues[backend] = DatabaseDeliveryQueue()
+            else:
+                raise ValueError(f"未知的投递队列后端: {backend}")
+        return _queues[backend]
+
+
+def enqueue_delivery(delivery: Delivery) -> None:
+    get_delivery_queue().enqueue(delivery)
+
+
+__all__ = [
+    "CHANNEL_EMAIL",
+    "CHANNEL_SMS",
+    "DatabaseDeliveryQueue",
+    "Delivery",
+    "DeliveryError",
+    "LocalDeliveryQueue",
+    "deliver",
+    "enqueue_delivery",
+    "get_delivery_queue",
+    "register_sender",
+    "retry_delay",
+    "send_email_batch",
+]
@@ -0,0 +1,111 @@
+"""
+Episode listings for long-running series.
+
+The detail document only carries per-type counts and the latest few episodes;
+full listings are served page by page. Pages use keyset pagination on
+``episode_number`` (unique per anime, so the ``(anime, episode_number)``
+constraint index serves both the range filter and the ordering): the cursor
+is the last number of the previous page and the next page is simply
+``episode_number > cursor``, whatever the page depth.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from wangumi_app.models import Episode
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def serialize_episode(episode: Episode) -> dict:
+    return {
+        "id": episode.id,
+        "number": episode.episode_number,
+        "type": episode.episode_type,
+        "title": episode.title,
+        "title_cn": episode.title_cn,
+        "description": episode.description,
+        "release_date": episode.release_date.isoformat() if episode.release_date else None,
+        "duration": episode.duration,
+        "online_urls": episode.online_urls if isinstance(episode.online_urls, list) else [],
+    }
+
+
+@dataclass
+class EpisodeSummary:
+    total: int
+    latest_number: Optional[int]
+    counts_by_type: Dict[str, int]
+    latest: List[dict]
+
+
+def summarize_episodes(anime_id: int) -> EpisodeSummary:
+    """Counts per ``episode_type`` and the latest ``ANIME_DETAIL_LATEST_EPISODES`` episodes."""
+    rows = list(
+        Episode.objects.filter(anime_id=anime_id)
+        .values("episode_type")
+        .annotate(count=Count("id"), latest=Max("episode_number"))
+        .order_by("episode_type")
+    )
+    size = int(getattr(settings, "ANIME_DETAIL_LATEST_EPISODES", 3))
+    latest = list(Episode.objects.filter(anime_id=anime_id).order_by("-episode_number")[:size]) if rows else []
+    return EpisodeSummary(
+        total=sum(row["count"] for row in rows),
+        latest_number=max((row["latest"] for row in rows), default=None),
+        counts_by_type={str(row["episode_type"]): row["count"] for row in rows},
+        latest=[serialize_episode(episode) for episode in reversed(latest)],
+    )
+
+
+@dataclass
+class EpisodePage:
+    episodes: List[dict]
+    next_cursor: Optional[int]
+
+
+def list_episodes(
+    anime_id: int,
+    *,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    cursor: Optional[int] = None,
+    episode_type: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> EpisodePage:
+    """
+    One page of episodes ordered by number.
+
+    ``start``/``end`` bound the numbers (inclusive), ``cursor`` continues after
+    a previous page and ``episode_type`` keeps one kind of episode only.
+    """
+    queryset = Episode.objects.filter(anime_id=anime_id)
+    if start is not None:
+        queryset = queryset.filter(episode_number__gte=start)
+    if end is not None:
+        queryset = queryset.filter(episode_number__lte=end)
+    if cursor is not None:
+        queryset = queryset.filter(episode_number__gt=cursor)
+    if episode_type is not None:
+        queryset = queryset.filter(episode_type=episode_type)
+    # One extra row tells whether another page follows without a COUNT query.
+    episodes = list(queryset.order_by("episode_number")[: limit + 1])
+    has_more = len(episodes) > limit
+    episodes = episodes[:limit]
+    return EpisodePage(
+        episodes=[serialize_episode(episode) for episode in episodes],
+        next_cursor=episodes[-1].episode_number if has_more else None,
+    )
+
+
+__all__ = [
+    "DEFAULT_PAGE_SIZE",
+    "EpisodePage",
+    "EpisodeSummary",
+    "MAX_PAGE_SIZE",
+    "list_episodes",
+    "serialize_episode",
+    "summarize_episodes",
+]
@@ -0,0 +1,87 @@
+from typing import Dict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from wangumi_app.models import UserFollow, UserProfile
+from wangumi_app.services.content_versions import bump_profiles
+
+
+def count_follows(user_id: int) -> Dict[str, int]:
+    """Count the follow edges of ``user_id`` directly from ``UserFollow``."""
+    return {
+        "follower_count": UserFollow.objects.filter(following_id=user_id).count(),
+        "following_count": UserFollow.objects.filter(follower_id=user_id).count(),
+    }
+
+
+def _adjust(user_id: int, field: str, delta: int) -> None:
+    profiles = UserProfile.objects.filter(user_id=user_id)
+    change = {field: Greatest(F(field) + delta, Value(0))}
+    if profiles.update(**change):
+        return
+    # Profiles are created lazily; seed a new one from the relation itself so
+    # it starts consistent instead of from zero. The seed leaves out the edge
+    # being applied and the update adds it, so when two first follows race the
+    # loser's insert is ignored and its increment still lands on the new row.
+    counts = count_follows(user_id)
+    counts[field] = max(counts[field] - delta, 0)
+    UserProfile.objects.bulk_create([UserProfile(user_id=user_id, **counts)], ignore_conflicts=True)
+    profiles.update(**change)
+
+
+def record_follow(follower_id: int, following_id: int) -> None:
+    """
+    Apply a newly created follow edge to both profiles' counters.
+
+    Call inside the transaction that created the ``UserFollow`` row and only when
+    a row was actually created, so repeated follow requests do not drift.
+    """
+    _adjust(follower_id, "following_count", 1)
+    _adjust(following_id, "follower_count", 1)
+
+
+def record_unfollow(follower_id: int, following_id: int) -> None:
+    """Counterpart of ``record_follow`` for a deleted edge; counters never go below zero."""
+    _adjust(follower_id, "following_count", -1)
+    _adjust(following_id, "follower_count", -1)
+
+
+def _grouped_count(user_field: str):
+    return Coalesce(
+        Subquery(
+            UserFollow.objects.filter(**{user_field: OuterRef("user_id")})
+            .order_by()
+            .values(user_field)
+            .annotate(total=Count("id"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def reconcile_follow_counts(batch_size: int = 500) -> int:
+    """
+    Rewrite the counters of every profile that drifted from ``UserFollow``.
+
+    The actual counts are computed for all profiles in one grouped query and
+    only mismatching rows are written back. Returns the number of profiles fixed.
+    """
+    drifted = list(
+        UserProfile.objects.annotate(
+            actual_followers=_grouped_count("following_id"),
+            actual_following=_grouped_count("follower_id"),
+        )
+        .filter(~Q(follower_count=F("actual_followers")) | ~Q(following_count=F("actual_following")))
+        .only("id", "user_id", "follower_count", "following_count")
+    )
+    for profile in drifted:
+        profile.follower_count = profile.actual_followers
+        profile.following_count = profile.actual_following
+    UserProfile.objects.bulk_update(drifted, ["follower_count", "following_count"], batch_size=batch_size)
+    bump_profiles(profile.user_id for profile in drifted)
+    return len(drifted)
+
+
+__all__ = ["count_follows", "reconcile_follow_counts", "record_follow", "record_unfollow"]
@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+
+# Nested relations that are always needed when a target of this model is
+# rendered; they are joined into the per-type query instead of being fetched
+# lazily row by row.
+DEFAULT_SELECT_RELATED: Dict[str, Tuple[str, ...]] = {
+    "wangumi_app.like": ("comment",),
+    "wangumi_app.watchstatus": ("anime",),
+    "wangumi_app.episode": ("anime",),
+}
+
+TargetKey = Tuple[int, int]
+
+
+def _find_generic_field(model, ct_field: str, id_field: str) -> Optional[GenericForeignKey]:
+    for field in model._meta.private_fields:
+        if (
+            isinstance(field, GenericForeignKey)
+            and field.ct_field == ct_field
+            and field.fk_field == id_field
+        ):
+            return field
+    return None
+
+
+def prefetch_generic_targets(
+    rows: Sequence,
+    ct_field: str = "content_type",
+    id_field: str = "object_id",
+    to_attr: str = "prefetched_target",
+    select_related: Optional[Mapping[str, Iterable[str]]] = None,
+) -> Dict[TargetKey, object]:
+    """
+    Resolve the generic targets of ``rows`` with one query per content type.
+
+    ``rows`` are model instances carrying a ``(ct_field, id_field)`` pair, e.g.
+    ``Activity``/``Report`` (``content_type``/``object_id``) or ``AdminLog``
+    (``target_content_type``/``target_object_id``). Every row gets the target
+    (or ``None`` when it was deleted) on ``to_attr``; the matching
+    ``GenericForeignKey`` cache and the content type FK are primed as well, so
+    ``row.content_object`` and ``row.content_type.model`` no longer query.
+
+    Nested relations listed in ``DEFAULT_SELECT_RELATED`` (overridable with
+    ``select_related``, keyed by ``app_label.model``) are joined into the
+    per-type query. Returns ``{(content_type_id, object_id): target}``.
+    """
+    rows = list(rows)
+    if not rows:
+        return {}
+
+    related = dict(DEFAULT_SELECT_RELATED)
+    if select_related:
+        related.update({label: tuple(fields) for label, fields in select_related.items()})
+
+    ids_by_type: Dict[int, set] = {}
+    for row in rows:
+        ct_id = getattr(row, f"{ct_field}_id")
+        if ct_id is None:
+            continue
+        object_ids = ids_by_type.setdefault(ct_id, set())
+        if getattr(row, id_field) is not None:
+            object_ids.add(getattr(row, id_field))
+
+    content_types: Dict[int, ContentType] = {}
+    targets: Dict[TargetKey, object] = {}
+    for ct_id, object_ids in ids_by_type.items():
+        content_type = ContentType.objects.get_for_id(ct_id)
+        content_types[ct_id] = content_type
+        model = content_type.model_class()
+        if model is None or not object_ids:
+            continue
+        queryset = model._base_manager.filter(pk__in=object_ids)
+        nested = related.get(model._meta.label_lower)
+        if nested:
+            queryset = queryset.select_related(*nested)
+        for obj in queryset:
+            targets[(ct_id, obj.pk)] = obj
+
+    generic_fields = {}
+    for row in rows:
+        ct_id = getattr(row, f"{ct_field}_id")
+        target = targets.get((ct_id, getattr(row, id_field)))
+        setattr(row, to_attr, target)
+        if ct_id is None:
+            continue
+        setattr(row, ct_field, content_types[ct_id])
+        model = type(row)
+        if model not in generic_fields:
+            generic_fields[model] = _find_generic_field(model, ct_field, id_field)
+        if generic_fields[model] is not None:
+            generic_fields[model].set_cached_value(row, target)
+    return targets
+
+
+__all__ = ["DEFAULT_SELECT_RELATED", "prefetch_generic_targets"]
@@ -0,0 +1,102 @@
+"""
+Normalized anime genres.
+
+``Anime.genres`` (a JSON list) stays the source of truth written by the
+importers and the create/modify views; every save that may change it syncs
+the ``Genre`` / ``AnimeGenre`` tables. Category filters and the interest
+recommenders resolve genre names to anime ids through the indexed link table
+instead of scanning the JSON column, and per-genre counts are served from the
+cache.
+"""
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from wangumi_app.models import Anime, AnimeGenre, Genre
+
+COUNTS_CACHE_KEY = "genres:counts"
+
+
+def _counts_ttl() -> int:
+    return int(getattr(settings, "GENRE_COUNTS_CACHE_SECONDS", 600))
+
+
+def normalize_genres(raw) -> List[str]:
+    """Distinct, stripped, non-empty genre names in their original order."""
+    if not isinstance(raw, list):
+        return []
+    names = (str(item).strip() for item in raw if item is not None)
+    return list(dict.fromkeys(name for name in names if name and len(name) <= 100))
+
+
+def _genre_ids(names: Iterable[str]) -> Dict[str, int]:
+    names = list(names)
+    if not names:
+        return {}
+    Genre.objects.bulk_create([Genre(name=name) for name in names], ignore_conflicts=True)
+    return dict(Genre.objects.filter(name__in=names).values_list("name", "id"))
+
+
+def sync_anime_genres(anime: Anime) -> None:
+    """Make the link rows of ``anime`` match its ``genres`` list."""
+    wanted = set(_genre_ids(normalize_genres(anime.genres)).values())
+    current = set(AnimeGenre.objects.filter(anime=anime).values_list("genre_id", flat=True))
+    if wanted == current:
+        return
+    AnimeGenre.objects.filter(anime=anime, genre_id__in=current - wanted).delete()
+    AnimeGenre.objects.bulk_create(
+        [AnimeGenre(anime=anime, genre_id=genre_id) for genre_id in wanted - current], ignore_conflicts=True
+    )
+    invalidate_genre_counts()
+
+
+def rebuild_genre_links(batch_size: int = 1000) -> int:
+    """Re-sync every anime (e.g. after a raw SQL import); returns the number of link rows."""
+    rows = []
+    genre_ids: Dict[str, int] = {}
+    for anime_id, raw in Anime.objects.order_by("pk").values_list("pk", "genres").iterator(chunk_size=batch_size):
+        names = normalize_genres(raw)
+        missing = [name for name in names if name not in genre_ids]
+        genre_ids.update(_genre_ids(missing))
+        rows.extend(AnimeGenre(anime_id=anime_id, genre_id=genre_ids[name]) for name in names)
+    with transaction.atomic():
+        AnimeGenre.objects.all().delete()
+        AnimeGenre.objects.bulk_create(rows, batch_size=batch_size)
+    invalidate_genre_counts()
+    return len(rows)
+
+
+def anime_ids_with_genres(names: Iterable[str]):
+    """Subquery of the ids of anime having any of ``names``."""
+    return AnimeGenre.objects.filter(genre__name__in=list(names)).values("anime_id")
+
+
+def genre_counts() -> List[dict]:
+    """``[{"id", "name", "count"}]`` of every genre in use, most common first; cached."""
+    counts = cache.get(COUNTS_CACHE_KEY)
+    if counts is None:
+        counts = list(
+            Genre.objects.annotate(count=Count("anime_links"))
+            .filter(count__gt=0)
+            .order_by("-count", "name")
+            .values("id", "name", "count")
+        )
+        cache.set(COUNTS_CACHE_KEY, counts, _counts_ttl())
+    return counts
+
+
+def invalidate_genre_counts() -> None:
+    cache.delete(COUNTS_CACHE_KEY)
+
+
+__all__ = [
+    "anime_ids_with_genres",
+    "genre_counts",
+    "invalidate_genre_counts",
+    "normalize_genres",
+    "rebuild_genre_links",
+    "sync_anime_genres",
+]
@@ -0,0 +1,227 @@
+import heapq
+import logging
+from typing import List, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+
+from wangumi_app.models import Activity, PrivacySetting, TimelineEntry, UserFollow
+from wangumi_app.services.activity_payloads import hidden_activities
+
+logger = logging.getLogger(__name__)
+
+# Privacy values whose activities every follower may see; "mutual" additionally
+# requires the actor to follow the reader back, "self" is never fanned out.
+_FOLLOWER_VISIBLE = ("public", "friends")
+
+
+def _get_setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _fanout_follower_limit() -> int:
+    return int(_get_setting("TIMELINE_FANOUT_FOLLOWER_LIMIT", 1000))
+
+
+def _max_entries() -> int:
+    return int(_get_setting("TIMELINE_MAX_ENTRIES", 500))
+
+
+def _follow_backfill_size() -> int:
+    return int(_get_setting("TIMELINE_FOLLOW_BACKFILL", 20))
+
+
+def _has_many_followers(user_ref) -> Exists:
+    """``EXISTS`` that is true once ``user_ref`` has more followers than the fan-out limit."""
+    limit = _fanout_follower_limit()
+    return Exists(UserFollow.objects.filter(following_id=user_ref).order_by()[limit:limit + 1])
+
+
+def _visible_to(reader_id: int, actor_field: str) -> Q:
+    """
+    Filter for rows whose ``actor_field`` user currently lets ``reader_id`` (one
+    of their followers) see their activities.
+    """
+    privacy = f"{actor_field}__privacysetting__activities"
+    follows_back = Exists(
+        UserFollow.objects.filter(follower_id=OuterRef(f"{actor_field}_id"), following_id=reader_id)
+    )
+    return (
+        Q(**{f"{actor_field}__privacysetting__isnull": True})
+        | Q(**{f"{privacy}__in": _FOLLOWER_VISIBLE})
+        | (Q(**{privacy: "mutual"}) & follows_back)
+    )
+
+
+def is_fanout_on_read(user_id: int) -> bool:
+    """Accounts above the follower limit are pulled at read time instead of pushed."""
+    limit = _fanout_follower_limit()
+    return UserFollow.objects.filter(following_id=user_id).order_by()[limit:limit + 1].exists()
+
+
+def fan_out_activity(activity: Activity) -> int:
+    """
+    Push ``activity`` into the timelines of the actor's followers.
+
+    Followers that may not see the activity under the actor's current privacy
+    setting are skipped; accounts with more followers than
+    ``TIMELINE_FANOUT_FOLLOWER_LIMIT`` are skipped entirely and merged in by
+    ``get_home_timeline`` instead. Timelines pushed past
+    ``TIMELINE_MAX_ENTRIES`` are trimmed here, so reads never write. Returns
+    the number of entries written.
+    """
+    privacy = (
+        PrivacySetting.objects.filter(user_id=activity.user_id)
+        .values_list("activities", flat=True)
+        .first()
+        or "public"
+    )
+    if privacy not in _FOLLOWER_VISIBLE and privacy != "mutual":
+        return 0
+    if is_fanout_on_read(activity.user_id):
+        return 0
+
+    followers = UserFollow.objects.filter(following_id=activity.user_id)
+    if privacy == "mutual":
+        followers = followers.filter(
+            Exists(UserFollow.objects.filter(follower_id=activity.user_id, following_id=OuterRef("follower_id")))
+        )
+    entries = [
+        TimelineEntry(
+            owner_id=follower_id,
+            activity_id=activity.id,
+            actor_id=activity.user_id,
+            created_at=activity.created_at,
+        )
+        for follower_id in followers.values_list("follower_id", flat=True)
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+    _trim_oversized([entry.owner_id for entry in entries])
+    return len(entries)
+
+
+def fan_out_activity_safely(activity: Activity) -> None:
+    try:
+        fan_out_activity(activity)
+    except Exception:  # pragma: no cover - timeline is best effort
+        logger.exception("Failed to fan out activity %s", activity.pk)
+
+
+def backfill_followee(follower_id: int, followee_id: int) -> int:
+    """Copy the newest visible activities of a freshly followed user into the follower's timeline."""
+    if is_fanout_on_read(followee_id):
+        return 0
+    recent = (
+        Activity.objects.filter(user_id=followee_id)
+        .filter(_visible_to(follower_id, "user"))
+        .order_by("-created_at", "-id")
+        .values_list("id", "created_at")[: _follow_backfill_size()]
+    )
+    entries = [
+        TimelineEntry(owner_id=follower_id, activity_id=activity_id, actor_id=followee_id, created_at=created_at)
+        for activity_id, created_at in recent
+    ]
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    if entries:
+        trim_timeline(follower_id)
+    return len(entries)
+
+
+def remove_followee(follower_id: int, followee_id: int) -> int:
+    """Drop an unfollowed user's activities from the follower's timeline."""
+    deleted, _ = TimelineEntry.objects.filter(owner_id=follower_id, actor_id=followee_id).delete()
+    return deleted
+
+
+def trim_timeline(owner_id: int) -> int:
+    """Delete the entries of ``owner_id`` beyond ``TIMELINE_MAX_ENTRIES``."""
+    cap = _max_entries()
+    boundary = list(
+        TimelineEntry.objects.filter(owner_id=owner_id)
+        .order_by("-created_at", "-activity_id")
+        .values_list("created_at", "activity_id")[cap:cap + 1]
+    )
+    if not boundary:
+        return 0
+    created_at, activity_id = boundary[0]
+    deleted, _ = TimelineEntry.objects.filter(owner_id=owner_id).filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, activity_id__lte=activity_id)
+    ).delete()
+    return deleted
+
+
+def _trim_oversized(owner_ids=None) -> int:
+    """Trim the timelines (of ``owner_ids``, or all) holding more than the cap; one grouped query finds them."""
+    timelines = TimelineEntry.objects.all()
+    if owner_ids is not None:
+        if not owner_ids:
+            return 0
+        timelines = timelines.filter(owner_id__in=owner_ids)
+    oversized = (
+        timelines.values("owner_id")
+        .annotate(total=Count("id"))
+        .filter(total__gt=_max_entries())
+        .values_list("owner_id", flat=True)
+    )
+    return sum(trim_timeline(owner_id) for owner_id in list(oversized))
+
+
+def trim_all_timelines() -> int:
+    """Trim every timeline that grew beyond the cap; used by the maintenance command."""
+    return _trim_oversized()
+
+
+def get_home_timeline(owner, page: int, limit: int) -> Tuple[List[Activity], bool]:
+    """
+    Return one page of the activities of the users ``owner`` follows, newest
+    first, plus whether another page exists.
+
+    Pushed entries come from the owner's materialized timeline; activities of
+    followees above the fan-out limit are pulled from ``Activity`` directly and
+    merged in. Both sources are filtered by the actors' current privacy setting
+    and skip activities about content hidden by moderation.
+    """
+    window = page * limit
+    pushed = (
+        TimelineEntry.objects.filter(owner=owner)
+        .filter(_visible_to(owner.id, "actor"))
+        .exclude(hidden_activities("activity__"))
+        .order_by("-created_at", "-activity_id")
+        .values_list("created_at", "activity_id")[: window + 1]
+    )
+    pulled_actors = (
+        UserFollow.objects.filter(follower=owner)
+        .filter(_has_many_followers(OuterRef("following_id")))
+        .values("following_id")
+    )
+    pulled = (
+        Activity.objects.filter(user_id__in=Subquery(pulled_actors))
+        .filter(_visible_to(owner.id, "user"))
+        .exclude(hidden_activities())
+        .order_by("-created_at", "-id")
+        .values_list("created_at", "id")[: window + 1]
+    )
+
+    ordered_ids = []
+    seen = set()
+    for _, activity_id in heapq.merge(list(pushed), list(pulled), reverse=True):
+        if activity_id not in seen:
+            seen.add(activity_id)
+            ordered_ids.append(activity_id)
+
+    page_ids = ordered_ids[(page - 1) * limit:window]
+    activities = Activity.objects.filter(id__in=page_ids).select_related("user")
+    by_id = {activity.id: activity for activity in activities}
+    return [by_id[activity_id] for activity_id in page_ids if activity_id in by_id], len(ordered_ids) > window
+
+
+__all__ = [
+    "backfill_followee",
+    "fan_out_activity",
+    "fan_out_activity_safely",
+    "get_home_timeline",
+    "is_fanout_on_read",
+    "remove_followee",
+    "trim_all_timelines",
+    "trim_timeline",
+]
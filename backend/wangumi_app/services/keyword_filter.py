@@ -0,0 +1,255 @@
+"""
+Keyword screening for comments and replies with an Aho-Corasick automaton.
+
+The admin-managed :class:`~wangumi_app.models.FilterKeyword` list is compiled
+into one automaton per process; a post is scanned in a single linear pass no
+matter how many keywords exist, and every match carries the keyword's action:
+
+* ``BLOCK`` - the post is rejected;
+* ``MASK``  - the matched span is replaced with ``*``;
+* ``FLAG``  - the post is saved and recorded in ``KeywordFlag`` for review
+  (e.g. spoiler keywords).
+
+Hot reload: changing the list bumps a version token in the shared cache.
+Each process compares its automaton's version with that token at most every
+``KEYWORD_FILTER_CHECK_SECONDS`` and rebuilds from the database when it moved.
+"""
+import threading
+import time
+import unicodedata
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+
+from wangumi_app.models import FilterKeyword, KeywordFlag
+
+VERSION_KEY = "keyword_filter:version"
+MASK_CHAR = "*"
+
+
+@lru_cache(maxsize=65536)
+def _fold_char(char: str) -> str:
+    # Fold per character so match offsets stay valid for the original text;
+    # characters whose folded form is not a single character are kept as is.
+    folded = unicodedata.normalize("NFKC", char).lower()
+    return folded if len(folded) == 1 else char
+
+
+def fold_text(text: str) -> str:
+    """Lowercase and full-width -> half-width, preserving length."""
+    return "".join(map(_fold_char, text))
+
+
+def normalize_keyword(word: str) -> str:
+    return fold_text((word or "").strip())
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    start: int
+    end: int
+    word: str
+    action: str
+
+
+@dataclass
+class ScreenResult:
+    """Matches of one text and the decisions derived from them."""
+
+    text: str
+    matches: List[KeywordMatch] = field(default_factory=list)
+
+    def words(self, action: str) -> List[str]:
+        return sorted({match.word for match in self.matches if match.action == action})
+
+    @property
+    def blocked(self) -> bool:
+        return any(match.action == "BLOCK" for match in self.matches)
+
+    @property
+    def flagged(self) -> bool:
+        return any(match.action == "FLAG" for match in self.matches)
+
+    @property
+    def masked_text(self) -> str:
+        spans = [(match.start, match.end) for match in self.matches if match.action == "MASK"]
+        if not spans:
+            return self.text
+        chars = list(self.text)
+        for start, end in spans:
+            chars[start:end] = MASK_CHAR * (end - start)
+        return "".join(chars)
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over ``(word, action)`` pairs.
+
+    States are list indices; ``_goto[state]`` maps a character to the next
+    state, ``_fail`` holds the failure links and ``_out[state]`` the indices of
+    every keyword ending in that state (failure outputs already merged).
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, str]]):
+        self._words: List[str] = []
+        self._actions: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[Tuple[int, ...]] = [()]
+        for word, action in keywords:
+            word = normalize_keyword(word)
+            if not word:
+                continue
+            state = 0
+            for char in word:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (len(self._words),)
+            self._words.append(word)
+            self._actions.append(action)
+        self._fail = [0] * len(self._goto)
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] += self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """Every (possibly overlapping) keyword occurrence in ``text``, in one pass."""
+        goto, fail, out = self._goto, self._fail, self._out
+        words, actions = self._words, self._actions
+        matches = []
+        state = 0
+        for index, char in enumerate(fold_text(text)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in out[state]:
+                matches.append(KeywordMatch(index + 1 - len(words[keyword]), index + 1, words[keyword], actions[keyword]))
+        return matches
+
+    def screen(self, text: str) -> ScreenResult:
+        return ScreenResult(text, self.find(text))
+
+
+class _Loaded:
+    automaton: Optional[KeywordAutomaton] = None
+    version: Optional[str] = None
+    checked_at: float = float("-inf")
+    lock = threading.Lock()
+
+
+def _check_interval() -> float:
+    return float(getattr(settings, "KEYWORD_FILTER_CHECK_SECONDS", 5))
+
+
+def _current_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # The token was evicted: publish a fresh one so every process reloads once.
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_automaton() -> KeywordAutomaton:
+    """The automaton of this process, rebuilt when the shared version token changed."""
+    now = time.monotonic()
+    if _Loaded.automaton is not None and now - _Loaded.checked_at < _check_interval():
+        return _Loaded.automaton
+    with _Loaded.lock:
+        version = _current_version()
+        if _Loaded.automaton is None or version != _Loaded.version:
+            _Loaded.automaton = KeywordAutomaton(
+                FilterKeyword.objects.filter(is_active=True).values_list("word", "action").iterator()
+            )
+            _Loaded.version = version
+        _Loaded.checked_at = now
+    return _Loaded.automaton
+
+
+def invalidate_keyword_filter() -> None:
+    """Publish a new version token once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def reset_local_automaton() -> None:
+    """Drop this process's automaton so the next screen reloads it."""
+    with _Loaded.lock:
+        _Loaded.automaton, _Loaded.version, _Loaded.checked_at = None, None, float("-inf")
+
+
+def screen_text(text: str) -> ScreenResult:
+    return get_automaton().screen(text)
+
+
+def record_flag(result: ScreenResult, instance, user_id: int, created: bool = False) -> Optional[KeywordFlag]:
+    """
+    Queue ``instance`` for review when ``result`` hit FLAG keywords.
+
+    Otherwise a stale unreviewed flag of edited content is cleared; freshly
+    ``created`` content cannot have one, so no query is issued for it.
+    """
+    if not result.flagged and created:
+        return None
+    content_type = ContentType.objects.get_for_model(instance)
+    if not result.flagged:
+        KeywordFlag.objects.filter(content_type=content_type, object_id=instance.pk, reviewed=False).delete()
+        return None
+    flag, _ = KeywordFlag.objects.update_or_create(
+        content_type=content_type,
+        object_id=instance.pk,
+        defaults={"user_id": user_id, "keywords": result.words("FLAG"), "reviewed": False},
+    )
+    return flag
+
+
+def naive_find(keywords: Sequence[str], text: str) -> List[Tuple[int, str]]:
+    """The per-keyword ``str.find`` loop the automaton replaces; kept for the benchmark."""
+    folded = fold_text(text)
+    found = []
+    for word in keywords:
+        start = folded.find(word)
+        while start != -1:
+            found.append((start, word))
+            start = folded.find(word, start + 1)
+    return found
+
+
+__all__ = [
+    "KeywordAutomaton",
+    "KeywordMatch",
+    "ScreenResult",
+    "fold_text",
+    "get_automaton",
+    "invalidate_keyword_filter",
+    "naive_find",
+    "normalize_keyword",
+    "record_flag",
+    "reset_local_automaton",
+    "screen_text",
+]
@@ -0,0 +1,221 @@
+"""
+Moderation queue: reports aggregated per reported object.
+
+Each reported ``(content_type, object_id)`` has one
+:class:`~wangumi_app.models.ModerationTarget` row holding its report counts,
+the categories of its pending reports, first/last report time and a priority
+score. Moderators claim targets with an expiring lease (``SELECT ... FOR
+UPDATE SKIP LOCKED``, so concurrent claims never hand out the same target) and
+resolve a target with one set-based update over all of its pending reports.
+"""
+import math
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from wangumi_app.models import AdminLog, Comment, ModerationTarget, Reply, Report
+from wangumi_app.services.anime_detail import invalidate_comments_of
+from wangumi_app.services.reply_threads import adjust_reply_counts
+
+# More severe categories weigh more; see ``priority_score``.
+CATEGORY_WEIGHTS: Dict[str, float] = {
+    "HARASSMENT": 3.0,
+    "INAPPROPRIATE": 2.5,
+    "SPAM": 1.5,
+    "SPOILER": 1.0,
+    "OTHER": 1.0,
+}
+MAX_CLAIM = 20
+
+
+class ModerationLeaseError(Exception):
+    """Raised when a target is leased to another moderator."""
+
+
+def _lease_seconds() -> int:
+    return int(getattr(settings, "MODERATION_LEASE_SECONDS", 600))
+
+
+def priority_score(categories: Dict[str, int]) -> float:
+    """
+    Score of a target from the categories of its pending reports.
+
+    Each category contributes ``weight * log2(1 + count)``: every extra report
+    raises the score, with diminishing returns, so 200 spam reports do not
+    bury a handful of harassment reports.
+    """
+    return round(
+        sum(CATEGORY_WEIGHTS.get(category, 1.0) * math.log2(1 + count) for category, count in categories.items()),
+        4,
+    )
+
+
+def sync_target(content_type_id: int, object_id: int) -> Optional[ModerationTarget]:
+    """
+    Recompute the aggregate of one reported object from its ``Report`` rows.
+
+    The target row is locked while its reports are counted, so concurrent
+    reports on the same object serialize and the last writer sees them all.
+    Returns ``None`` (and drops the target) when the object has no reports.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ModerationTarget.objects.get_or_create(
+            content_type_id=content_type_id,
+            object_id=object_id,
+            defaults={"first_reported_at": now, "last_reported_at": now},
+        )
+        target = ModerationTarget.objects.select_for_update().get(
+            content_type_id=content_type_id, object_id=object_id
+        )
+        rows = list(
+            Report.objects.filter(content_type_id=content_type_id, object_id=object_id)
+            .order_by()
+            .values("status", "category")
+            .annotate(total=Count("id"), first=Min("created_at"), last=Max("created_at"))
+        )
+        if not rows:
+            target.delete()
+            return None
+
+        categories: Dict[str, int] = {}
+        for row in rows:
+            if row["status"] == "PENDING":
+                categories[row["category"]] = categories.get(row["category"], 0) + row["total"]
+        target.report_count = sum(row["total"] for row in rows)
+        target.pending_count = sum(categories.values())
+        target.categories = categories
+        target.first_reported_at = min(row["first"] for row in rows)
+        target.last_reported_at = max(row["last"] for row in rows)
+        target.priority = priority_score(categories)
+        if target.pending_count:
+            # New reports reopen a target that was already handled.
+            target.status = "OPEN"
+        elif target.status == "OPEN":
+            handled = {row["status"] for row in rows}
+            target.status = "RESOLVED" if "RESOLVED" in handled else "REJECTED"
+        if target.status != "OPEN":
+            target.claimed_by, target.lease_until = None, None
+        target.save()
+    return target
+
+
+def claim_targets(moderator, limit: int = 1) -> List[ModerationTarget]:
+    """
+    Lease up to ``limit`` of the highest-priority open targets to ``moderator``.
+
+    Targets leased to someone else are skipped until their lease expires;
+    rows locked by a concurrent claim are skipped instead of waited on.
+    """
+    now = timezone.now()
+    limit = max(1, min(limit, MAX_CLAIM))
+    with transaction.atomic():
+        targets = list(
+            ModerationTarget.objects.select_for_update(skip_locked=True)
+            .filter(status="OPEN")
+            .filter(Q(lease_until__isnull=True) | Q(lease_until__lte=now) | Q(claimed_by=moderator))
+            .order_by("-priority", "first_reported_at")[:limit]
+        )
+        lease_until = now + timedelta(seconds=_lease_seconds())
+        ModerationTarget.objects.filter(pk__in=[target.pk for target in targets]).update(
+            claimed_by=moderator, lease_until=lease_until
+        )
+    for target in targets:
+        target.claimed_by, target.lease_until = moderator, lease_until
+    return targets
+
+
+def resolve_target(
+    target_id: int, moderator, action: str, resolution: str = "", hide_content: bool = False
+) -> Tuple[ModerationTarget, int, bool]:
+    """
+    Close every pending report of a target at once.
+
+    Returns ``(target, reports_closed, content_hidden)``. Raises
+    ``ModerationTarget.DoesNotExist`` or ``ModerationLeaseError`` when another
+    moderator holds a live lease on it.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        target = ModerationTarget.objects.select_for_update().get(pk=target_id)
+        if (
+            target.claimed_by_id not in (None, moderator.id)
+            and target.lease_until is not None
+            and target.lease_until > now
+        ):
+            raise ModerationLeaseError(target.claimed_by_id)
+
+        closed = Report.objects.filter(
+            content_type_id=target.content_type_id, object_id=target.object_id, status="PENDING"
+        ).update(status=action, moderator=moderator, handled_at=now, resolution=resolution)
+
+        content_hidden = False
+        model = target.content_type.model_class()
+        if action == "RESOLVED" and hide_content and model is not None and any(
+            field.name == "is_banned" for field in model._meta.get_fields()
+        ):
+            if model is Reply:
+                adjust_reply_counts(Reply.objects.filter(pk=target.object_id, is_banned=False), -1)
+            content_hidden = bool(model._base_manager.filter(pk=target.object_id).update(is_banned=True))
+            if content_hidden and model is Comment:
+                invalidate_comments_of([target.object_id])
+
+        target.status = action
+        target.pending_count = 0
+        target.categories = {}
+        target.priority = 0
+        target.claimed_by, target.lease_until = None, None
+        target.resolved_by, target.resolved_at, target.resolution = moderator, now, resolution
+        target.save()
+
+        AdminLog.objects.create(
+            admin=moderator,
+            action_type="HANDLE_REPORT",
+            target_content_type_id=target.content_type_id,
+            target_object_id=target.object_id,
+            description=f"处理被举报对象 #{target.id}: {action}，关闭举报 {closed} 条"
+            + ("，已隐藏内容" if content_hidden else ""),
+        )
+    return target, closed, content_hidden
+
+
+def queue_stats() -> Dict[str, int]:
+    """Open / resolved / rejected target counts in one aggregate query."""
+    return ModerationTarget.objects.aggregate(
+        open_count=Count("id", filter=Q(status="OPEN")),
+        resolved_count=Count("id", filter=Q(status="RESOLVED")),
+        rejected_count=Count("id", filter=Q(status="REJECTED")),
+    )
+
+
+def rebuild_moderation_targets() -> int:
+    """Rebuild every target from ``Report`` (e.g. after the initial migration); returns the target count."""
+    keys = set(Report.objects.order_by().values_list("content_type_id", "object_id").distinct())
+    ModerationTarget.objects.exclude(
+        pk__in=[
+            pk
+            for pk, content_type_id, object_id in ModerationTarget.objects.values_list(
+                "pk", "content_type_id", "object_id"
+            )
+            if (content_type_id, object_id) in keys
+        ]
+    ).delete()
+    for content_type_id, object_id in keys:
+        sync_target(content_type_id, object_id)
+    return len(keys)
+
+
+__all__ = [
+    "CATEGORY_WEIGHTS",
+    "ModerationLeaseError",
+    "claim_targets",
+    "priority_score",
+    "queue_stats",
+    "rebuild_moderation_targets",
+    "resolve_target",
+    "sync_target",
+]
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Greatest
+
+from wangumi_app.models import Anime, Comment, Reply, Report, UserModerationStats
+
+User = get_user_model()
+
+STAT_FIELDS = ("comments", "replies", "items_created", "reports_filed", "reports_received")
+
+# Reportable models and the field holding the user who owns the content.
+REPORT_TARGET_OWNERS = {
+    Comment: "user_id",
+    Reply: "user_id",
+    Anime: "created_by_id",
+}
+
+
+def _owner_field(content_type_id: int) -> Optional[tuple]:
+    for model, field in REPORT_TARGET_OWNERS.items():
+        if ContentType.objects.get_for_model(model).id == content_type_id:
+            return model, field
+    return None
+
+
+def report_target_owner(content_type_id: int, object_id: int) -> Optional[int]:
+    """User owning the reported object, or ``None`` if it is gone or not user content."""
+    target = _owner_field(content_type_id)
+    if target is None:
+        return None
+    model, field = target
+    return model.objects.filter(pk=object_id).values_list(field, flat=True).first()
+
+
+def compute_stats(user_id: int) -> Dict[str, int]:
+    """Count every statistic of ``user_id`` from the source tables."""
+    received = 0
+    for model, field in REPORT_TARGET_OWNERS.items():
+        received += Report.objects.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            object_id__in=model.objects.filter(**{field: user_id}).values("pk"),
+        ).count()
+    return {
+        "comments": Comment.objects.filter(user_id=user_id).count(),
+        "replies": Reply.objects.filter(user_id=user_id).count(),
+        "items_created": Anime.objects.filter(created_by_id=user_id).count(),
+        "reports_filed": Report.objects.filter(reporter_id=user_id).count(),
+        "reports_received": received,
+    }
+
+
+def adjust_stats(user_id: Optional[int], **deltas: int) -> None:
+    """
+    Add ``deltas`` to the counters of ``user_id``; counters never go below zero.
+
+    Call after the source row was written. A missing stats row is seeded from
+    the source tables instead, so it starts consistent rather than from zero.
+    """
+    if user_id is None:
+        return
+    updated = UserModerationStats.objects.filter(user_id=user_id).update(
+        **{field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()}
+    )
+    if not updated and User.objects.filter(pk=user_id).exists():
+        UserModerationStats.objects.get_or_create(user_id=user_id, defaults=compute_stats(user_id))
+
+
+def get_stats(user_id: int) -> UserModerationStats:
+    """
+    The stats row of ``user_id``; a missing row reads as zeros.
+
+    Rows are created with the user, so only accounts that predate the table
+    and were never reconciled lack one; reads never recompute it from the
+    source tables (``reconcile_moderation_stats`` does).
+    """
+    stats = UserModerationStats.objects.filter(user_id=user_id).first()
+    return stats if stats is not None else UserModerationStats(user_id=user_id)
+
+
+def _grouped(queryset, user_field: str) -> Dict[int, int]:
+    rows = queryset.order_by().values(user_field).annotate(total=Count("pk")).values_list(user_field, "total")
+    return {user_id: total for user_id, total in rows if user_id is not None}
+
+
+def _actual_stats() -> Dict[int, Dict[str, int]]:
+    actual: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    sources = {
+        "comments": _grouped(Comment.objects.all(), "user_id"),
+        "replies": _grouped(Reply.objects.all(), "user_id"),
+        "items_created": _grouped(Anime.objects.all(), "created_by_id"),
+        "reports_filed": _grouped(Report.objects.all(), "reporter_id"),
+    }
+    received: Dict[int, int] = defaultdict(int)
+    for model, field in REPORT_TARGET_OWNERS.items():
+        owner = Subquery(model.objects.filter(pk=OuterRef("object_id")).values(field)[:1])
+        reports = Report.objects.filter(content_type=ContentType.objects.get_for_model(model)).annotate(owner=owner)
+        for user_id, total in _grouped(reports, "owner").items():
+            received[user_id] += total
+    sources["reports_received"] = received
+    for field, counts in sources.items():
+        for user_id, total in counts.items():
+            actual[user_id][field] = total
+    return actual
+
+
+def reconcile_moderation_stats(batch_size: int = 500, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Create missing stats rows and rewrite drifted ones from the source tables.
+
+    Each statistic is computed for all users with one grouped query. Returns
+    the number of rows created or fixed.
+    """
+    actual = _actual_stats()
+    users = User.objects.order_by("pk")
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+    existing = {stats.user_id: stats for stats in UserModerationStats.objects.filter(user__in=users)}
+
+    created, drifted = [], []
+    for user_id in users.values_list("pk", flat=True).iterator():
+        expected = actual.get(user_id) or dict.fromkeys(STAT_FIELDS, 0)
+        stats = existing.get(user_id)
+        if stats is None:
+            created.append(UserModerationStats(user_id=user_id, **expected))
+        elif any(getattr(stats, field) != value for field, value in expected.items()):
+            for field, value in expected.items():
+                setattr(stats, field, value)
+            drifted.append(stats)
+    UserModerationStats.objects.bulk_create(created, batch_size=batch_size, ignore_conflicts=True)
+    UserModerationStats.objects.bulk_update(drifted, STAT_FIELDS, batch_size=batch_size)
+    return len(created) + len(drifted)
+
+
+__all__ = [
+    "STAT_FIELDS",
+    "adjust_stats",
+    "compute_stats",
+    "get_stats",
+    "reconcile_moderation_stats",
+    "report_target_owner",
+]
@@ -1,10 +1,17 @@
 import hashlib
 import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, replace
 from datetime import timedelta
-from typing import Iterable, Optional
+from functools import wraps
+from typing import Callable, Iterable, Optional, Sequence
 
 from django.conf import settings
 from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.http import JsonResponse
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
@@ -46,9 +53,9 @@ def _enforce_interval(parts: Iterable[str], interval_seconds: int, now) -> None:
     if interval_seconds <= 0:
         return
     key = _build_cache_key(("interval", *parts))
-    if cache.get(key):
+    # ``add`` only succeeds for the first caller inside the interval.
+    if not cache.add(key, now.isoformat(), interval_seconds):
         raise RateLimitError("请求过于频繁，请稍后再试")
-    cache.set(key, now.isoformat(), interval_seconds)
 
 
 def _enforce_daily(parts: Iterable[str], daily_limit: int, now) -> None:
@@ -56,11 +63,9 @@ def _enforce_daily(parts: Iterable[str], daily_limit: int, now) -> None:
         return
     date_suffix = now.strftime("%Y%m%d")
     key = _build_cache_key(("daily", *parts, date_suffix))
-    current = cache.get(key, 0)
-    if current >= daily_limit:
-        raise RateLimitError("验证码请求已超过当日上限")
     ttl = max(1, int(_seconds_until_day_end(now)))
-    cache.set(key, current + 1, ttl)
+    if _incr(key, ttl) > daily_limit:
+        raise RateLimitError("验证码请求已超过当日上限")
 
 
 def _seconds_until_day_end(now) -> float:
@@ -71,11 +76,303 @@ def _seconds_until_day_end(now) -> float:
     return max(delta.total_seconds(), 0.0)
 
 
-def _build_cache_key(parts: Iterable[str]) -> str:
+def _build_cache_key(parts: Iterable[str], prefix: Optional[str] = None) -> str:
     raw = ":".join(str(part) for part in parts)
     digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
-    prefix = getattr(settings, "SMS_RATE_LIMIT_CACHE_PREFIX", "verification_rate")
+    if prefix is None:
+        prefix = getattr(settings, "SMS_RATE_LIMIT_CACHE_PREFIX", "verification_rate")
     return f"{prefix}:{digest}"
 
 
-__all__ = ["RateLimitError", "enforce_verification_code_rate_limits"]
+def _incr(key: str, ttl: int) -> int:
+    """Atomically increment ``key``, creating it with ``ttl`` when missing."""
+    for _ in range(3):
+        cache.add(key, 0, ttl)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # The key expired between ``add`` and ``incr``; create it again.
+            continue
+    raise RuntimeError(f"could not increment rate limit counter {key}")
+
+
+# ---------------------------------------------------------------------------
+# General purpose limiter
+# ---------------------------------------------------------------------------
+
+SLIDING_WINDOW = "sliding_window"
+TOKEN_BUCKET = "token_bucket"
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """
+    ``limit`` requests per ``window`` seconds.
+
+    For the token bucket ``limit`` is also the burst capacity, refilled at
+    ``limit / window`` tokens per second. With ``failures_only`` only
+    responses with status >= 400 are counted (e.g. failed logins).
+    """
+
+    algorithm: str
+    limit: int
+    window: int
+    failures_only: bool = False
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    retry_after: int = 0
+
+
+DEFAULT_POLICIES = {
+    "comment_post": RateLimitPolicy(SLIDING_WINDOW, limit=10, window=60),
+    "like": RateLimitPolicy(TOKEN_BUCKET, limit=30, window=60),
+    "search": RateLimitPolicy(SLIDING_WINDOW, limit=120, window=60),
+    "login": RateLimitPolicy(SLIDING_WINDOW, limit=10, window=300, failures_only=True),
+    # Only near-duplicate posts are counted, see services/spam_detection.py.
+    "duplicate_post": RateLimitPolicy(SLIDING_WINDOW, limit=3, window=3600),
+}
+
+
+def get_policy(name: str) -> Optional[RateLimitPolicy]:
+    """Default policy ``name`` with overrides from ``settings.RATE_LIMITS[name]`` applied."""
+    if not getattr(settings, "RATE_LIMIT_ENABLED", True):
+        return None
+    overrides = getattr(settings, "RATE_LIMITS", {}).get(name)
+    if overrides is None:
+        return DEFAULT_POLICIES.get(name)
+    base = DEFAULT_POLICIES.get(name)
+    return replace(base, **overrides) if base else RateLimitPolicy(**overrides)
+
+
+def _limiter_key(name: str, identity: str, *suffix) -> str:
+    return _build_cache_key((name, identity, *suffix), prefix=getattr(settings, "RATE_LIMIT_CACHE_PREFIX", "rate_limit"))
+
+
+def _window_keys(name: str, identities: Sequence[str], policy: RateLimitPolicy, now: float):
+    index = int(now // policy.window)
+    weight = 1 - (now - index * policy.window) / policy.window
+    current = [_limiter_key(name, identity, index) for identity in identities]
+    previous = [_limiter_key(name, identity, index - 1) for identity in identities]
+    retry_after = int(math.ceil((index + 1) * policy.window - now))
+    return current, previous, weight, retry_after
+
+
+def _sliding_window(name, identities, policy, now, increment: bool) -> RateLimitResult:
+    # Sliding window counter: the previous fixed window's count, weighted by how
+    # much of it still overlaps the sliding window, plus the current count.
+    current, previous, weight, retry_after = _window_keys(name, identities, policy, now)
+    # One round trip for every counter that is only read.
+    counts = cache.get_many(previous if increment else previous + current)
+    for current_key, previous_key in zip(current, previous):
+        estimate = counts.get(previous_key, 0) * weight
+        if increment:
+            over = estimate + _incr(current_key, policy.window * 2) > policy.limit
+        else:
+            over = estimate + counts.get(current_key, 0) >= policy.limit
+        if over:
+            return RateLimitResult(False, max(retry_after, 1))
+    return RateLimitResult(True)
+
+
+# All identities of a request are checked first; a token is taken from every
+# bucket only when each of them has one, so a rejected request costs nothing.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local levels = {}
+local lowest = capacity
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    levels[i] = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    lowest = math.min(lowest, levels[i])
+end
+local allowed = 0
+if lowest >= 1 then
+    allowed = 1
+end
+for i, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - allowed), 'ts', tostring(now))
+    redis.call('EXPIRE', key, tonumber(ARGV[4]))
+end
+return {allowed, tostring(lowest)}
+"""
+
+# Without Redis the shared cache is the process-local locmem backend (see
+# settings.CACHES), so a process lock makes the read-modify-write of the
+# buckets atomic without polling a cache lock.
+_bucket_lock = threading.Lock()
+
+
+def _get_redis():
+    """
+    Redis client of the shared cache (``REDIS_URL``) for the Lua token bucket,
+    or ``None`` when the cache is not backed by Redis (development, tests).
+    """
+    # TwoTierCache keeps counters in its shared L2; a plain backend is used as is.
+    backend = getattr(cache, "_l2", cache)
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend._cache.get_client(write=True)
+
+
+def _bucket_result(allowed: bool, lowest: float, rate: float) -> RateLimitResult:
+    if allowed:
+        return RateLimitResult(True)
+    return RateLimitResult(False, max(int(math.ceil((1 - lowest) / rate)), 1))
+
+
+def _token_bucket_redis(client, keys, policy, now) -> RateLimitResult:
+    rate = policy.limit / policy.window
+    allowed, lowest = client.eval(_TOKEN_BUCKET_LUA, len(keys), *keys, policy.limit, rate, now, policy.window * 2)
+    return _bucket_result(bool(int(allowed)), float(lowest), rate)
+
+
+def _token_bucket_cache(keys, policy, now) -> RateLimitResult:
+    rate = policy.limit / policy.window
+    with _bucket_lock:
+        states = cache.get_many(keys)
+        levels = {}
+        for key in keys:
+            tokens, updated_at = states.get(key, (policy.limit, now))
+            levels[key] = min(policy.limit, tokens + max(0.0, now - updated_at) * rate)
+        lowest = min(levels.values())
+        allowed = lowest >= 1
+        cache.set_many(
+            {key: (tokens - 1 if allowed else tokens, now) for key, tokens in levels.items()}, policy.window * 2
+        )
+    return _bucket_result(allowed, lowest, rate)
+
+
+def hit(name: str, identities: Sequence[str], now: Optional[float] = None) -> RateLimitResult:
+    """
+    Count one request against policy ``name`` for every identity and return
+    whether it is allowed. All identities must pass; the token bucket only
+    takes tokens when they do, while the sliding window counts the request
+    against each identity checked before the one that rejected it.
+    """
+    policy = get_policy(name)
+    if policy is None or not identities:
+        return RateLimitResult(True)
+    now = time.time() if now is None else now
+    if policy.algorithm == TOKEN_BUCKET:
+        keys = list(dict.fromkeys(_limiter_key(name, identity) for identity in identities))
+        client = _get_redis()
+        if client is not None:
+            try:
+                return _token_bucket_redis(client, keys, policy, now)
+            except Exception as exc:  # pragma: no cover - depends on redis availability
+                logger.warning("Redis rate limiter unavailable, using cache: %s", exc)
+        return _token_bucket_cache(keys, policy, now)
+    return _sliding_window(name, identities, policy, now, increment=True)
+
+
+def peek(name: str, identities: Sequence[str], now: Optional[float] = None) -> RateLimitResult:
+    """Whether one more request would be allowed, without counting it (sliding window only)."""
+    policy = get_policy(name)
+    if policy is None or not identities or policy.algorithm != SLIDING_WINDOW:
+        return RateLimitResult(True)
+    now = time.time() if now is None else now
+    return _sliding_window(name, identities, policy, now, increment=False)
+
+
+def client_ip(request) -> str:
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def by_user_or_ip(request) -> str:
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+def by_ip(request) -> str:
+    return f"ip:{client_ip(request)}"
+
+
+def by_field(name: str) -> Callable:
+    """Key on a request body field, e.g. the username of a login attempt."""
+
+    def key(request) -> Optional[str]:
+        data = getattr(request, "data", None) or request.POST
+        value = str(data.get(name, "")).strip().lower()
+        return f"{name}:{value}" if value else None
+
+    return key
+
+
+def _too_many_requests(result: RateLimitResult) -> JsonResponse:
+    response = JsonResponse(
+        {"code": 429, "message": "请求过于频繁，请稍后再试", "data": None},
+        status=429,
+        json_dumps_params={"ensure_ascii": False},
+    )
+    response["Retry-After"] = str(result.retry_after)
+    return response
+
+
+def rate_limit(name: str, keys: Sequence[Callable] = (by_user_or_ip,)):
+    """
+    Limit a view (function view or ``APIView`` method) with policy ``name``.
+
+    ``keys`` map the request to the identities that are limited together, e.g.
+    ``(by_ip, by_field("username"))`` for logins. Rejected requests get a 429
+    with ``Retry-After``.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            request = next(arg for arg in args if hasattr(arg, "META"))
+            policy = get_policy(name)
+            if policy is None:
+                return view(*args, **kwargs)
+            identities = [identity for identity in (key(request) for key in keys) if identity]
+
+            if policy.failures_only:
+                result = peek(name, identities)
+                if not result.allowed:
+                    return _too_many_requests(result)
+                try:
+                    response = view(*args, **kwargs)
+                except Exception:
+                    # DRF views raise e.g. AuthenticationFailed and render it later.
+                    hit(name, identities)
+                    raise
+                if response.status_code >= 400:
+                    hit(name, identities)
+                return response
+
+            result = hit(name, identities)
+            if not result.allowed:
+                return _too_many_requests(result)
+            return view(*args, **kwargs)
+
+        return wrapped
+
+    return decorator
+
+
+__all__ = [
+    "DEFAULT_POLICIES",
+    "RateLimitError",
+    "RateLimitPolicy",
+    "RateLimitResult",
+    "by_field",
+    "by_ip",
+    "by_user_or_ip",
+    "enforce_verification_code_rate_limits",
+    "get_policy",
+    "hit",
+    "peek",
+    "rate_limit",
+]
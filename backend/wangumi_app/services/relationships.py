@@ -0,0 +1,44 @@
+from typing import Dict, Iterable, Optional
+
+from django.db.models import Q
+
+from wangumi_app.models import UserFollow
+
+MAX_RELATIONSHIP_IDS = 200
+
+_NO_RELATIONSHIP = {"following": False, "followed_by": False, "mutual": False}
+
+
+def get_relationships(viewer_id: Optional[int], user_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Return ``{user_id: {"following", "followed_by", "mutual"}}`` from the
+    viewer's point of view.
+
+    Both directions are read in a single query; each half of the ``OR`` is
+    served by an index on ``UserFollow`` (the unique ``(follower, following)``
+    constraint and the ``following`` foreign key). Anonymous viewers and the
+    viewer's own id get all flags ``False``.
+    """
+    ids = {int(user_id) for user_id in user_ids}
+    relationships = {user_id: dict(_NO_RELATIONSHIP) for user_id in ids}
+    if viewer_id is None:
+        return relationships
+    ids.discard(viewer_id)
+    if not ids:
+        return relationships
+
+    edges = UserFollow.objects.filter(
+        Q(follower_id=viewer_id, following_id__in=ids) | Q(following_id=viewer_id, follower_id__in=ids)
+    ).values_list("follower_id", "following_id")
+    for follower_id, following_id in edges:
+        if follower_id == viewer_id:
+            relationships[following_id]["following"] = True
+        else:
+            relationships[follower_id]["followed_by"] = True
+
+    for flags in relationships.values():
+        flags["mutual"] = flags["following"] and flags["followed_by"]
+    return relationships
+
+
+__all__ = ["MAX_RELATIONSHIP_IDS", "get_relationships"]
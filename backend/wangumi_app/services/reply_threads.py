@@ -0,0 +1,71 @@
+from collections import Counter
+from typing import Dict, Iterable, List
+
+from django.db.models import Case, F, IntegerField, QuerySet, Value, When
+from django.db.models.expressions import Window
+from django.db.models.functions import Greatest, RowNumber
+
+from wangumi_app.models import Comment, Reply
+
+MAX_EMBEDDED_REPLIES = 10
+
+
+def fetch_latest_replies(comment_ids: Iterable[int], per_comment: int) -> Dict[int, List[Reply]]:
+    """
+    Return the newest ``per_comment`` replies of every comment in ``comment_ids``.
+
+    A single query ranks replies with ``ROW_NUMBER() OVER (PARTITION BY review_id)``
+    and keeps the top rows of each partition, so a whole comment page is hydrated
+    with one round trip instead of one reply request per comment.
+    """
+    ids = [comment_id for comment_id in comment_ids if comment_id is not None]
+    per_comment = min(int(per_comment or 0), MAX_EMBEDDED_REPLIES)
+    if not ids or per_comment <= 0:
+        return {}
+
+    replies = (
+        Reply.objects.filter(review_id__in=ids, is_banned=False)
+        .annotate(
+            thread_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F("review_id")],
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(thread_rank__lte=per_comment)
+        .select_related("user")
+        .order_by("review_id", "thread_rank")
+    )
+
+    grouped: Dict[int, List[Reply]] = {}
+    for reply in replies:
+        grouped.setdefault(reply.review_id, []).append(reply)
+    return grouped
+
+
+def adjust_reply_count(comment_id: int, delta: int) -> None:
+    """Add ``delta`` to the visible reply count of one comment; never below zero."""
+    Comment.objects.filter(pk=comment_id).update(reply_count=Greatest(F("reply_count") + delta, Value(0)))
+
+
+def adjust_reply_counts(replies: QuerySet, delta: int) -> None:
+    """
+    Apply ``delta`` per reply in ``replies`` to their comments' counts.
+
+    For ``update()`` calls that hide or restore replies in bulk: pass only the
+    replies whose visibility is about to flip. One grouped read and one UPDATE
+    cover the whole batch.
+    """
+    per_comment = Counter(replies.values_list("review_id", flat=True))
+    if not per_comment:
+        return
+    shift = Case(
+        *[When(pk=comment_id, then=Value(total * delta)) for comment_id, total in per_comment.items()],
+        output_field=IntegerField(),
+    )
+    Comment.objects.filter(pk__in=list(per_comment)).update(
+        reply_count=Greatest(F("reply_count") + shift, Value(0))
+    )
+
+
+__all__ = ["MAX_EMBEDDED_REPLIES", "adjust_reply_count", "adjust_reply_counts", "fetch_latest_replies"]
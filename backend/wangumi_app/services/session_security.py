@@ -1,9 +1,13 @@
 import logging
-from typing import Optional
+from typing import Iterable, Optional
 
 from django.contrib.sessions.models import Session
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
+from wangumi_app.models import UserSession
+from wangumi_app.services.token_versions import bump_token_version, bump_token_versions
+
 logger = logging.getLogger(__name__)
 
 try:  # pragma: no cover - optional dependency
@@ -17,31 +21,97 @@ except Exception:  # pragma: no cover - handled gracefully at runtime
 
 
 def invalidate_user_sessions_and_tokens(user) -> None:
-    """Remove active sessions and blacklist refresh tokens for the given user."""
+    """Remove active sessions, revoke issued access tokens and blacklist refresh tokens for the given user."""
     if user is None:
         return
+    bump_token_version(user.pk)
     _invalidate_sessions(user)
     _blacklist_tokens(user)
 
 
-def _invalidate_sessions(user) -> None:
+def invalidate_sessions_and_tokens_bulk(user_ids: Iterable[int]) -> None:
+    """
+    Batched ``invalidate_user_sessions_and_tokens`` for many users: a fixed
+    number of queries no matter how many users are passed.
+    """
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return
+    bump_token_versions(user_ids)
+    _invalidate_sessions(user_ids)
+    _blacklist_tokens(user_ids)
+
+
+def register_session(user, session_key: Optional[str]) -> None:
+    """Index ``session_key`` under ``user`` so it can be invalidated without scanning all sessions."""
+    if user is None or not session_key:
+        return
+    UserSession.objects.update_or_create(session_key=session_key, defaults={"user": user})
+    # Logging in again cycles the session key and deletes the old session;
+    # drop the rows of this user's sessions that are gone so the index stays small.
+    _dead_rows(UserSession.objects.filter(user=user)).delete()
+
+
+def forget_session(session_key: Optional[str]) -> None:
+    """Drop the index row of a session that is being logged out."""
+    if session_key:
+        UserSession.objects.filter(session_key=session_key).delete()
+
+
+def _dead_rows(rows):
+    live = Session.objects.filter(session_key=OuterRef("session_key"), expire_date__gte=timezone.now())
+    return rows.filter(~Exists(live))
+
+
+def prune_session_index() -> int:
+    """Delete index rows whose session expired or no longer exists; returns the number removed."""
+    deleted, _ = _dead_rows(UserSession.objects.all()).delete()
+    return deleted
+
+
+def index_existing_sessions() -> int:
+    """
+    Index sessions created before the user/session index existed.
+
+    This is the one-off full scan the index replaces; it decodes every unexpired
+    session once and returns the number of sessions indexed.
+    """
+    rows = []
+    for session in Session.objects.filter(expire_date__gte=timezone.now()).iterator():
+        user_id = session.get_decoded().get("_auth_user_id")
+        if user_id:
+            rows.append(UserSession(user_id=int(user_id), session_key=session.session_key))
+    UserSession.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+    return len(rows)
+
+
+def _user_ids(users) -> list:
+    """Accept a user instance or an iterable of user ids."""
+    return [users.pk] if hasattr(users, "pk") else list(users)
+
+
+def _invalidate_sessions(users) -> None:
+    user_ids = _user_ids(users)
     try:
-        active_sessions = Session.objects.filter(expire_date__gte=timezone.now())
-        user_id = str(user.pk)
-        for session in active_sessions:
-            data = session.get_decoded()
-            if data.get("_auth_user_id") == user_id:
-                session.delete()
+        indexed = UserSession.objects.filter(user_id__in=user_ids)
+        Session.objects.filter(session_key__in=indexed.values("session_key")).delete()
+        indexed.delete()
     except Exception as exc:  # pragma: no cover - defensive logging
-        logger.warning("Failed to invalidate sessions for user %s: %s", user.pk, exc)
+        logger.warning("Failed to invalidate sessions for users %s: %s", user_ids, exc)
 
 
-def _blacklist_tokens(user) -> None:
+def _blacklist_tokens(users) -> None:
     if OutstandingToken is None or BlacklistedToken is None:
         return
+    user_ids = _user_ids(users)
     try:
-        tokens = OutstandingToken.objects.filter(user=user)
-        for token in tokens:
-            BlacklistedToken.objects.get_or_create(token=token)
+        token_ids = OutstandingToken.objects.filter(
+            user_id__in=user_ids, blacklistedtoken__isnull=True
+        ).values_list("id", flat=True)
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token_id=token_id) for token_id in token_ids],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
     except Exception as exc:  # pragma: no cover - defensive logging
-        logger.warning("Failed to blacklist tokens for user %s: %s", user.pk, exc)
+        logger.warning("Failed to blacklist tokens for users %s: %s", user_ids, exc)
@@ -1,16 +1,19 @@
 import hashlib
 import logging
+import math
 import os
 import random
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Optional
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
 from django.core.validators import validate_email
-from django.utils import timezone
 
+from .delivery_queue import CHANNEL_EMAIL, Delivery, enqueue_delivery
 from .rate_limiter import enforce_verification_code_rate_limits
 
 try:  # pragma: no cover - optional dependency
@@ -74,47 +77,129 @@ def _redis_url() -> str:
     return _get_setting("REDIS_URL", os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"))
 
 
+def _memory_store_max_entries() -> int:
+    return int(_get_setting("SMS_MEMORY_STORE_MAX_ENTRIES", 10000))
+
+
+def _redis_retry_seconds() -> float:
+    return float(_get_setting("SMS_REDIS_RETRY_SECONDS", 30))
+
+
+class ExpiringLRUStore:
+    """
+    Thread-safe in-memory ``key -> value`` store with per-key TTL and a hard
+    capacity.
+
+    Expiry uses a timing wheel of one-second buckets: each key is filed under
+    the second it expires in, and advancing the clock only visits the buckets
+    that came due, so expiry is O(1) amortized per key instead of a scan of the
+    whole store. When the store is full the least recently used key is evicted.
+    """
+
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._buckets: dict[int, set[str]] = {}
+        self._last_tick = int(clock())
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _advance(self, now: float) -> None:
+        tick = int(now)
+        if tick <= self._last_tick:
+            return
+        if tick - self._last_tick > len(self._buckets):
+            # After a long idle gap pick the due buckets instead of walking every second.
+            due = [second for second in self._buckets if second <= tick]
+        else:
+            due = range(self._last_tick + 1, tick + 1)
+        for second in due:
+            for key in self._buckets.pop(second, ()):
+                entry = self._entries.get(key)
+                # The key may have been re-set with a later expiry since it was filed here.
+                if entry is not None and entry[1] <= now:
+                    del self._entries[key]
+        self._last_tick = tick
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            expires_at = now + ttl
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            self._buckets.setdefault(math.ceil(expires_at), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            now = self._clock()
+            self._advance(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
 class VerificationCodeStore:
 
-    def __init__(self, prefix: str = _DEFAULT_PREFIX):
+    def __init__(self, prefix: str = _DEFAULT_PREFIX, clock: Callable[[], float] = time.monotonic):
         self.prefix = prefix
+        self._clock = clock
         self._client: Optional["redis.Redis"] = None
-        self._memory_store: dict[str, tuple[str, timezone.datetime]] = {}
+        self._redis_retry_at = 0.0
+        self._memory_store = ExpiringLRUStore(_memory_store_max_entries(), clock=clock)
 
     def _get_client(self) -> Optional["redis.Redis"]:
         if redis is None:
             return None
         if self._client is None:
+            # After a failure stay on the memory store until the retry interval passes.
+            if self._clock() < self._redis_retry_at:
+                return None
             try:
                 self._client = redis.Redis.from_url(_redis_url(), decode_responses=True)
             except Exception as exc:
                 logger.warning("无法创建redis代理: %s", exc)
-                self._client = None
+                self._mark_redis_down()
         return self._client
 
+    def _mark_redis_down(self) -> None:
+        self._client = None
+        self._redis_retry_at = self._clock() + _redis_retry_seconds()
+
     def _key(self, identifier: str, purpose: str) -> str:
         normalized = identifier.strip().lower()
         digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
         return f"{self.prefix}:{purpose}:{digest}"
 
-    def _purge_expired(self) -> None:
-        now = timezone.now()
-        expired = [key for key, (_, ts) in self._memory_store.items() if ts <= now]
-        for key in expired:
-            self._memory_store.pop(key, None)
-
     def set(self, phone: str, purpose: str, hashed_code: str, ttl: int) -> None:
         key = self._key(phone, purpose)
         client = self._get_client()
         if client is not None:
             try:
                 client.setex(key, ttl, hashed_code)
+                # A code written to memory during an outage must not outlive the new one.
+                self._memory_store.delete(key)
                 return
             except Exception as exc:
                 logger.warning("没有redis服务，回到in-memory存储: %s", exc)
-                self._client = None
-        expires_at = timezone.now() + timezone.timedelta(seconds=ttl)
-        self._memory_store[key] = (hashed_code, expires_at)
+                self._mark_redis_down()
+        self._memory_store.set(key, hashed_code, ttl)
 
     def get(self, phone: str, purpose: str) -> Optional[str]:
         key = self._key(phone, purpose)
@@ -126,15 +211,8 @@ class VerificationCodeStore:
                     return value
             except Exception as exc:
                 logger.warning("没有redis服务，回到in-memory存储: %s", exc)
-                self._client = None
-        self._purge_expired()
-        data = self._memory_store.get(key)
-        if data:
-            hashed_code, expires_at = data
-            if expires_at > timezone.now():
-                return hashed_code
-            self._memory_store.pop(key, None)
-        return None
+                self._mark_redis_down()
+        return self._memory_store.get(key)
 
     def delete(self, phone: str, purpose: str) -> None:
         key = self._key(phone, purpose)
@@ -144,8 +222,8 @@ class VerificationCodeStore:
                 client.delete(key)
             except Exception as exc:
                 logger.warning("删除键无redis服务: %s", exc)
-                self._client = None
-        self._memory_store.pop(key, None)
+                self._mark_redis_down()
+        self._memory_store.delete(key)
 
 
 _store = VerificationCodeStore()
@@ -254,19 +332,14 @@ def send_email_code(email: str, purpose: str, requester_ip: Optional[str] = None
     hashed = _hash_code(normalized_email, normalized_purpose, code)
     ttl = _code_ttl()
     _store.set(normalized_email, normalized_purpose, hashed, ttl)
+    # The mail is sent by the delivery queue workers (with retries), not in the request.
     try:
-        sent = send_mail(
-            subject=_email_subject(),
-            message=_email_body(code, ttl),
-            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@wangumi.local"),
-            recipient_list=[normalized_email],
+        enqueue_delivery(
+            Delivery(CHANNEL_EMAIL, normalized_email, subject=_email_subject(), body=_email_body(code, ttl))
         )
     except Exception as exc:
         _store.delete(normalized_email, normalized_purpose)
         raise SmsSendError("邮件发送失败，请稍后再试") from exc
-    if sent == 0:
-        _store.delete(normalized_email, normalized_purpose)
-        raise SmsSendError("邮件发送失败，请稍后再试")
     if settings.DEBUG:
         logger.debug("Email code %s sent to %s for %s", code, normalized_email, normalized_purpose)
     return SmsSendResult(success=True, detail="email")
@@ -0,0 +1,175 @@
+"""
+Near-duplicate detection for comments and replies.
+
+Every new post gets a 64-bit SimHash of its character shingles. Two texts
+whose fingerprints differ in at most ``SPAM_SIMHASH_DISTANCE`` (default 3)
+bits are near-duplicates. The fingerprint is split into four 16-bit bands,
+each stored in its own indexed column: by the pigeonhole principle two
+fingerprints within distance 3 agree on at least one whole band, so the
+candidates for a new post come from a single ``band0 = a OR band1 = b OR ...``
+lookup restricted to the recent window, and only those few rows are compared
+bit by bit.
+
+Near-duplicates are grouped into clusters. A cluster that reaches
+``SPAM_CLUSTER_FLAG_SIZE`` members is flagged for the admin cluster views;
+a user who keeps posting near-duplicates is limited by the ``duplicate_post``
+rate-limit policy.
+"""
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.utils import timezone
+
+from wangumi_app.models import ContentFingerprint
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+SHINGLE_SIZE = 3
+MIN_TEXT_LENGTH = 8
+
+_MASK = (1 << BITS) - 1
+_BAND_MASK = (1 << BAND_BITS) - 1
+# Whitespace, punctuation and symbols carry no signal and are the cheapest
+# thing for a spammer to vary.
+_NOISE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _max_distance() -> int:
+    return int(getattr(settings, "SPAM_SIMHASH_DISTANCE", 3))
+
+
+def _window() -> timedelta:
+    return timedelta(hours=int(getattr(settings, "SPAM_SIMILARITY_WINDOW_HOURS", 24)))
+
+
+def _flag_size() -> int:
+    return int(getattr(settings, "SPAM_CLUSTER_FLAG_SIZE", 3))
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-fold, lowercase and drop whitespace/punctuation (full-width variants included)."""
+    return _NOISE.sub("", unicodedata.normalize("NFKC", text or "").lower())
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Unsigned 64-bit SimHash of ``text``'s character 3-grams, weighted by count.
+
+    Returns ``None`` for texts too short to fingerprint meaningfully (short
+    replies such as "好看" are legitimately repeated everywhere).
+    """
+    normalized = normalize_text(text)
+    if len(normalized) < MIN_TEXT_LENGTH:
+        return None
+    shingles = Counter(normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1))
+    weights = [0] * BITS
+    for shingle, count in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def bands(value: int) -> List[int]:
+    return [(value >> (band * BAND_BITS)) & _BAND_MASK for band in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+def _to_signed(value: int) -> int:
+    return value - (1 << BITS) if value >> (BITS - 1) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value & _MASK
+
+
+@dataclass
+class DuplicateCheck:
+    """Fingerprint of a pending post and the recent near-duplicates found for it."""
+
+    simhash: Optional[int]
+    matches: List[ContentFingerprint] = field(default_factory=list)
+
+    @property
+    def is_duplicate(self) -> bool:
+        return bool(self.matches)
+
+
+def find_near_duplicates(text: str) -> DuplicateCheck:
+    """Fingerprint ``text`` and look up recent near-duplicates with one indexed query."""
+    value = simhash(text)
+    if value is None:
+        return DuplicateCheck(None)
+    condition = Q()
+    for band, band_value in enumerate(bands(value)):
+        condition |= Q(**{f"band{band}": band_value})
+    candidates = ContentFingerprint.objects.filter(condition, created_at__gte=timezone.now() - _window()).only(
+        "id", "simhash", "cluster_id", "user_id", "flagged"
+    )
+    limit = _max_distance()
+    return DuplicateCheck(
+        value, [row for row in candidates if hamming(_to_unsigned(row.simhash), value) <= limit]
+    )
+
+
+def record_fingerprint(check: DuplicateCheck, instance, user_id: int) -> Optional[ContentFingerprint]:
+    """
+    Store the fingerprint of a newly created ``Comment``/``Reply`` and update its cluster.
+
+    The post joins the oldest cluster among its matches (other matched clusters
+    are merged into it); the cluster is flagged once it reaches the flag size.
+    """
+    if check.simhash is None:
+        return None
+    fingerprint = ContentFingerprint(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        user_id=user_id,
+        simhash=_to_signed(check.simhash),
+        **{f"band{band}": value for band, value in enumerate(bands(check.simhash))},
+    )
+    clusters = {row.cluster_id or row.id for row in check.matches}
+    if clusters:
+        fingerprint.cluster_id = min(clusters)
+        fingerprint.save()
+        merged = clusters - {fingerprint.cluster_id}
+        if merged:
+            ContentFingerprint.objects.filter(cluster_id__in=merged).update(cluster_id=fingerprint.cluster_id)
+        cluster = ContentFingerprint.objects.filter(cluster_id=fingerprint.cluster_id)
+        if cluster.count() >= _flag_size():
+            cluster.filter(flagged=False).update(flagged=True)
+            fingerprint.flagged = True
+    else:
+        fingerprint.save()
+        fingerprint.cluster_id = fingerprint.id
+        ContentFingerprint.objects.filter(pk=fingerprint.pk).update(cluster_id=fingerprint.id)
+    return fingerprint
+
+
+def forget_fingerprint(instance) -> None:
+    ContentFingerprint.objects.filter(
+        content_type=ContentType.objects.get_for_model(instance), object_id=instance.pk
+    ).delete()
+
+
+__all__ = [
+    "DuplicateCheck",
+    "find_near_duplicates",
+    "forget_fingerprint",
+    "hamming",
+    "normalize_text",
+    "record_fingerprint",
+    "simhash",
+]
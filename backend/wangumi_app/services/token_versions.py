@@ -0,0 +1,140 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from wangumi_app.models import UserProfile
+
+User = get_user_model()
+
+TOKEN_VERSION_CLAIM = "ver"
+
+
+def _version_ttl() -> int:
+    return int(getattr(settings, "TOKEN_VERSION_CACHE_SECONDS", 3600))
+
+
+def _user_ttl() -> int:
+    return int(getattr(settings, "AUTH_USER_CACHE_SECONDS", 60))
+
+
+def _version_key(user_id: int) -> str:
+    return f"auth:token_version:{user_id}"
+
+
+def _user_key(user_id: int) -> str:
+    return f"auth:user:{user_id}"
+
+
+def _load_version(user_id: int) -> int:
+    version = (
+        UserProfile.objects.filter(user_id=user_id).values_list("token_version", flat=True).first()
+        or 0
+    )
+    # ``add`` never overwrites, so a concurrent bump that already cached the new
+    # version wins over a reader that loaded the old one.
+    cache.add(_version_key(user_id), version, _version_ttl())
+    return version
+
+
+def _publish_versions(versions: Dict[int, int]) -> None:
+    """
+    Cache bumped versions once the surrounding transaction commits.
+
+    Until then other connections still read the old row, and a rollback must
+    not leave a version in the cache that the database never stored (it would
+    reject every valid token of those users).
+    """
+    transaction.on_commit(
+        lambda: cache.set_many(
+            {_version_key(user_id): version for user_id, version in versions.items()}, _version_ttl()
+        )
+    )
+
+
+def get_token_version(user_id: int) -> int:
+    """Current token version of ``user_id``; one cache GET, database on a miss."""
+    version = cache.get(_version_key(user_id))
+    return _load_version(user_id) if version is None else version
+
+
+def bump_token_version(user_id: int) -> int:
+    """
+    Revoke every token issued to ``user_id`` so far and return the new version.
+
+    Tokens carry the version they were issued with; bumping it makes all of
+    them fail authentication at once without touching the token tables.
+    """
+    updated = UserProfile.objects.filter(user_id=user_id).update(token_version=F("token_version") + 1)
+    if updated:
+        version = UserProfile.objects.filter(user_id=user_id).values_list("token_version", flat=True).get()
+    else:
+        profile, _ = UserProfile.objects.get_or_create(user_id=user_id, defaults={"token_version": 1})
+        version = profile.token_version
+    _publish_versions({user_id: version})
+    return version
+
+
+def bump_token_versions(user_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Batched ``bump_token_version``: one UPDATE for all users, one bulk insert
+    for users without a profile, one read-back and one cache ``set_many`` on commit.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    UserProfile.objects.filter(user_id__in=user_ids).update(token_version=F("token_version") + 1)
+    versions = dict(
+        UserProfile.objects.filter(user_id__in=user_ids).values_list("user_id", "token_version")
+    )
+    missing = user_ids - versions.keys()
+    if missing:
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=user_id, token_version=1) for user_id in missing], ignore_conflicts=True
+        )
+        versions.update(
+            UserProfile.objects.filter(user_id__in=missing).values_list("user_id", "token_version")
+        )
+    _publish_versions(versions)
+    return versions
+
+
+def get_user_and_token_version(user_id: int) -> Tuple[Optional[object], int]:
+    """
+    Return ``(user, token_version)`` for request authentication.
+
+    Both values are read with a single cache round trip; the ``User`` row is
+    only queried when it is not cached. ``user`` is ``None`` when it does not exist.
+    """
+    cached = cache.get_many([_user_key(user_id), _version_key(user_id)])
+    user = cached.get(_user_key(user_id))
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(_user_key(user_id), user, _user_ttl())
+    version = cached.get(_version_key(user_id))
+    if version is None:
+        version = _load_version(user_id)
+    return user, version
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    cache.delete(_user_key(user_id))
+
+
+def invalidate_cached_users(user_ids: Iterable[int]) -> None:
+    cache.delete_many([_user_key(user_id) for user_id in user_ids])
+
+
+__all__ = [
+    "TOKEN_VERSION_CLAIM",
+    "bump_token_version",
+    "bump_token_versions",
+    "get_token_version",
+    "get_user_and_token_version",
+    "invalidate_cached_user",
+    "invalidate_cached_users",
+]
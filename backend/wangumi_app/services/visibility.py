@@ -0,0 +1,146 @@
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from django.conf import settings
+from django.core.cache import cache
+
+from wangumi_app.models import PrivacySetting, UserFollow
+
+PRIVACY_FIELDS = ("followings", "followers", "watchlist", "activities")
+DEFAULT_LEVEL = "public"
+
+
+def _cache_ttl() -> int:
+    return int(getattr(settings, "VISIBILITY_CACHE_TTL_SECONDS", 300))
+
+
+def _privacy_key(user_id: int) -> str:
+    return f"visibility:privacy:{user_id}"
+
+
+def _following_key(user_id: int) -> str:
+    return f"visibility:following:{user_id}"
+
+
+def _followers_key(user_id: int) -> str:
+    return f"visibility:followers:{user_id}"
+
+
+def get_privacy_levels(owner_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Return ``{owner_id: {field: level}}`` for every id in ``owner_ids``.
+
+    Records are served from the cache; misses are loaded with one query and
+    owners without a ``PrivacySetting`` row get the public defaults.
+    """
+    ids = {int(owner_id) for owner_id in owner_ids}
+    if not ids:
+        return {}
+
+    cached = cache.get_many([_privacy_key(owner_id) for owner_id in ids])
+    levels = {owner_id: cached[_privacy_key(owner_id)] for owner_id in ids if _privacy_key(owner_id) in cached}
+    missing = ids.difference(levels)
+    if missing:
+        loaded = {owner_id: {field: DEFAULT_LEVEL for field in PRIVACY_FIELDS} for owner_id in missing}
+        for row in PrivacySetting.objects.filter(user_id__in=missing).values("user_id", *PRIVACY_FIELDS):
+            loaded[row["user_id"]] = {field: row[field] for field in PRIVACY_FIELDS}
+        cache.set_many({_privacy_key(owner_id): record for owner_id, record in loaded.items()}, _cache_ttl())
+        levels.update(loaded)
+    return levels
+
+
+def _edge_set(key: str, **lookup) -> FrozenSet[int]:
+    edges = cache.get(key)
+    if edges is None:
+        column = "following_id" if "follower_id" in lookup else "follower_id"
+        edges = frozenset(UserFollow.objects.filter(**lookup).values_list(column, flat=True))
+        cache.set(key, edges, _cache_ttl())
+    return edges
+
+
+def get_following_ids(user_id: int) -> FrozenSet[int]:
+    """Ids of the users ``user_id`` follows."""
+    return _edge_set(_following_key(user_id), follower_id=user_id)
+
+
+def get_follower_ids(user_id: int) -> FrozenSet[int]:
+    """Ids of the users following ``user_id``."""
+    return _edge_set(_followers_key(user_id), following_id=user_id)
+
+
+def _decide(level: str, viewer_id: Optional[int], owner_id: int, following, followers) -> bool:
+    if level == "public":
+        return True
+    if viewer_id is None:
+        return False
+    if viewer_id == owner_id:
+        return level in ("self", "friends", "mutual")
+    if level == "friends":
+        return owner_id in following()
+    if level == "mutual":
+        return owner_id in following() and owner_id in followers()
+    return False
+
+
+def visible_owner_ids(viewer, owner_ids: Iterable[int], field: str) -> Set[int]:
+    """
+    Return the subset of ``owner_ids`` whose ``field`` ``viewer`` may see.
+
+    Batch form of ``can_view``: privacy records are fetched together and the
+    follow edges are the viewer's own following/follower sets, so the cost does
+    not grow with the number of owners.
+    """
+    viewer_id = viewer.id if viewer is not None and viewer.is_authenticated else None
+    levels = get_privacy_levels(owner_ids)
+
+    edge_cache = {}
+
+    def following():
+        if "following" not in edge_cache:
+            edge_cache["following"] = get_following_ids(viewer_id)
+        return edge_cache["following"]
+
+    def followers():
+        if "followers" not in edge_cache:
+            edge_cache["followers"] = get_follower_ids(viewer_id)
+        return edge_cache["followers"]
+
+    return {
+        owner_id
+        for owner_id, record in levels.items()
+        if _decide(record.get(field, DEFAULT_LEVEL), viewer_id, owner_id, following, followers)
+    }
+
+
+def can_view(viewer, owner, field: str) -> bool:
+    """Whether ``viewer`` (may be ``None``) may see ``owner``'s ``field`` section."""
+    return owner.id in visible_owner_ids(viewer, [owner.id], field)
+
+
+def is_following(viewer, owner) -> bool:
+    return owner.id in get_following_ids(viewer.id)
+
+
+def is_mutual_follow(viewer, owner) -> bool:
+    return owner.id in get_following_ids(viewer.id) and owner.id in get_follower_ids(viewer.id)
+
+
+def invalidate_privacy(user_id: int) -> None:
+    cache.delete(_privacy_key(user_id))
+
+
+def invalidate_follow_edge(follower_id: int, following_id: int) -> None:
+    cache.delete_many([_following_key(follower_id), _followers_key(following_id)])
+
+
+__all__ = [
+    "PRIVACY_FIELDS",
+    "can_view",
+    "get_follower_ids",
+    "get_following_ids",
+    "get_privacy_levels",
+    "invalidate_follow_edge",
+    "invalidate_privacy",
+    "is_following",
+    "is_mutual_follow",
+    "visible_owner_ids",
+]
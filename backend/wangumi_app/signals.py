@@ -0,0 +1,281 @@
+"""
+模型与认证信号：在数据变化时让相关缓存失效，维护用户会话索引与用户内容统计
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from wangumi_app.models import (
+    Anime, AnimeStaff, Character, CharacterAppearance, CharacterVoice, Comment, Episode, FilterKeyword,
+    Person, PrivacySetting, Reply, Report, StaffRole, UserFollow, UserModerationStats, UserProfile
+)
+from wangumi_app.services.anime_detail import bump_anime_detail, bump_anime_list_for, invalidate_anime_comments
+from wangumi_app.services.content_versions import bump_profiles
+from wangumi_app.services.credits import (
+    anime_ids_for_characters, anime_ids_for_person, anime_ids_for_role, schedule_credits_refresh
+)
+from wangumi_app.services.genres import invalidate_genre_counts, sync_anime_genres
+from wangumi_app.services.keyword_filter import invalidate_keyword_filter
+from wangumi_app.services.moderation_queue import sync_target
+from wangumi_app.services.moderation_stats import adjust_stats, report_target_owner
+from wangumi_app.services.reply_threads import adjust_reply_count
+from wangumi_app.services.session_security import forget_session, register_session
+from wangumi_app.services.spam_detection import forget_fingerprint
+from wangumi_app.services.token_versions import invalidate_cached_user
+from wangumi_app.services.visibility import invalidate_follow_edge, invalidate_privacy
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=UserFollow)
+def invalidate_follow_cache(sender, instance, **kwargs):
+    """关注 / 取消关注后清除双方的关注关系缓存"""
+    invalidate_follow_edge(instance.follower_id, instance.following_id)
+
+
+@receiver([post_save, post_delete], sender=PrivacySetting)
+def invalidate_privacy_cache(sender, instance, **kwargs):
+    """隐私设置更新后清除缓存的隐私记录"""
+    invalidate_privacy(instance.user_id)
+
+
+def _session_key(request):
+    session = getattr(request, "session", None)
+    return session.session_key if session is not None else None
+
+
+@receiver(user_logged_in)
+def index_login_session(sender, request, user, **kwargs):
+    """登录后记录 用户 -> 会话 key，失效时无需扫描全站会话"""
+    register_session(user, _session_key(request))
+
+
+@receiver(user_logged_out)
+def drop_logout_session(sender, request, user, **kwargs):
+    """退出登录时移除会话索引"""
+    forget_session(_session_key(request))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """用户信息变化（封禁、改密等）后清除认证用户缓存"""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def create_moderation_stats(sender, instance, created, **kwargs):
+    """新用户还没有任何内容，直接建立全零的统计行，后台列表无需再从源表补算"""
+    if created:
+        UserModerationStats.objects.get_or_create(user=instance)
+
+
+def _deleted_user_ids(origin):
+    """
+    级联删除用户时，被删除用户的统计行会一起删除，不再维护。
+    返回正在删除的用户 id 集合；批量删除用户时无法得知具体 id，返回 None 表示全部跳过
+    """
+    if isinstance(origin, QuerySet) and origin.model is User:
+        return None
+    if isinstance(origin, User):
+        return {origin.pk}
+    return set()
+
+
+def _reports_on(instance):
+    return Report.objects.filter(
+        content_type=ContentType.objects.get_for_model(type(instance)), object_id=instance.pk
+    ).count()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Reply)
+def count_created_content(sender, instance, created, **kwargs):
+    """新增评论 / 回复后更新作者的统计"""
+    if created:
+        adjust_stats(instance.user_id, **{"comments" if sender is Comment else "replies": 1})
+
+
+@receiver(post_save, sender=Reply)
+def count_reply_on_comment(sender, instance, created, **kwargs):
+    """新回复计入父评论的冗余回复数（只统计未被隐藏的回复）"""
+    if created and not instance.is_banned:
+        adjust_reply_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Reply)
+def uncount_reply_on_comment(sender, instance, **kwargs):
+    if not instance.is_banned:
+        adjust_reply_count(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Anime)
+def count_created_item(sender, instance, created, **kwargs):
+    if created:
+        adjust_stats(instance.created_by_id, items_created=1)
+
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Reply)
+@receiver(post_delete, sender=Anime)
+def count_deleted_content(sender, instance, origin=None, **kwargs):
+    """删除内容后扣减作者的内容数与其收到的举报数"""
+    deleted_users = _deleted_user_ids(origin)
+    if deleted_users is None:
+        return
+    if sender is Anime:
+        owner_id, field = instance.created_by_id, "items_created"
+    else:
+        owner_id, field = instance.user_id, "comments" if sender is Comment else "replies"
+    if owner_id is None or owner_id in deleted_users:
+        return
+    deltas = {field: -1}
+    received = _reports_on(instance)
+    if received:
+        deltas["reports_received"] = -received
+    adjust_stats(owner_id, **deltas)
+
+
+@receiver(post_save, sender=Report)
+def count_created_report(sender, instance, created, **kwargs):
+    """新增举报：举报人的举报数与被举报内容作者的被举报数各加一"""
+    if not created:
+        return
+    adjust_stats(instance.reporter_id, reports_filed=1)
+    adjust_stats(report_target_owner(instance.content_type_id, instance.object_id), reports_received=1)
+
+
+@receiver(post_delete, sender=Report)
+def count_deleted_report(sender, instance, origin=None, **kwargs):
+    deleted_users = _deleted_user_ids(origin)
+    if deleted_users is None:
+        return
+    if instance.reporter_id not in deleted_users:
+        adjust_stats(instance.reporter_id, reports_filed=-1)
+    owner_id = report_target_owner(instance.content_type_id, instance.object_id)
+    if owner_id not in deleted_users:
+        adjust_stats(owner_id, reports_received=-1)
+
+
+@receiver([post_save, post_delete], sender=Report)
+def sync_moderation_target(sender, instance, **kwargs):
+    """举报变化后重算被举报对象在审核队列中的汇总与优先级"""
+    sync_target(instance.content_type_id, instance.object_id)
+
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Reply)
+def drop_content_fingerprint(sender, instance, **kwargs):
+    forget_fingerprint(instance)
+
+
+@receiver([post_save, post_delete], sender=FilterKeyword)
+def reload_keyword_filter(sender, instance, **kwargs):
+    """词表变更后通知各进程重建关键词自动机"""
+    invalidate_keyword_filter()
+
+
+def _genres_snapshot(instance):
+    # 只读取已加载的值，延迟加载（only/defer）的 genres 不为此多查一次
+    genres = instance.__dict__.get("genres")
+    return list(genres) if isinstance(genres, list) else genres
+
+
+@receiver(post_init, sender=Anime)
+def remember_genres(sender, instance, **kwargs):
+    instance._saved_genres = _genres_snapshot(instance)
+
+
+@receiver(post_save, sender=Anime)
+def sync_genre_links(sender, instance, created, update_fields=None, **kwargs):
+    """条目保存后同步类型关联表，只在类型有变化时执行；导入脚本的 update_or_create 也会经过这里"""
+    if update_fields is not None and "genres" not in update_fields:
+        return
+    genres = _genres_snapshot(instance)
+    if not created and genres == getattr(instance, "_saved_genres", None):
+        return
+    sync_anime_genres(instance)
+    instance._saved_genres = genres
+
+
+@receiver(post_delete, sender=Anime)
+def drop_genre_counts(sender, instance, **kwargs):
+    # 关联行随条目级联删除，只需让类型计数缓存失效
+    invalidate_genre_counts()
+
+
+# 热度计数不出现在详情文档里，只更新它们的保存（每次评论、追番都会发生）不换详情版本
+_DETAIL_IGNORED_FIELDS = frozenset({"heat", "popularity"})
+
+
+@receiver([post_save, post_delete], sender=Anime)
+def bump_anime_detail_on_anime(sender, instance, update_fields=None, **kwargs):
+    """条目变化后换掉详情文档与列表页的版本"""
+    if update_fields is None or not set(update_fields) <= _DETAIL_IGNORED_FIELDS:
+        bump_anime_detail([instance.pk])
+    # 列表只对其展示或排序的字段换版本；热度计数的变化合并后延迟生效
+    bump_anime_list_for(update_fields)
+
+
+@receiver([post_save, post_delete], sender=Episode)
+def bump_anime_detail_on_episode(sender, instance, **kwargs):
+    bump_anime_detail([instance.anime_id])
+
+
+def _refresh_credits(anime_ids):
+    # 先排队重建演职员文档再换详情版本：提交回调按注册顺序执行，新版本的详情一定读到新文档
+    anime_ids = set(anime_ids)
+    schedule_credits_refresh(anime_ids)
+    bump_anime_detail(anime_ids)
+
+
+@receiver([post_save, post_delete], sender=AnimeStaff)
+@receiver([post_save, post_delete], sender=CharacterAppearance)
+def refresh_credits_on_link(sender, instance, **kwargs):
+    """演职员关联行变化后增量重建所属番剧的演职员文档，同一事务内的多次变化只重建一次"""
+    _refresh_credits([instance.anime_id])
+
+
+@receiver([post_save, post_delete], sender=CharacterVoice)
+def refresh_credits_on_voice(sender, instance, **kwargs):
+    _refresh_credits(anime_ids_for_characters([instance.character_id]))
+
+
+@receiver(post_save, sender=Character)
+def refresh_credits_on_character(sender, instance, created, **kwargs):
+    if not created:
+        _refresh_credits(anime_ids_for_characters([instance.pk]))
+
+
+@receiver(post_save, sender=Person)
+def refresh_credits_on_person(sender, instance, created, **kwargs):
+    if not created:
+        _refresh_credits(anime_ids_for_person(instance.pk))
+
+
+@receiver(post_save, sender=StaffRole)
+def refresh_credits_on_role(sender, instance, created, **kwargs):
+    if not created:
+        _refresh_credits(anime_ids_for_role(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def drop_anime_comments(sender, instance, **kwargs):
+    """番剧评论变化后清除详情页的评论缓存"""
+    if instance.content_type_id == ContentType.objects.get_for_model(Anime).id:
+        invalidate_anime_comments(instance.object_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def bump_profile_version(sender, instance, **kwargs):
+    """账号或资料变化后换掉个人主页的版本，条件请求不再返回 304"""
+    bump_profiles([instance.pk if sender is User else instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=UserFollow)
+def bump_profile_version_on_follow(sender, instance, **kwargs):
+    # 关注数与粉丝数冗余在资料上，由 update() 维护，不会触发资料的信号
+    bump_profiles([instance.follower_id, instance.following_id])
@@ -0,0 +1,148 @@
+"""
+Tests for the cached anime detail document.
+番剧详情缓存：按内容版本缓存详情文档、关联数据变化后换版本、并发未命中合并与评论分段缓存。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from wangumi_app.models import (
+    AdminLog, Anime, Character, CharacterAppearance, CharacterVoice, Comment, ContentSweepJob, Episode,
+    ModerationTarget, Person, Report
+)
+from wangumi_app.services.anime_detail import get_anime_detail
+from wangumi_app.services.bulk_moderation import bulk_hide_comments
+from wangumi_app.services.content_sweeps import run_sweep
+from wangumi_app.services.moderation_queue import resolve_target
+
+
+class AnimeDetailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.anime = Anime.objects.create(title="测试番剧", total_episodes=12)
+        Episode.objects.create(
+            anime=self.anime, episode_number=1, title="第一话",
+            online_urls=["https://example.com/ep1"],
+        )
+        self.character = Character.objects.create(name="主角")
+        CharacterAppearance.objects.create(character=self.character, anime=self.anime)
+        self.person = Person.objects.create(pers_name="声优甲", pers_type=1, summary="", pers_img="")
+        CharacterVoice.objects.create(character=self.character, person=self.person)
+        self.user = User.objects.create_user(username="viewer", password="pass123")
+
+    def _detail(self):
+        response = self.client.get(f"/api/anime/{self.anime.id}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_document_is_served_from_cache(self):
+        """测试首次构建后再次访问不再查询数据库"""
+        data = self._detail()
+        self.assertEqual(data["meta"]["episodes_detail"][0]["online_urls"], ["https://example.com/ep1"])
+        self.assertEqual(data["meta"]["updateProgress"], "已更新至第1集")
+        self.assertEqual(data["relations"]["characters"][0]["voiceActors"], ["声优甲"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._detail(), data)
+
+        self.assertEqual(self.client.get("/api/anime/999999").status_code, 404)
+
+    def test_related_changes_bump_the_version(self):
+        """测试剧集、声优与条目本身的修改都会让详情重新构建"""
+        self._detail()
+        with self.captureOnCommitCallbacks(execute=True):
+            Episode.objects.create(anime=self.anime, episode_number=2, title="第二话")
+        self.assertEqual(self._detail()["meta"]["updateProgress"], "已更新至第2集")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.person.pers_name = "声优乙"
+            self.person.save()
+        self.assertEqual(self._detail()["relations"]["characters"][0]["voiceActors"], ["声优乙"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.anime.title = "新标题"
+            self.anime.save()
+        self.assertEqual(self._detail()["basic"]["title"], "新标题")
+
+    def test_counter_saves_keep_the_document(self):
+        """测试只更新热度计数的保存不会让详情重新构建"""
+        data = self._detail()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.anime.popularity += 1
+            self.anime.save(update_fields=["popularity"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._detail(), data)
+
+    def test_concurrent_misses_build_once(self):
+        """测试同一条目的并发未命中只构建一次"""
+        calls = []
+        lock = threading.Lock()
+
+        def slow_build(anime_id):
+            with lock:
+                calls.append(anime_id)
+            time.sleep(0.1)
+            return {"basic": {"id": anime_id}}
+
+        with patch("wangumi_app.services.anime_detail.build_anime_detail", side_effect=slow_build):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(lambda _: get_anime_detail(self.anime.id), range(8)))
+        self.assertEqual(calls, [self.anime.id])
+        self.assertTrue(all(result == {"basic": {"id": self.anime.id}} for result in results))
+
+    @override_settings(ANIME_DETAIL_COMMENT_LIMIT=2)
+    def test_comments_are_bounded_and_refreshed(self):
+        """测试详情页只返回最新的若干条评论，新评论使评论缓存失效"""
+        content_type = ContentType.objects.get_for_model(Anime)
+
+        def comment(content):
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(
+                    content_type=content_type, object_id=self.anime.id, user=self.user, score=8, content=content
+                )
+
+        comment("第一条")
+        comment("第二条")
+        self.assertEqual([c["content"] for c in self._detail()["comments"]["list"]], ["第二条", "第一条"])
+        comment("第三条")
+        self.assertEqual([c["content"] for c in self._detail()["comments"]["list"]], ["第三条", "第二条"])
+
+    def test_hidden_comments_leave_the_cached_section(self):
+        """测试扫荡、批量隐藏与处理举报用 update() 隐藏评论后，评论分段与 ETag 都随之更新"""
+        content_type = ContentType.objects.get_for_model(Anime)
+        admin = User.objects.create_user(username="moderator", password="pass123", is_staff=True)
+        _, bulk, reported = (
+            Comment.objects.create(
+                content_type=content_type, object_id=self.anime.id, user=author, score=8, content=content
+            )
+            for author, content in ((self.user, "扫荡"), (admin, "批量"), (admin, "举报"))
+        )
+        Report.objects.create(
+            reporter=admin, content_type=ContentType.objects.get_for_model(Comment), object_id=reported.id,
+            category="SPAM",
+        )
+        target = ModerationTarget.objects.get(object_id=reported.id)
+        job = ContentSweepJob.objects.create(
+            admin_log=AdminLog.objects.create(admin=admin, action_type="BAN_USER", description="封禁"),
+            user=self.user, action="HIDE",
+        )
+
+        hides = [
+            ("扫荡", lambda: run_sweep(job.pk)),
+            ("批量", lambda: bulk_hide_comments(admin, [bulk.id])),
+            ("举报", lambda: resolve_target(target.id, admin, "RESOLVED", hide_content=True)),
+        ]
+        for content, hide in hides:
+            response = self.client.get(f"/api/anime/{self.anime.id}")
+            self.assertIn(content, [c["content"] for c in response.json()["data"]["comments"]["list"]])
+            with self.captureOnCommitCallbacks(execute=True):
+                hide()
+            again = self.client.get(f"/api/anime/{self.anime.id}", HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(again.status_code, 200)
+            self.assertNotIn(content, [c["content"] for c in again.json()["data"]["comments"]["list"]])
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import io
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client
+from PIL import Image
+
+from wangumi_app.models import Anime, Comment, UserProfile
+from wangumi_app.services.author_cards import (
+    clear_author_card_cache,
+    get_author_cards,
+    invalidate_author_cards,
+)
+
+User = get_user_model()
+
+
+class AuthorCardServiceTests(TestCase):
+    def setUp(self):
+        clear_author_card_cache()
+        self.users = []
+        for index in range(3):
+            user = User.objects.create_user(username=f"card_user{index}", password="123456")
+            UserProfile.objects.create(user=user, nickname=f"昵称{index}")
+            self.users.append(user)
+        # 没有资料记录的用户也应能生成卡片
+        self.bare_user = User.objects.create_user(username="bare_user", password="123456")
+
+    def tearDown(self):
+        clear_author_card_cache()
+
+    def test_cards_loaded_in_one_query_then_cached(self):
+        """测试批量加载只查一次库，之后命中缓存"""
+        ids = [user.id for user in self.users] + [self.bare_user.id]
+
+        with self.assertNumQueries(1):
+            cards = get_author_cards(ids)
+        with self.assertNumQueries(0):
+            cached = get_author_cards(ids)
+
+        self.assertEqual(cards, cached)
+        self.assertEqual(cards[self.users[1].id]["nickname"], "昵称1")
+        self.assertIsNone(cards[self.users[1].id]["avatar"])
+        self.assertEqual(cards[self.bare_user.id]["nickname"], "")
+
+    def test_invalidate_reloads_card(self):
+        """测试失效后重新读取最新资料"""
+        user = self.users[0]
+        get_author_cards([user.id])
+        UserProfile.objects.filter(user=user).update(nickname="新昵称")
+
+        self.assertEqual(get_author_cards([user.id])[user.id]["nickname"], "昵称0")
+        invalidate_author_cards(user.id)
+        self.assertEqual(get_author_cards([user.id])[user.id]["nickname"], "新昵称")
+
+    def test_returned_cards_are_copies(self):
+        """测试调用方修改返回值不会污染缓存"""
+        user = self.users[0]
+        get_author_cards([user.id])[user.id]["nickname"] = "被篡改"
+        self.assertEqual(get_author_cards([user.id])[user.id]["nickname"], "昵称0")
+
+
+class AuthorCardViewTests(TestCase):
+    def setUp(self):
+        clear_author_card_cache()
+        self.client = Client()
+        self.anime = Anime.objects.create(title="Card Anime", title_cn="卡片番剧")
+        anime_ct = ContentType.objects.get_for_model(Anime)
+        self.authors = []
+        for index in range(5):
+            user = User.objects.create_user(username=f"author{index}", password="123456")
+            UserProfile.objects.create(user=user)
+            Comment.objects.create(
+                content_type=anime_ct, object_id=self.anime.id, user=user,
+                score=7, content=f"评论{index}", scope="ANIME"
+            )
+            self.authors.append(user)
+
+    def tearDown(self):
+        clear_author_card_cache()
+
+    def _list_comments(self):
+        return self.client.get("/api/comments/", {"scope": "ANIME", "object_id": self.anime.id})
+
+    def test_comment_list_does_not_query_profiles_per_row(self):
+        """测试评论列表的查询数与作者数量无关"""
+        self._list_comments()
+        clear_author_card_cache()
+        with self.assertNumQueries(6):
+            response = self._list_comments()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]["comments"]), 5)
+
+    def test_avatar_upload_invalidates_card(self):
+        """测试上传头像后评论列表立即展示新头像"""
+        response = self._list_comments()
+        avatars = {c["author"]["user_id"]: c["author"]["avatar"] for c in response.json()["data"]["comments"]}
+        self.assertEqual(avatars[self.authors[0].id], "/avatars/default.jpg")
+
+        login = self.client.post(
+            "/api/login/", {"username": "author0", "password": "123456"}, content_type="application/json"
+        )
+        img = Image.new("RGB", (10, 10), color="blue")
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        upload = self.client.post(
+            "/api/user/avatar",
+            {"avatar": SimpleUploadedFile("card.png", buf.getvalue(), content_type="image/png")},
+            HTTP_AUTHORIZATION=f"Bearer {login.json()['access']}",
+        )
+        self.assertEqual(upload.status_code, 200)
+
+        response = self._list_comments()
+        avatars = {c["author"]["user_id"]: c["author"]["avatar"] for c in response.json()["data"]["comments"]}
+        self.assertEqual(avatars[self.authors[0].id], upload.json()["data"]["avatar_url"])
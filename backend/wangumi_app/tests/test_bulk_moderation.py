@@ -0,0 +1,135 @@
+"""
+Tests for the bulk moderation endpoint.
+批量管理操作：批量处理举报、隐藏评论、封禁用户，逐项失败结果与批量会话失效。
+"""
+
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import AdminLog, Anime, Comment, ModerationTarget, Report, UserBanLog, UserProfile
+from wangumi_app.services.token_versions import get_token_version
+
+
+@override_settings(CONTENT_SWEEP_IN_THREAD=False)
+class BulkModerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.admin).access_token}"
+        self.author = User.objects.create_user(username="author", password="pass123")
+        self.anime = Anime.objects.create(title="测试番剧", created_by=self.author)
+        anime_type = ContentType.objects.get_for_model(Anime)
+        self.comments = [
+            Comment.objects.create(
+                content_type=anime_type, object_id=self.anime.id, user=self.author, score=1, content=f"评论{i}"
+            )
+            for i in range(3)
+        ]
+
+    def _bulk(self, payload):
+        return self.client.post(
+            "/api/admin/moderation/bulk/", data=json.dumps(payload), content_type="application/json"
+        )
+
+    def _users(self, count, start=0):
+        users = []
+        for index in range(start, start + count):
+            user = User.objects.create_user(username=f"user{index}", password="pass123")
+            UserProfile.objects.create(user=user)
+            users.append(user)
+        return users
+
+    def test_resolve_reports_with_partial_failures(self):
+        """测试批量处理举报：已处理和不存在的举报逐项返回失败，其余一次更新"""
+        comment_type = ContentType.objects.get_for_model(Comment)
+        reports = [
+            Report.objects.create(
+                reporter=self.admin, content_type=comment_type, object_id=comment.id, category="SPAM"
+            )
+            for comment in self.comments
+        ]
+        Report.objects.filter(pk=reports[2].pk).update(status="REJECTED")
+
+        data = self._bulk({"action": "resolve_reports", "ids": [r.pk for r in reports] + [999999]}).json()["data"]
+        self.assertEqual((data["succeeded"], data["failed"]), (2, 2))
+        self.assertEqual(
+            [(row["id"], row["error"]) for row in data["results"] if not row["success"]],
+            [(reports[2].pk, "举报已处理"), (999999, "举报记录不存在")],
+        )
+        self.assertEqual(Report.objects.filter(status="RESOLVED").count(), 2)
+        self.assertEqual(AdminLog.objects.filter(action_type="HANDLE_REPORT").count(), 2)
+        self.assertFalse(ModerationTarget.objects.filter(object_id=self.comments[0].id, status="OPEN").exists())
+
+    def test_hide_comments(self):
+        Comment.objects.filter(pk=self.comments[0].pk).update(is_banned=True)
+        data = self._bulk({"action": "hide_comments", "ids": [c.pk for c in self.comments]}).json()["data"]
+        self.assertEqual([row["success"] for row in data["results"]], [False, True, True])
+        self.assertEqual(Comment.objects.filter(is_banned=True).count(), 3)
+        self.assertEqual(AdminLog.objects.filter(action_type="DELETE_CONTENT", target_user=self.author).count(), 2)
+
+    def test_ban_users_revokes_sessions_and_tokens(self):
+        """测试批量封禁：停用账号、令牌版本自增、会话删除与刷新令牌拉黑"""
+        users = self._users(2)
+        client = Client()
+        self.assertTrue(client.login(username="user0", password="pass123"))
+        session_key = client.session.session_key
+        RefreshToken.for_user(users[1])
+
+        data = self._bulk({
+            "action": "ban_users", "ids": [u.pk for u in users] + [self.admin.pk], "reason": "批量广告",
+            "delete_content": True,
+        }).json()["data"]
+        self.assertEqual(data["results"][-1]["error"], "不能封禁自己")
+        self.assertEqual(User.objects.filter(pk__in=[u.pk for u in users], is_active=False).count(), 2)
+        self.assertEqual([get_token_version(u.pk) for u in users], [1, 1])
+        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+        self.assertTrue(BlacklistedToken.objects.filter(token__user=users[1]).exists())
+        self.assertEqual(UserBanLog.objects.filter(action="BAN").count(), 2)
+        self.assertEqual(
+            AdminLog.objects.filter(action_type="BAN_USER", content_sweep__isnull=False).count(), 2
+        )
+
+        again = self._bulk({"action": "ban_users", "ids": [users[0].pk], "reason": "重复"}).json()["data"]
+        self.assertEqual(again["results"][0]["error"], "用户已被封禁")
+
+    def test_failed_ban_leaves_tokens_valid(self):
+        """测试批量封禁中途失败时整体回滚，缓存中的令牌版本号保持不变"""
+        users = self._users(2)
+        self.assertEqual([get_token_version(u.pk) for u in users], [0, 0])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, \
+                patch("wangumi_app.services.bulk_moderation.UserBanLog.objects.bulk_create", side_effect=RuntimeError):
+            response = self._bulk({"action": "ban_users", "ids": [u.pk for u in users], "reason": "广告"})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(callbacks, [])
+        self.assertEqual([get_token_version(u.pk) for u in users], [0, 0])
+        self.assertEqual(User.objects.filter(pk__in=[u.pk for u in users], is_active=True).count(), 2)
+
+    def test_ban_query_count_does_not_grow(self):
+        """测试批量封禁的查询次数与用户数量无关"""
+        def ban(users):
+            with CaptureQueriesContext(connection) as context:
+                response = self._bulk({"action": "ban_users", "ids": [u.pk for u in users], "reason": "广告"})
+            self.assertEqual(response.json()["data"]["succeeded"], len(users))
+            return len(context.captured_queries)
+
+        self._bulk({"action": "hide_comments", "ids": [self.comments[0].pk]})  # 预热认证缓存
+        self.assertEqual(ban(self._users(2)), ban(self._users(10, start=2)))
+
+    def test_invalid_payload(self):
+        self.assertEqual(self._bulk({"action": "delete_all", "ids": [1]}).status_code, 400)
+        self.assertEqual(self._bulk({"action": "hide_comments", "ids": []}).status_code, 400)
+        self.assertEqual(self._bulk({"action": "ban_users", "ids": [self.author.pk]}).status_code, 400)
+        for duration in (-1, "7", 1.5, True):
+            payload = {"action": "ban_users", "ids": [self.author.pk], "reason": "广告", "ban_duration": duration}
+            self.assertEqual(self._bulk(payload).status_code, 400)
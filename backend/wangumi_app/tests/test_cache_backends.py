@@ -0,0 +1,114 @@
+"""
+Tests for the two-tier cache backend.
+两级缓存：L1 命中、跨 worker 的失效时间、原子操作直达 L2、命名空间版本与防击穿。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "wangumi_app.cache_backends.TwoTierCache",
+        "LOCATION": "test-l1",
+        "OPTIONS": {"L2": "shared", "L1_TTL": 60, "L1_MAX_ENTRIES": 3, "L1_EXCLUDE_NAMESPACES": ["counter"]},
+    },
+    # 模拟另一个 worker：同一个 L2，独立的 L1
+    "other": {
+        "BACKEND": "wangumi_app.cache_backends.TwoTierCache",
+        "LOCATION": "test-l1-other",
+        "OPTIONS": {"L2": "shared", "L1_TTL": 60},
+    },
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-shared"},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches["default"]
+        self.other = caches["other"]
+        self.shared = caches["shared"]
+        self.cache.clear()
+        self.other.clear()
+        self.cache.reset_metrics()
+
+    def test_reads_fill_l1_and_count_per_namespace(self):
+        """测试读取先走 L2 再回填 L1，并按命名空间统计命中"""
+        self.other.set("anime:1", {"title": "A"})
+        self.assertEqual(self.cache.get("anime:1"), {"title": "A"})
+        self.assertEqual(self.cache.get("anime:1"), {"title": "A"})
+        self.assertIsNone(self.cache.get("anime:2"))
+        self.assertEqual(self.cache.metrics()["anime"], {"l2_hits": 1, "l1_hits": 1, "misses": 1})
+
+    def test_l1_returns_copies(self):
+        self.cache.set("anime:1", {"title": "A"})
+        self.cache.get("anime:1")["title"] = "changed"
+        self.assertEqual(self.cache.get("anime:1"), {"title": "A"})
+
+    def test_other_worker_write_visible_after_l1_ttl(self):
+        """测试其他 worker 的写入最多在 L1_TTL 后可见，本进程的写入立即可见"""
+        self.cache.set("anime:1", "old")
+        self.other.set("anime:1", "new")
+        self.assertEqual(self.cache.get("anime:1"), "old")
+        later = time.monotonic() + 61
+        with mock.patch("wangumi_app.cache_backends.time.monotonic", return_value=later):
+            self.assertEqual(self.cache.get("anime:1"), "new")
+
+        self.cache.set("anime:1", "mine")
+        self.assertEqual(self.cache.get("anime:1"), "mine")
+
+    def test_l1_is_bounded(self):
+        for index in range(5):
+            self.cache.set(f"anime:{index}", index)
+        self.shared.clear()
+        self.assertIsNone(self.cache.get("anime:0"))
+        self.assertEqual(self.cache.get("anime:4"), 4)
+
+    def test_excluded_namespace_and_atomic_ops_go_to_l2(self):
+        """测试排除的命名空间与 add/incr 不使用 L1，多个 worker 看到同一个计数"""
+        self.assertTrue(self.cache.add("counter:1", 0))
+        self.assertFalse(self.other.add("counter:1", 0))
+        self.cache.incr("counter:1")
+        self.other.incr("counter:1")
+        self.assertEqual(self.cache.get("counter:1"), 2)
+
+        self.cache.set("anime:1", 1)
+        self.other.incr("anime:1", 5)
+        self.cache.incr("anime:1")
+        self.assertEqual(self.cache.get("anime:1"), 7)
+
+    def test_get_many_mixes_tiers(self):
+        self.cache.set("anime:1", 1)
+        self.other.set("anime:2", 2)
+        self.assertEqual(self.cache.get_many(["anime:1", "anime:2", "anime:3"]), {"anime:1": 1, "anime:2": 2})
+
+    def test_invalidate_namespace(self):
+        """测试命名空间版本号递增后旧键全部失效，其他命名空间不受影响"""
+        self.cache.set("anime:1", 1)
+        self.cache.set("user:1", 1)
+        self.cache.invalidate_namespace("anime")
+        self.assertIsNone(self.cache.get("anime:1"))
+        self.assertEqual(self.cache.get("user:1"), 1)
+        self.cache.set("anime:1", 2)
+        self.assertEqual(self.cache.get("anime:1"), 2)
+
+    def test_get_or_set_computes_once_under_contention(self):
+        """测试缓存击穿时只有一个调用方计算，其余等待结果"""
+        calls = []
+        lock = threading.Lock()
+
+        def produce():
+            with lock:
+                calls.append(1)
+            time.sleep(0.1)
+            return "value"
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda _: caches["default"].get_or_set("anime:hot", produce, 60), range(16)))
+        self.assertEqual(results, ["value"] * 16)
+        self.assertEqual(len(calls), 1)
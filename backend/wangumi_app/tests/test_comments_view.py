@@ -15,7 +15,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from wangumi_app.models import (
     Anime, Episode, Comment, Like, WatchStatus,
-    Character, Person, UserProfile
+    Character, Person, UserProfile, Reply
 )
 
 
@@ -432,6 +432,56 @@ class CommentViewTests(TestCase):
         self.assertTrue(data['data']['heat_increased'])
         mock_increase_heat.assert_called_once()
 
+    def test_get_comments_with_embedded_replies(self):
+        """测试评论列表内嵌每条评论最新的回复"""
+        anime_ct = ContentType.objects.get_for_model(Anime)
+        comment1 = Comment.objects.create(
+            content_type=anime_ct, object_id=self.anime.id, user=self.user1,
+            score=8, content="评论一", scope='ANIME'
+        )
+        comment2 = Comment.objects.create(
+            content_type=anime_ct, object_id=self.anime.id, user=self.user2,
+            score=9, content="评论二", scope='ANIME'
+        )
+        now = timezone.now()
+        for index in range(3):
+            reply = Reply.objects.create(review=comment1, user=self.user2, content=f"回复{index}")
+            Reply.objects.filter(pk=reply.pk).update(created_at=now - timedelta(minutes=10 - index))
+        Comment.objects.filter(pk=comment1.pk).update(reply_count=3)
+
+        response = self.client.get('/api/comments/', {
+            'scope': 'ANIME',
+            'object_id': self.anime.id,
+            'with_replies': 2
+        })
+
+        self.assertEqual(response.status_code, 200)
+        comments = {c['comment_id']: c for c in response.json()['data']['comments']}
+        self.assertEqual(comments[comment1.id]['replies_count'], 3)
+        self.assertEqual(
+            [r['content'] for r in comments[comment1.id]['latest_replies']],
+            ["回复2", "回复1"]
+        )
+        self.assertEqual(comments[comment1.id]['latest_replies'][0]['author']['username'], "testuser2")
+        self.assertEqual(comments[comment2.id]['latest_replies'], [])
+
+    def test_get_comments_without_embedded_replies(self):
+        """测试默认不内嵌回复"""
+        Comment.objects.create(
+            content_type=ContentType.objects.get_for_model(Anime),
+            object_id=self.anime.id, user=self.user1,
+            score=8, content="评论", scope='ANIME'
+        )
+
+        response = self.client.get('/api/comments/', {
+            'scope': 'ANIME',
+            'object_id': self.anime.id
+        })
+
+        comment = response.json()['data']['comments'][0]
+        self.assertEqual(comment['replies_count'], 0)
+        self.assertNotIn('latest_replies', comment)
+
 
 class CommentIntegrationTests(TestCase):
     """评论系统集成测试"""
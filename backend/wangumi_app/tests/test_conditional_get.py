@@ -0,0 +1,84 @@
+"""
+Tests for conditional GET on catalog and profile endpoints.
+条件请求：详情、列表与个人主页的 ETag / Last-Modified，未变化时返回 304，变化后重新返回完整内容。
+"""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import Anime, Episode, UserFollow, UserProfile
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.anime = Anime.objects.create(title="测试番剧")
+        self.user = User.objects.create_user(username="owner", password="pass123")
+        self.other = User.objects.create_user(username="other", password="pass123")
+        UserProfile.objects.create(user=self.user, nickname="旧昵称")
+
+    def _revalidate(self, url, response, **extra):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **extra)
+
+    def test_detail_not_modified_without_queries(self):
+        """测试详情 ETag 匹配时直接返回 304，不查询数据库"""
+        url = f"/api/anime/{self.anime.id}"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)
+        with self.assertNumQueries(0):
+            second = self._revalidate(url, first)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Episode.objects.create(anime=self.anime, episode_number=1, title="第一话")
+        third = self._revalidate(url, first)
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third["ETag"], first["ETag"])
+
+    def test_list_changes_with_any_anime(self):
+        first = self.client.get("/api/anime", {"sort": "rating"})
+        self.assertEqual(self._revalidate("/api/anime?sort=rating", first).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Anime.objects.create(title="新番")
+        self.assertEqual(self._revalidate("/api/anime?sort=rating", first).status_code, 200)
+
+    def test_list_coalesces_popularity_writes(self):
+        """测试只更新热度的保存不会立即让列表失效，超过合并间隔后才换版本"""
+        url = "/api/anime?sort=rating"
+        first = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.anime.popularity += 1
+            self.anime.save(update_fields=["popularity"])
+        self.assertEqual(self._revalidate(url, first).status_code, 304)
+
+        with self.settings(ANIME_LIST_COUNTER_REFRESH_SECONDS=0):
+            second = self._revalidate(url, first)
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(second.json()["data"]["list"][0]["popularity"], 1)
+            self.assertEqual(self._revalidate(url, second).status_code, 304)
+
+    def test_profile_etag_depends_on_viewer_and_follows(self):
+        """测试本人与他人看到的主页 ETag 不同，关注数变化后失效"""
+        url = f"/api/users/{self.user.id}/profile"
+        public = self.client.get(url)
+        self.assertIn("Authorization", public["Vary"])
+        self.client.force_login(self.user)
+        own = self.client.get(url)
+        self.assertNotEqual(public["ETag"], own["ETag"])
+        self.assertEqual(self._revalidate(url, own).status_code, 304)
+        self.assertEqual(self._revalidate(url, public).status_code, 200)
+        self.client.logout()
+
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+        mine = self.client.get("/api/user/profile", **auth)
+        self.assertEqual(self._revalidate("/api/user/profile", mine, **auth).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            UserFollow.objects.create(follower=self.other, following=self.user)
+        self.assertEqual(self._revalidate("/api/user/profile", mine, **auth).status_code, 200)
+        self.assertEqual(self._revalidate(url, public).status_code, 200)
@@ -0,0 +1,159 @@
+"""
+Tests for the background content sweeps of ban / unban.
+封禁/解封内容处理：后台分批执行、断点续跑、进度接口以及与新操作的竞争。
+"""
+
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import Activity, Anime, Comment, ContentSweepJob, Reply
+from wangumi_app.services.content_sweeps import run_sweep
+
+
+@override_settings(CONTENT_SWEEP_IN_THREAD=False, CONTENT_SWEEP_BATCH_SIZE=2)
+class ContentSweepTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.user = User.objects.create_user(username="spammer", password="pass123")
+        self.other = User.objects.create_user(username="other", password="pass123")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.admin).access_token}"
+
+        anime_type = ContentType.objects.get_for_model(Anime)
+        self.anime = Anime.objects.create(title="刷屏条目", created_by=self.user)
+        for index in range(5):
+            comment = Comment.objects.create(
+                content_type=anime_type, object_id=self.anime.id, user=self.user, score=1, content=f"广告{index}"
+            )
+            Reply.objects.create(review=comment, user=self.user, content="广告")
+        self.innocent = Comment.objects.create(
+            content_type=anime_type, object_id=self.anime.id, user=self.other, score=8, content="正常评论"
+        )
+
+    def _ban(self, delete_content=True):
+        response = self.client.post(
+            f"/api/admin/users/{self.user.id}/ban/",
+            data=json.dumps({"reason": "广告", "delete_content": delete_content}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def _unban(self, restore_content=True):
+        response = self.client.post(
+            f"/api/admin/users/{self.user.id}/unban/",
+            data=json.dumps({"reason": "申诉", "restore_content": restore_content}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def _hidden(self):
+        return (
+            Comment.objects.filter(user=self.user, is_banned=True).count(),
+            Reply.objects.filter(user=self.user, is_banned=True).count(),
+            Anime.objects.filter(created_by=self.user, is_banned=True).count(),
+        )
+
+    def test_ban_only_schedules_sweep(self):
+        """测试封禁请求只创建任务，内容在后台分批处理，进度可按操作日志查询"""
+        data = self._ban()
+        self.assertTrue(data["content_deleted"])
+        self.assertEqual(data["content_sweep"]["status"], "PENDING")
+        self.assertEqual(self._hidden(), (0, 0, 0))
+
+        call_command("run_content_sweeps", stdout=StringIO())
+        self.assertEqual(self._hidden(), (5, 5, 1))
+        self.innocent.refresh_from_db()
+        self.assertFalse(self.innocent.is_banned)
+
+        log_id = data["content_sweep"]["admin_log_id"]
+        progress = self.client.get(f"/api/admin/logs/{log_id}/content-sweep/").json()["data"]
+        self.assertEqual((progress["status"], progress["processed"], progress["total"]), ("DONE", 11, 11))
+
+    def test_swept_content_leaves_public_lists(self):
+        """测试内容被隐藏后不再出现在评论列表、回复列表与动态中"""
+        visible = Comment.objects.filter(user=self.user).first()
+        Activity.objects.create(
+            user=self.user, content_type=ContentType.objects.get_for_model(Comment), object_id=visible.id,
+            action="COMMENT",
+        )
+        listed = self.client.get("/api/comments/", {"scope": "ANIME", "object_id": self.anime.id}).json()["data"]
+        self.assertEqual(listed["total_comments"], 6)
+        activities_url = f"/api/user_activities/?user_id={self.user.id}"
+        self.assertEqual(len(self.client.get(activities_url).json()["data"]["list"]), 1)
+
+        self._ban()
+        call_command("run_content_sweeps", stdout=StringIO())
+        listed = self.client.get("/api/comments/", {"scope": "ANIME", "object_id": self.anime.id}).json()["data"]
+        self.assertEqual([comment["comment_id"] for comment in listed["comments"]], [self.innocent.id])
+        self.assertEqual(self.client.get(f"/api/comments/{visible.id}/replies/").status_code, 404)
+        self.assertEqual(self.client.get(activities_url).json()["data"]["list"], [])
+
+    def test_sweep_resumes_from_cursor(self):
+        """测试任务中断后从记录的断点继续，不重复处理"""
+        self._ban()
+        job = ContentSweepJob.objects.get()
+        # 模拟已处理前两条评论后进程退出
+        first_ids = list(Comment.objects.filter(user=self.user).order_by("pk").values_list("pk", flat=True)[:2])
+        Comment.objects.filter(pk__in=first_ids).update(is_banned=True)
+        ContentSweepJob.objects.filter(pk=job.pk).update(stage="comment", last_id=first_ids[-1], processed=2)
+
+        job = run_sweep(job.pk)
+        self.assertEqual((job.status, job.processed), ("DONE", 11))
+        self.assertEqual(self._hidden(), (5, 5, 1))
+
+    def test_new_action_cancels_running_sweep(self):
+        """测试封禁任务未完成时解封，旧任务被取消，不会覆盖恢复结果"""
+        self._ban()
+        ban_job = ContentSweepJob.objects.get()
+        self._unban()
+        ban_job.refresh_from_db()
+        self.assertEqual(ban_job.status, "CANCELLED")
+        self.assertIsNone(run_sweep(ban_job.pk))
+
+        call_command("run_content_sweeps", stdout=StringIO())
+        self.assertEqual(self._hidden(), (0, 0, 0))
+
+    def test_unban_restores_hidden_content(self):
+        self._ban()
+        call_command("run_content_sweeps", stdout=StringIO())
+        data = self._unban()
+        self.assertTrue(data["content_restored"])
+        call_command("run_content_sweeps", stdout=StringIO())
+        self.assertEqual(self._hidden(), (0, 0, 0))
+        self.assertEqual(ContentSweepJob.objects.get(action="RESTORE").processed, 11)
+
+    def test_reply_counts_follow_hidden_replies(self):
+        """测试隐藏/恢复回复与删除回复后，评论列表的回复数与回复列表保持一致"""
+        reply = Reply.objects.create(review=self.innocent, user=self.user, content="广告回复")
+        Reply.objects.create(review=self.innocent, user=self.other, content="正常回复")
+
+        def counts():
+            listed = self.client.get("/api/comments/", {"scope": "ANIME", "object_id": self.anime.id}).json()["data"]
+            shown = next(c for c in listed["comments"] if c["comment_id"] == self.innocent.id)
+            replies = self.client.get(f"/api/comments/{self.innocent.id}/replies/").json()["data"]
+            return shown["replies_count"], len(replies["replies"])
+
+        self.assertEqual(counts(), (2, 2))
+        self._ban()
+        call_command("run_content_sweeps", stdout=StringIO())
+        self.assertEqual(counts(), (1, 1))
+        self._unban()
+        call_command("run_content_sweeps", stdout=StringIO())
+        self.assertEqual(counts(), (2, 2))
+        reply.delete()
+        self.assertEqual(counts(), (1, 1))
+
+    def test_missing_sweep_returns_404(self):
+        data = self._ban(delete_content=False)
+        self.assertFalse(data["content_deleted"])
+        self.assertIsNone(data["content_sweep"])
+        self.assertEqual(self.client.get("/api/admin/logs/999999/content-sweep/").status_code, 404)
@@ -0,0 +1,88 @@
+"""
+Tests for precomputed credits documents.
+演职员文档：关联行变化后增量重建、同一事务只重建一次、集合 SQL 整体重建与逐条构建结果一致。
+"""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+
+from wangumi_app.models import (
+    Anime, AnimeCredits, AnimeStaff, Character, CharacterAppearance, CharacterVoice, Person, StaffRole
+)
+from wangumi_app.services import credits
+from wangumi_app.services.credits import build_credits
+
+
+class AnimeCreditsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.anime = Anime.objects.create(title="测试番剧")
+        self.empty = Anime.objects.create(title="无演职员番剧")
+        self.hero = Character.objects.create(name="主角", image="hero.jpg")
+        self.rival = Character.objects.create(name="对手")
+        self.seiyu = [
+            Person.objects.create(pers_name=name, pers_type=1, summary="", pers_img="") for name in ("声优甲", "声优乙")
+        ]
+        self.director = Person.objects.create(pers_name="导演", pers_type=1, summary="", pers_img="")
+        self.role = StaffRole.objects.create(name="导演")
+        self.voice_role = StaffRole.objects.create(name="配音", is_voice_role=True)
+
+    def _add_credits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                CharacterAppearance.objects.create(character=self.rival, anime=self.anime, order=2)
+                CharacterAppearance.objects.create(character=self.hero, anime=self.anime, order=1)
+                for person in self.seiyu:
+                    CharacterVoice.objects.create(character=self.hero, person=person)
+                AnimeStaff.objects.create(anime=self.anime, person=self.director, role=self.role, order=1)
+                AnimeStaff.objects.create(
+                    anime=self.anime, person=self.seiyu[0], role=self.voice_role, character=self.hero, order=2
+                )
+
+    def test_links_refresh_once_per_transaction(self):
+        """测试同一事务内多次修改关联行，提交后该番剧只重建一次"""
+        with patch.object(credits, "build_credits", wraps=credits.build_credits) as build:
+            self._add_credits()
+        self.assertEqual(build.call_count, 1)
+
+        row = AnimeCredits.objects.get(anime=self.anime)
+        self.assertEqual(row.characters, [
+            {"name": "主角", "avatar": "hero.jpg", "voiceActors": ["声优甲", "声优乙"]},
+            {"name": "对手", "avatar": "", "voiceActors": []},
+        ])
+        self.assertEqual(row.staff, [
+            {"role": "导演", "name": "导演"},
+            {"role": "配音", "name": "声优甲", "character": "主角"},
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.seiyu[1].pers_name = "声优丙"
+            self.seiyu[1].save()
+        self.assertEqual(AnimeCredits.objects.get(anime=self.anime).characters[0]["voiceActors"], ["声优甲", "声优丙"])
+
+    def test_detail_reads_credits_row(self):
+        self._add_credits()
+        relations = self.client.get(f"/api/anime/{self.anime.id}").json()["data"]["relations"]
+        row = AnimeCredits.objects.get(anime=self.anime)
+        self.assertEqual(relations, {"characters": row.characters, "staff": row.staff})
+
+        # 缺失的文档在首次读取时补建
+        relations = self.client.get(f"/api/anime/{self.empty.id}").json()["data"]["relations"]
+        self.assertEqual(relations, {"characters": [], "staff": []})
+        self.assertTrue(AnimeCredits.objects.filter(anime=self.empty).exists())
+
+    def test_sql_rebuild_matches_incremental_build(self):
+        """测试集合 SQL 重建的文档与逐条构建一致"""
+        self._add_credits()
+        AnimeCredits.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_anime_credits", stdout=out)
+        self.assertIn(f"anime={Anime.objects.count()}", out.getvalue())
+        for anime in (self.anime, self.empty):
+            row = AnimeCredits.objects.get(anime=anime)
+            self.assertEqual((row.characters, row.staff), build_credits(anime.id))
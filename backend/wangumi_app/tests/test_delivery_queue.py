@@ -0,0 +1,199 @@
+"""
+Tests for the verification message delivery queue.
+投递队列：本地与数据库后端、单连接批量发信、失败退避重试与死信。
+"""
+
+import socketserver
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from wangumi_app.models import OutboundMessage
+from wangumi_app.services import delivery_queue
+from wangumi_app.services.delivery_queue import (
+    DatabaseDeliveryQueue,
+    Delivery,
+    LocalDeliveryQueue,
+    register_sender,
+)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """只实现 Django SMTP 后端用到的命令"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 localhost ready")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line.split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                address = line.split(":", 1)[1].strip().strip("<>")
+                if address in server.reject:
+                    self.reply("550 mailbox unavailable")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline().rstrip(b"\r\n") != b".":
+                    pass
+                with server.lock:
+                    server.messages.extend(recipients)
+                self.reply("250 OK")
+            elif command in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """测试用的本地 SMTP 服务，记录连接数与收件人"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.reject = set()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def email_settings(self):
+        return override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        )
+
+
+def _mail(recipient):
+    return Delivery("email", recipient, subject="验证码", body="123456")
+
+
+@override_settings(DELIVERY_RETRY_BASE_SECONDS=0.01, DELIVERY_MAX_ATTEMPTS=3)
+class LocalDeliveryQueueTests(SimpleTestCase):
+    def test_batch_shares_one_smtp_connection(self):
+        """测试同一批邮件只建立一个 SMTP 连接"""
+        with LocalSMTPServer() as server, server.email_settings():
+            deliveries = [_mail(f"user{index}@example.com") for index in range(20)]
+            errors = delivery_queue.deliver(deliveries)
+        self.assertEqual(errors, [None] * 20)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(len(server.messages), 20)
+
+    def test_workers_send_and_dead_letter(self):
+        """测试后台 worker 发送邮件，被拒收的邮件重试后进入死信"""
+        queue = LocalDeliveryQueue(workers=2)
+        with LocalSMTPServer() as server, server.email_settings(), self.assertLogs(delivery_queue.logger, "ERROR"):
+            server.reject.add("bad@example.com")
+            for index in range(10):
+                queue.enqueue(_mail(f"user{index}@example.com"))
+            queue.enqueue(_mail("bad@example.com"))
+            for _ in range(200):
+                queue.join()
+                if queue.dead_letters:
+                    break
+                threading.Event().wait(0.01)
+        self.assertEqual(sorted(set(server.messages)), sorted(f"user{index}@example.com" for index in range(10)))
+        self.assertEqual([delivery.recipient for delivery, _ in queue.dead_letters], ["bad@example.com"])
+        self.assertEqual(queue.dead_letters[0][0].attempts, 3)
+
+    def test_retry_succeeds_after_transient_failure(self):
+        calls = []
+
+        def flaky(deliveries):
+            calls.append(len(deliveries))
+            return [RuntimeError("timeout")] if len(calls) == 1 else [None]
+
+        register_sender("flaky", flaky)
+        self.addCleanup(delivery_queue._senders.pop, "flaky")
+        queue = LocalDeliveryQueue(workers=1)
+        queue.enqueue(Delivery("flaky", "13800000000"))
+        for _ in range(200):
+            queue.join()
+            if len(calls) == 2:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(calls, [1, 1])
+        self.assertFalse(queue.dead_letters)
+
+
+@override_settings(DELIVERY_MAX_ATTEMPTS=2)
+class DatabaseDeliveryQueueTests(TestCase):
+    def test_process_due_sends_and_backs_off(self):
+        """测试数据库后端发送到期消息，失败的按退避时间重试，超过次数进入死信"""
+        queue = DatabaseDeliveryQueue()
+        queue.enqueue(_mail("ok@example.com"))
+        queue.enqueue(_mail("bad@example.com"))
+        with LocalSMTPServer() as server, server.email_settings(), self.assertLogs(delivery_queue.logger, "ERROR"):
+            server.reject.add("bad@example.com")
+            self.assertEqual(queue.process_due(), 2)
+            # 失败的消息尚未到重试时间
+            self.assertEqual(queue.process_due(), 0)
+            OutboundMessage.objects.filter(status="PENDING").update(next_attempt_at=timezone.now())
+            self.assertEqual(queue.process_due(), 1)
+
+        sent = OutboundMessage.objects.get(recipient="ok@example.com")
+        self.assertEqual((sent.status, sent.attempts), ("SENT", 1))
+        dead = OutboundMessage.objects.get(recipient="bad@example.com")
+        self.assertEqual((dead.status, dead.attempts), ("DEAD", 2))
+        self.assertIn("550", dead.last_error)
+
+    def test_command_drains_queue(self):
+        queue = DatabaseDeliveryQueue()
+        for index in range(3):
+            queue.enqueue(_mail(f"user{index}@example.com"))
+        OutboundMessage.objects.filter(recipient="user2@example.com").update(
+            status="DEAD", next_attempt_at=timezone.now() + timedelta(hours=1)
+        )
+        call_command("deliver_messages", "--once", "--requeue-dead", stdout=StringIO())
+        self.assertEqual(OutboundMessage.objects.filter(status="SENT").count(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @patch("wangumi_app.services.sms_verification.random.randint", return_value=123456)
+    def test_send_code_only_enqueues(self, _mock_randint):
+        """测试发送验证码接口默认写入数据库队列，不在请求内发信，进程重启也不会丢失"""
+        response = self.client.post(
+            "/api/send_verification_code/",
+            data={"email": "queue@example.com", "purpose": "register"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboundMessage.objects.get()
+        self.assertEqual(message.recipient, "queue@example.com")
+        self.assertIn("123456", message.body)
@@ -0,0 +1,66 @@
+"""
+Tests for the episode listing endpoint.
+剧集分页：详情只内嵌计数与最新几集，剧集接口按集数范围、游标与类型分页。
+"""
+
+import importlib
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from wangumi_app.models import Anime, Episode
+
+
+class EpisodeListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.anime = Anime.objects.create(title="长篇番剧")
+        Episode.objects.bulk_create(
+            [
+                Episode(anime=self.anime, episode_number=number, title=f"第{number}话",
+                        episode_type=2 if number % 10 == 0 else 1, online_urls=[f"https://example.com/{number}"])
+                for number in range(1, 121)
+            ]
+        )
+        self.url = f"/api/anime/{self.anime.id}/episodes"
+
+    def test_detail_embeds_counts_and_latest(self):
+        """测试详情只返回各类型集数与最新三集"""
+        meta = self.client.get(f"/api/anime/{self.anime.id}").json()["data"]["meta"]
+        self.assertEqual([ep["number"] for ep in meta["episodes_detail"]], [118, 119, 120])
+        self.assertEqual(meta["episodeCount"], 120)
+        self.assertEqual(meta["episodeCountsByType"], {"1": 108, "2": 12})
+        self.assertEqual(meta["updateProgress"], "已更新至第120集")
+
+    def test_cursor_pages_cover_every_episode(self):
+        """测试按游标翻页不重不漏，最后一页没有 next_cursor"""
+        numbers, cursor = [], None
+        while True:
+            params = {"limit": 50}
+            if cursor is not None:
+                params["cursor"] = cursor
+            data = self.client.get(self.url, params).json()["data"]
+            numbers.extend(ep["number"] for ep in data["list"])
+            cursor = data["next_cursor"]
+            if not data["has_more"]:
+                break
+        self.assertEqual(numbers, list(range(1, 121)))
+        self.assertIsNone(cursor)
+
+    def test_range_and_type_filters(self):
+        data = self.client.get(self.url, {"from": 95, "to": 130, "type": 2}).json()["data"]
+        self.assertEqual([ep["number"] for ep in data["list"]], [100, 110, 120])
+        self.assertEqual(data["list"][0]["online_urls"], ["https://example.com/100"])
+        self.assertFalse(data["has_more"])
+
+        self.assertEqual(self.client.get(self.url, {"cursor": "abc"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get("/api/anime/999999/episodes").status_code, 404)
+
+    def test_legacy_online_urls_are_parsed(self):
+        """测试迁移把旧的 JSON 文本与分行文本都转换成链接列表"""
+        migration = importlib.import_module("wangumi_app.migrations.0031_episode_online_urls_json")
+        self.assertEqual(migration._parse('["https://a", "https://b"]'), ["https://a", "https://b"])
+        self.assertEqual(migration._parse("https://a\n\n https://b \n"), ["https://a", "https://b"])
+        self.assertEqual(migration._parse('{"url": "https://a"}'), [])
+        self.assertEqual(migration._parse(""), [])
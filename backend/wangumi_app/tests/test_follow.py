@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
-from wangumi_app.models import UserFollow
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from wangumi_app.models import UserFollow, UserProfile
+from wangumi_app.services import follow_counts
 
 User = get_user_model()
 
@@ -85,3 +90,123 @@ class FollowViewTests(TestCase):
         resp2 = self.client.delete(unfollow_url)  # 未提供认证
         self.assertIn(resp1.status_code, [401, 403])
         self.assertIn(resp2.status_code, [401, 403])
+
+
+class FollowCountTests(TestCase):
+    """关注/粉丝冗余计数"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user_follower = User.objects.create_user(username="count_follower", password="123456")
+        self.user_target = User.objects.create_user(username="count_target", password="123456")
+        UserProfile.objects.create(user=self.user_follower)
+        resp = self.client.post("/api/login/", {"username": "count_follower", "password": "123456"}, content_type="application/json")
+        self.token = resp.json()["access"]
+
+    def auth_header(self):
+        return {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}
+
+    def counts(self, user):
+        profile = UserProfile.objects.get(user=user)
+        return profile.follower_count, profile.following_count
+
+    def test_repeated_follow_and_unfollow_do_not_drift(self):
+        """测试重复关注/取消关注不会让计数漂移，缺失的 Profile 会被补建"""
+        follow_url = f"/api/users/{self.user_target.id}/follow"
+        unfollow_url = f"/api/users/{self.user_target.id}/unfollow"
+
+        self.client.post(follow_url, **self.auth_header())
+        self.client.post(follow_url, **self.auth_header())
+        self.assertEqual(self.counts(self.user_follower), (0, 1))
+        self.assertEqual(self.counts(self.user_target), (1, 0))
+
+        self.client.delete(unfollow_url, **self.auth_header())
+        self.client.delete(unfollow_url, **self.auth_header())
+        self.assertEqual(self.counts(self.user_follower), (0, 0))
+        self.assertEqual(self.counts(self.user_target), (0, 0))
+
+    def test_profile_reads_maintained_counts(self):
+        """测试主页直接读取冗余计数"""
+        self.client.post(f"/api/users/{self.user_target.id}/follow", **self.auth_header())
+
+        with self.assertNumQueries(1):
+            resp = self.client.get(f"/api/users/{self.user_target.id}/profile")
+        self.assertEqual(resp.json()["data"]["follower_count"], 1)
+
+    def test_racing_first_follows_both_count(self):
+        """测试两个首次关注同时补建 Profile 时，后到的一方插入被忽略但计数不丢"""
+        other = User.objects.create_user(username="count_other", password="123456")
+        UserFollow.objects.create(follower=other, following=self.user_target)
+        seed = follow_counts.count_follows
+
+        def seed_after_rival(user_id):
+            # 另一个请求在本次查询计数与插入之间抢先建好了 Profile
+            counts = seed(user_id)
+            UserProfile.objects.get_or_create(user_id=user_id, defaults={"follower_count": 1})
+            return counts
+
+        with mock.patch.object(follow_counts, "count_follows", side_effect=seed_after_rival):
+            self.client.post(f"/api/users/{self.user_target.id}/follow", **self.auth_header())
+        self.assertEqual(self.counts(self.user_target), (2, 0))
+
+    def test_reconcile_command_fixes_drift(self):
+        """测试校正命令修复漂移的计数"""
+        UserProfile.objects.create(user=self.user_target, follower_count=7)
+        UserFollow.objects.create(follower=self.user_follower, following=self.user_target)
+
+        out = StringIO()
+        call_command("reconcile_follow_counts", stdout=out)
+
+        self.assertIn("fixed=2", out.getvalue())
+        self.assertEqual(self.counts(self.user_target), (1, 0))
+        self.assertEqual(self.counts(self.user_follower), (0, 1))
+
+
+class RelationshipBatchTests(TestCase):
+    """批量关注关系查询"""
+
+    def setUp(self):
+        self.client = Client()
+        self.me = User.objects.create_user(username="rel_me", password="123456")
+        self.friend = User.objects.create_user(username="rel_friend", password="123456")
+        self.fan = User.objects.create_user(username="rel_fan", password="123456")
+        self.idol = User.objects.create_user(username="rel_idol", password="123456")
+        self.stranger = User.objects.create_user(username="rel_stranger", password="123456")
+        UserFollow.objects.create(follower=self.me, following=self.friend)
+        UserFollow.objects.create(follower=self.friend, following=self.me)
+        UserFollow.objects.create(follower=self.fan, following=self.me)
+        UserFollow.objects.create(follower=self.me, following=self.idol)
+        resp = self.client.post("/api/login/", {"username": "rel_me", "password": "123456"}, content_type="application/json")
+        self.token = resp.json()["access"]
+
+    def get(self, ids):
+        return self.client.get("/api/users/relationships", {"ids": ids}, HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_flags_for_each_user(self):
+        """测试一次返回所有用户的关注、被关注与互关标记"""
+        users = [self.friend, self.fan, self.idol, self.stranger, self.me]
+        resp = self.get(",".join(str(user.id) for user in users))
+        self.assertEqual(resp.status_code, 200)
+        flags = {item["user_id"]: item for item in resp.json()["data"]["list"]}
+
+        self.assertEqual([item["user_id"] for item in resp.json()["data"]["list"]], [user.id for user in users])
+        self.assertTrue(flags[self.friend.id]["mutual"])
+        self.assertTrue(flags[self.fan.id]["followed_by"])
+        self.assertFalse(flags[self.fan.id]["following"])
+        self.assertTrue(flags[self.idol.id]["following"])
+        self.assertFalse(flags[self.idol.id]["mutual"])
+        self.assertFalse(any(flags[self.stranger.id][key] for key in ("following", "followed_by", "mutual")))
+        self.assertFalse(flags[self.me.id]["following"])
+
+    def test_single_query(self):
+        """测试关注关系只查询一次"""
+        ids = ",".join(str(user.id) for user in (self.friend, self.fan, self.idol, self.stranger))
+        # 认证用户 + 关注关系
+        with self.assertNumQueries(2):
+            self.get(ids)
+
+    def test_invalid_ids(self):
+        """测试缺少、非法或过多的 ids"""
+        self.assertEqual(self.get("").status_code, 400)
+        self.assertEqual(self.get("1,abc").status_code, 400)
+        self.assertEqual(self.get(",".join(str(i) for i in range(1, 300))).status_code, 400)
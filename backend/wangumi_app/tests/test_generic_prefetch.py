@@ -0,0 +1,195 @@
+"""
+Tests for the generic relation prefetcher.
+验证按内容类型批量解析泛型关联，查询数只与类型数量有关。
+"""
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import (
+    Activity, AdminLog, Anime, Comment, Episode, Like, Report, UserProfile, WatchStatus
+)
+from wangumi_app.services.generic_prefetch import prefetch_generic_targets
+
+
+class GenericPrefetchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='prefetch_user', password='pass123')
+        self.admin = User.objects.create_user(username='prefetch_admin', password='pass123', is_staff=True)
+        self.anime_ct = ContentType.objects.get_for_model(Anime)
+        self.animes = [
+            Anime.objects.create(title=f'Anime {index}', title_cn=f'番剧{index}')
+            for index in range(3)
+        ]
+        self.episode = Episode.objects.create(anime=self.animes[0], episode_number=1, title='EP1')
+        self.comments = [
+            Comment.objects.create(
+                user=self.user, content_type=self.anime_ct, object_id=anime.id,
+                score=7, content=f'评论{anime.id}'
+            )
+            for anime in self.animes
+        ]
+        self.likes = [Like.objects.create(user=self.user, comment=comment) for comment in self.comments]
+        self.watches = [
+            WatchStatus.objects.create(user=self.user, anime=anime, status='WATCHING')
+            for anime in self.animes
+        ]
+
+        for targets, action in (
+            (self.comments, 'COMMENT'),
+            (self.likes, 'LIKE'),
+            (self.watches, 'WATCH'),
+            (self.animes, 'ITEM'),
+        ):
+            for target in targets:
+                Activity.objects.create(
+                    user=self.user,
+                    content_type=ContentType.objects.get_for_model(target),
+                    object_id=target.id,
+                    action=action
+                )
+        # 指向已删除对象的动态
+        Activity.objects.create(
+            user=self.user,
+            content_type=ContentType.objects.get_for_model(Comment),
+            object_id=999999,
+            action='COMMENT'
+        )
+
+    def test_one_query_per_content_type(self):
+        """测试四种类型的动态只发四条查询，嵌套对象不再单独查询"""
+        activities = list(Activity.objects.filter(user=self.user))
+        # 预热 ContentType 全局缓存，使计数只反映目标对象查询
+        for activity in activities:
+            ContentType.objects.get_for_id(activity.content_type_id)
+
+        with self.assertNumQueries(4):
+            prefetch_generic_targets(activities)
+
+        with self.assertNumQueries(0):
+            for activity in activities:
+                target = activity.content_object
+                activity.content_type.model
+                if isinstance(target, Like):
+                    target.comment.content
+                elif isinstance(target, WatchStatus):
+                    target.anime.title
+
+        missing = [a for a in activities if a.object_id == 999999]
+        self.assertIsNone(missing[0].prefetched_target)
+        self.assertIsNone(missing[0].content_object)
+
+    def test_nested_generic_targets(self):
+        """测试对评论再次预取其评论对象"""
+        activities = list(Activity.objects.filter(user=self.user, action='COMMENT'))
+        prefetch_generic_targets(activities)
+        comments = [a.content_object for a in activities if a.content_object is not None]
+
+        with self.assertNumQueries(1):
+            prefetch_generic_targets(comments)
+        self.assertEqual(
+            sorted(comment.content_object.title for comment in comments),
+            ['Anime 0', 'Anime 1', 'Anime 2']
+        )
+
+    def test_custom_field_names_for_admin_log(self):
+        """测试 AdminLog 的 target_content_type/target_object_id 字段"""
+        logs = [
+            AdminLog.objects.create(
+                admin=self.admin, action_type='DELETE_CONTENT',
+                target_content_type=ContentType.objects.get_for_model(Episode),
+                target_object_id=self.episode.id, description='删除剧集'
+            ),
+            AdminLog.objects.create(
+                admin=self.admin, action_type='BAN_USER',
+                target_user=self.user, description='无目标对象'
+            ),
+        ]
+        logs = list(AdminLog.objects.filter(id__in=[log.id for log in logs]).order_by('id'))
+
+        with self.assertNumQueries(1):
+            prefetch_generic_targets(
+                logs, ct_field='target_content_type', id_field='target_object_id'
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(logs[0].target_object.anime.title, 'Anime 0')
+            self.assertIsNone(logs[1].target_object)
+
+    def test_reports_prime_content_object(self):
+        """测试举报记录的 content_object 被预取"""
+        for comment in self.comments:
+            Report.objects.create(
+                reporter=self.admin, content_type=ContentType.objects.get_for_model(Comment),
+                object_id=comment.id, category='OTHER', reason='test'
+            )
+        reports = list(Report.objects.all())
+
+        prefetch_generic_targets(reports)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                sorted(report.content_object.id for report in reports),
+                sorted(comment.id for comment in self.comments)
+            )
+
+
+class UserActivityQueryCountTests(APITestCase):
+    """动态列表的查询数不随动态条数增长"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='feed_owner', password='pass123')
+        UserProfile.objects.create(user=self.owner)
+        self.token = str(RefreshToken.for_user(self.owner).access_token)
+        self.anime_ct = ContentType.objects.get_for_model(Anime)
+        self.episode_ct = ContentType.objects.get_for_model(Episode)
+
+    def _add_activities(self, start, stop):
+        for index in range(start, stop):
+            anime = Anime.objects.create(title=f'Feed Anime {index}')
+            episode = Episode.objects.create(anime=anime, episode_number=1, title=f'EP{index}')
+            for target_ct, target in ((self.anime_ct, anime), (self.episode_ct, episode)):
+                comment = Comment.objects.create(
+                    user=self.owner, content_type=target_ct, object_id=target.id,
+                    score=8, content='feed', scope='ANIME' if target_ct == self.anime_ct else 'EPISODE'
+                )
+                Activity.objects.create(
+                    user=self.owner, content_type=ContentType.objects.get_for_model(Comment),
+                    object_id=comment.id, action='COMMENT'
+                )
+            like = Like.objects.create(user=self.owner, comment=comment)
+            Activity.objects.create(
+                user=self.owner, content_type=ContentType.objects.get_for_model(Like),
+                object_id=like.id, action='LIKE'
+            )
+            watch = WatchStatus.objects.create(user=self.owner, anime=anime, status='WANT')
+            Activity.objects.create(
+                user=self.owner, content_type=ContentType.objects.get_for_model(WatchStatus),
+                object_id=watch.id, action='WATCH'
+            )
+
+    def _count_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        # 两次计数都从冷缓存开始，隐私设置查询计入两边
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/user_activities/', {'user_id': self.owner.id, 'limit': 100})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()['data']['list']
+
+    def test_query_count_independent_of_page_size(self):
+        self._add_activities(0, 2)
+        small_count, _ = self._count_queries()
+
+        self._add_activities(2, 10)
+        large_count, results = self._count_queries()
+
+        self.assertEqual(small_count, large_count)
+        titles = {item['target_title'] for item in results}
+        self.assertIn('Feed Anime 9', titles)
+        self.assertIn('Feed Anime 9 - EP9', titles)
+        self.assertNotIn('[对象已删除]', titles)
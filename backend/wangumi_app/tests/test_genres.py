@@ -0,0 +1,84 @@
+"""
+Tests for the normalized genre table.
+类型关联表：保存条目时同步、按类型筛选列表、类型计数缓存与重建命令。
+"""
+
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from wangumi_app.models import Anime, AnimeGenre, Genre
+
+
+class GenreTableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.action = Anime.objects.create(title="动作番", genres=["Action", " Comedy ", "Action", ""], popularity=30)
+        self.drama = Anime.objects.create(title="剧情番", genres=["Drama"], popularity=20)
+        self.plain = Anime.objects.create(title="无类型番", popularity=10)
+
+    def _links(self, anime):
+        return sorted(AnimeGenre.objects.filter(anime=anime).values_list("genre__name", flat=True))
+
+    def test_links_follow_saves(self):
+        """测试新建与修改条目时关联表随 genres 同步，名称去空白、去重"""
+        self.assertEqual(self._links(self.action), ["Action", "Comedy"])
+        self.assertEqual(self._links(self.plain), [])
+
+        self.action.genres = ["Comedy", "Romance"]
+        self.action.save()
+        self.assertEqual(self._links(self.action), ["Comedy", "Romance"])
+
+        # 只更新其他字段时不重新同步
+        drama = Anime.objects.get(pk=self.drama.pk)
+        with self.assertNumQueries(1):
+            drama.save(update_fields=["popularity"])
+
+        # 整行保存但类型未变时也不同步；原地修改列表仍能识别
+        drama.popularity = 25
+        with self.assertNumQueries(1):
+            drama.save()
+        drama.genres.append("Mystery")
+        drama.save()
+        self.assertEqual(self._links(drama), ["Drama", "Mystery"])
+
+    def test_category_filter_uses_link_table(self):
+        """测试多个类型取并集"""
+        response = self.client.get("/api/anime", {"category": "Comedy,Drama"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual([item["id"] for item in data["list"]], [self.action.id, self.drama.id])
+        self.assertEqual(data["category_filter"], ["Comedy", "Drama"])
+
+        response = self.client.get("/api/anime", {"category": "Horror"})
+        self.assertEqual(response.json()["data"]["list"], [])
+
+    def test_genre_counts_are_cached(self):
+        """测试类型计数接口命中缓存，条目变化后缓存失效"""
+        expected = [("Action", 1), ("Comedy", 1), ("Drama", 1)]
+        response = self.client.get("/api/genres")
+        self.assertEqual([(g["name"], g["count"]) for g in response.json()["data"]["genres"]], expected)
+        with self.assertNumQueries(0):
+            self.client.get("/api/genres")
+
+        Anime.objects.create(title="另一部剧情番", genres=["Drama"])
+        genres = self.client.get("/api/genres").json()["data"]["genres"]
+        self.assertEqual(genres[0]["name"], "Drama")
+        self.assertEqual(genres[0]["count"], 2)
+
+        self.drama.delete()
+        self.assertEqual(self.client.get("/api/genres").json()["data"]["genres"][0]["count"], 1)
+        self.assertEqual(self.client.post("/api/genres").status_code, 405)
+
+    def test_rebuild_command(self):
+        """测试绕过信号写入的数据可通过重建命令补齐关联"""
+        Anime.objects.filter(pk=self.plain.pk).update(genres=["Action"])
+        AnimeGenre.objects.filter(anime=self.drama).delete()
+        out = StringIO()
+        call_command("rebuild_genre_links", stdout=out)
+        self.assertIn("links=4", out.getvalue())
+        self.assertEqual(self._links(self.plain), ["Action"])
+        self.assertEqual(self._links(self.drama), ["Drama"])
+        self.assertEqual(Genre.objects.count(), 3)
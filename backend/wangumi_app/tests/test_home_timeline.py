@@ -0,0 +1,144 @@
+"""
+Tests for the home timeline.
+首页时间线：写扩散、读扩散合并、隐私过滤与关注变化。
+"""
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import (
+    Anime, PrivacySetting, TimelineEntry, UserFollow, UserProfile, WatchStatus
+)
+from wangumi_app.services.home_timeline import fan_out_activity, get_home_timeline, trim_timeline
+from wangumi_app.views.user_activities_view import create_activity
+
+
+class HomeTimelineTests(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='pass123')
+        self.actor = User.objects.create_user(username='actor', password='pass123')
+        self.stranger = User.objects.create_user(username='stranger', password='pass123')
+        for user in (self.reader, self.actor, self.stranger):
+            UserProfile.objects.create(user=user)
+        UserFollow.objects.create(follower=self.reader, following=self.actor)
+        self.anime = Anime.objects.create(title='Timeline Anime', title_cn='时间线番剧')
+        self.token = str(RefreshToken.for_user(self.reader).access_token)
+
+    def _watch(self, user, title='Timeline Anime'):
+        anime = Anime.objects.create(title=title, title_cn=title)
+        watch = WatchStatus.objects.create(user=user, anime=anime, status='WATCHING')
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_activity(user, watch, '新增追番')
+
+    def _timeline(self, **params):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.get('/api/home_timeline/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_create_activity_fans_out_to_followers(self):
+        """测试发布动态后写入关注者的时间线"""
+        activity = self._watch(self.actor)
+
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.reader, activity=activity).exists())
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.stranger).exists())
+
+        data = self._timeline()
+        self.assertEqual(len(data['list']), 1)
+        item = data['list'][0]
+        self.assertEqual(item['id'], activity.id)
+        self.assertEqual(item['target_title'], 'Timeline Anime')
+        self.assertEqual(item['user']['username'], 'actor')
+        self.assertFalse(data['pagination']['has_more'])
+
+    def test_self_privacy_is_not_fanned_out(self):
+        """测试仅自己可见的动态不写扩散"""
+        PrivacySetting.objects.create(user=self.actor, activities='self')
+        self._watch(self.actor)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_mutual_privacy_requires_follow_back(self):
+        """测试互关可见的动态只推送给互相关注的人"""
+        PrivacySetting.objects.create(user=self.actor, activities='mutual')
+        UserFollow.objects.create(follower=self.stranger, following=self.actor)
+        UserFollow.objects.create(follower=self.actor, following=self.stranger)
+
+        self._watch(self.actor)
+
+        owners = set(TimelineEntry.objects.values_list('owner_id', flat=True))
+        self.assertEqual(owners, {self.stranger.id})
+
+    def test_privacy_change_hides_existing_entries(self):
+        """测试发布后改为仅自己可见，时间线读取时被过滤"""
+        self._watch(self.actor)
+        PrivacySetting.objects.create(user=self.actor, activities='self')
+
+        self.assertEqual(self._timeline()['list'], [])
+
+    @override_settings(TIMELINE_FANOUT_FOLLOWER_LIMIT=1)
+    def test_high_follower_accounts_are_merged_on_read(self):
+        """测试粉丝数超过阈值的用户不写扩散，读取时合并"""
+        UserFollow.objects.create(follower=self.stranger, following=self.actor)
+        other = User.objects.create_user(username='other', password='pass123')
+        UserFollow.objects.create(follower=self.reader, following=other)
+
+        first = self._watch(other, 'Pushed Anime')
+        second = self._watch(self.actor, 'Pulled Anime')
+
+        self.assertFalse(TimelineEntry.objects.filter(activity=second).exists())
+        self.assertTrue(TimelineEntry.objects.filter(activity=first).exists())
+
+        activities, has_more = get_home_timeline(self.reader, 1, 10)
+        self.assertEqual([a.id for a in activities], [second.id, first.id])
+        self.assertFalse(has_more)
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        """测试关注时补齐最近动态，取消关注时移除"""
+        activity = self._watch(self.stranger)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+        self.client.post(f'/api/users/{self.stranger.id}/follow')
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.reader, activity=activity).exists())
+
+        self.client.delete(f'/api/users/{self.stranger.id}/unfollow')
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.reader, actor=self.stranger).exists())
+
+    def test_pagination(self):
+        """测试分页与 has_more"""
+        created = [self._watch(self.actor, f'Anime {index}') for index in range(3)]
+
+        first = self._timeline(limit=2)
+        self.assertEqual([item['id'] for item in first['list']], [created[2].id, created[1].id])
+        self.assertTrue(first['pagination']['has_more'])
+
+        second = self._timeline(limit=2, page=2)
+        self.assertEqual([item['id'] for item in second['list']], [created[0].id])
+        self.assertFalse(second['pagination']['has_more'])
+
+    @override_settings(TIMELINE_MAX_ENTRIES=2)
+    def test_timeline_is_capped(self):
+        """测试写扩散后裁剪超过上限的最旧条目，读取时间线不再执行删除"""
+        created = [self._watch(self.actor, f'Anime {index}') for index in range(4)]
+
+        remaining = set(TimelineEntry.objects.filter(owner=self.reader).values_list('activity_id', flat=True))
+        self.assertEqual(remaining, {created[3].id, created[2].id})
+        self.assertEqual(trim_timeline(self.reader.id), 0)
+
+        with CaptureQueriesContext(connection) as context:
+            self._timeline()
+        self.assertFalse(any(query['sql'].startswith('DELETE') for query in context.captured_queries))
+
+    def test_fan_out_is_idempotent(self):
+        """测试重复写扩散不会产生重复条目"""
+        activity = self._watch(self.actor)
+        fan_out_activity(activity)
+        self.assertEqual(TimelineEntry.objects.filter(activity=activity).count(), 1)
+
+    def test_invalid_pagination(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.get('/api/home_timeline/', {'page': 0})
+        self.assertEqual(response.status_code, 400)
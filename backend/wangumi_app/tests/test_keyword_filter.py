@@ -0,0 +1,155 @@
+"""
+Tests for the Aho-Corasick keyword filter.
+关键词过滤：自动机匹配、拒绝/打码/标记三种处理、词表热更新与管理接口。
+"""
+
+import json
+import random
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import Anime, Comment, FilterKeyword, KeywordFlag, Reply
+from wangumi_app.services.keyword_filter import (
+    KeywordAutomaton, naive_find, reset_local_automaton, screen_text
+)
+
+
+class KeywordAutomatonTests(TestCase):
+    def test_overlapping_matches(self):
+        """测试经典重叠模式：一次扫描找出全部命中"""
+        automaton = KeywordAutomaton((word, "BLOCK") for word in ["he", "she", "his", "hers"])
+        found = sorted((m.start, m.word) for m in automaton.find("ushers"))
+        self.assertEqual(found, [(1, "she"), (2, "he"), (2, "hers")])
+
+    def test_folding_and_masking(self):
+        """测试大小写与全角归一化，打码保持原文长度"""
+        automaton = KeywordAutomaton([("ＶＰＮ", "MASK"), ("剧透", "FLAG")])
+        result = automaton.screen("推荐个Vpn，顺便剧透一下结局")
+        self.assertEqual(result.masked_text, "推荐个***，顺便剧透一下结局")
+        self.assertTrue(result.flagged)
+        self.assertFalse(result.blocked)
+        self.assertEqual(result.words("FLAG"), ["剧透"])
+
+    def test_agrees_with_naive_search(self):
+        rng = random.Random(7)
+        alphabet = "abc测试番剧"
+        keywords = list({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)})
+        automaton = KeywordAutomaton((word, "BLOCK") for word in keywords)
+        for _ in range(50):
+            text = "".join(rng.choice(alphabet) for _ in range(40))
+            self.assertEqual(
+                sorted((m.start, m.word) for m in automaton.find(text)),
+                sorted(naive_find(keywords, text)),
+            )
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_keyword_filter", patterns=500, texts=10, length=50, stdout=out, stderr=out)
+        self.assertIn("加速比", out.getvalue())
+
+
+@override_settings(KEYWORD_FILTER_CHECK_SECONDS=0, RATE_LIMITS={"comment_post": {"limit": 100}})
+class KeywordScreeningTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_local_automaton()
+        self.addCleanup(reset_local_automaton)
+        self.admin = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.user = User.objects.create_user(username="poster", password="pass123")
+        self.anime = Anime.objects.create(title="测试番剧")
+        self.user_auth = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        self.admin_auth = f"Bearer {RefreshToken.for_user(self.admin).access_token}"
+        self._add_words(["违禁词"], "BLOCK")
+        self._add_words(["代购"], "MASK")
+        self._add_words(["主角死了"], "FLAG")
+
+    def _add_words(self, words, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/admin/keywords/", data=json.dumps({"words": words, "action": action}),
+                content_type="application/json", HTTP_AUTHORIZATION=self.admin_auth,
+            )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["data"]
+
+    def _comment(self, content):
+        return self.client.post(
+            "/api/comments/",
+            data=json.dumps({"scope": "ANIME", "object_id": self.anime.id, "score": 8, "content": content}),
+            content_type="application/json", HTTP_AUTHORIZATION=self.user_auth,
+        )
+
+    def test_block_mask_and_flag(self):
+        """测试违禁词拒绝发布、打码词替换、剧透词标记待审核"""
+        response = self._comment("这里有违禁词")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Comment.objects.exists())
+
+        self.assertEqual(self._comment("找我代购周边，听说主角死了").status_code, 201)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.content, "找我**周边，听说主角死了")
+        self.assertEqual(KeywordFlag.objects.get().keywords, ["主角死了"])
+
+        flags = self.client.get("/api/admin/keywords/flags/", HTTP_AUTHORIZATION=self.admin_auth).json()["data"]["flags"]
+        self.assertEqual(flags[0]["target_id"], comment.id)
+
+        # 修改评论去掉剧透后，待复核记录随之清除
+        response = self.client.put(
+            "/api/comments/",
+            data=json.dumps({"comment_id": comment.id, "content": "正常评论"}),
+            content_type="application/json", HTTP_AUTHORIZATION=self.user_auth,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(KeywordFlag.objects.exists())
+
+    def test_clean_new_posts_skip_flag_cleanup(self):
+        """测试新发布的正常评论与回复不会为清理待审核记录多执行一次删除"""
+        flag_table = KeywordFlag._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            self._comment("正常评论")
+            self.client.post(
+                f"/api/comments/{Comment.objects.get().id}/replies/",
+                data=json.dumps({"content": "正常回复"}),
+                content_type="application/json", HTTP_AUTHORIZATION=self.user_auth,
+            )
+        self.assertEqual(Reply.objects.count(), 1)
+        self.assertFalse([q for q in context.captured_queries if flag_table in q["sql"]])
+
+    def test_reply_is_screened(self):
+        self._comment("正常评论")
+        response = self.client.post(
+            f"/api/comments/{Comment.objects.get().id}/replies/",
+            data=json.dumps({"content": "违禁词！"}),
+            content_type="application/json", HTTP_AUTHORIZATION=self.user_auth,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Reply.objects.exists())
+
+    def test_word_list_changes_hot_reload(self):
+        """测试词表变更后通过共享版本号触发重建，删除关键词后立即放行"""
+        self.assertEqual(screen_text("新词").matches, [])
+        self.assertEqual(self._add_words(["新词", "违禁词"], "BLOCK"), {"created": 1, "skipped": ["违禁词"]})
+        self.assertTrue(screen_text("新词").blocked)
+
+        keyword = FilterKeyword.objects.get(word="新词")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/admin/keywords/{keyword.id}/", HTTP_AUTHORIZATION=self.admin_auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(screen_text("新词").blocked)
+
+    @override_settings(KEYWORD_FILTER_CHECK_SECONDS=60)
+    def test_version_is_checked_at_most_once_per_interval(self):
+        screen_text("预热")
+        with self.captureOnCommitCallbacks(execute=True):
+            FilterKeyword.objects.create(word="延迟词")
+        self.assertFalse(screen_text("延迟词").blocked)
+        with patch("wangumi_app.services.keyword_filter.time.monotonic", return_value=10 ** 9):
+            self.assertTrue(screen_text("延迟词").blocked)
@@ -3,12 +3,15 @@ Tests for login and logout API views.
 测试登录和登出API接口的功能，包括refresh token黑名单机制。
 """
 
+from unittest.mock import patch
+
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 
 from wangumi_app.models import UserProfile
+from wangumi_app.services.token_versions import bump_token_version
 
 
 class LoginViewTests(APITestCase):
@@ -224,16 +227,17 @@ class LogoutAllViewTests(APITestCase):
         """测试成功登出所有设备"""
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
 
-        response = self.client.post(self.logout_all_url, {}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.logout_all_url, {}, format='json')
 
         self.assertEqual(response.status_code, 200)
         response_data = response.json()
         self.assertEqual(response_data['code'], 0)
         self.assertIn('message', response_data)
 
-        # 验证用户的last_login已更新
-        self.user.refresh_from_db()
-        self.assertIsNotNone(self.user.last_login)
+        # 验证之前签发的 access token 已全部失效
+        response = self.client.post(self.logout_all_url, {}, format='json')
+        self.assertEqual(response.status_code, 401)
 
     def test_logout_all_without_authentication(self):
         """测试未认证的登出所有设备请求"""
@@ -363,4 +367,83 @@ class LoginLogoutIntegrationTests(APITestCase):
         # 6. 清除认证头，重新登录应该成功
         self.client.credentials()
         new_login_response = self.client.post('/api/login/', credentials, format='json')
-        self.assertEqual(new_login_response.status_code, 200)
\ No newline at end of file
+        self.assertEqual(new_login_response.status_code, 200)
+
+
+class TokenVersionTests(APITestCase):
+    """令牌版本号：登出所有设备与封禁立即吊销所有令牌"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='versioned', password='testpass123')
+        self.admin = User.objects.create_user(username='version_admin', password='testpass123', is_staff=True)
+        UserProfile.objects.create(user=self.user)
+
+    def _login(self, username='versioned'):
+        response = self.client.post('/api/login/', {'username': username, 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_login_embeds_token_version(self):
+        """测试登录签发的令牌带有当前版本号"""
+        bump_token_version(self.user.id)
+        tokens = self._login()
+        self.assertEqual(AccessToken(tokens['access'])['ver'], 1)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get('/api/user/profile').status_code, 200)
+
+    def test_logout_all_revokes_refreshed_tokens(self):
+        """测试登出所有设备后旧令牌刷新得到的 access token 也无法使用"""
+        tokens = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/api/logout-all/', {}, format='json').status_code, 200)
+
+        self.client.credentials()
+        refreshed = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(refreshed.status_code, 401)
+
+        # 重新登录获得新版本的令牌
+        new_tokens = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {new_tokens['access']}")
+        self.assertEqual(self.client.get('/api/user/profile').status_code, 200)
+
+    def test_ban_revokes_tokens(self):
+        """测试封禁后令牌失效，解封后旧令牌仍不可用"""
+        user_access = self._login()['access']
+        admin_access = self._login('version_admin')['access']
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {admin_access}')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/admin/users/{self.user.id}/ban/', {'reason': 'spam'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(f'/api/admin/users/{self.user.id}/unban/', {'reason': 'ok'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {user_access}')
+        self.assertEqual(self.client.get('/api/user/profile').status_code, 401)
+
+    def test_rolled_back_ban_keeps_tokens_valid(self):
+        """测试封禁事务回滚时不会把新版本号写入缓存，原令牌仍可使用"""
+        user_access = self._login()['access']
+        admin_access = self._login('version_admin')['access']
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {admin_access}')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, \
+                patch('wangumi_app.views.user_admin_views.UserBanLog.objects.create', side_effect=RuntimeError):
+            response = self.client.post(f'/api/admin/users/{self.user.id}/ban/', {'reason': 'spam'}, format='json')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(UserProfile.objects.get(user=self.user).token_version, 0)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {user_access}')
+        self.assertEqual(self.client.get('/api/user/profile').status_code, 200)
+
+    def test_authenticated_user_is_cached(self):
+        """测试认证用户按 ID 缓存，第二次请求不再查询 User 表"""
+        access = self._login()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.client.get('/api/user/profile')
+
+        with self.assertNumQueries(1):  # 只剩 Profile 查询
+            self.assertEqual(self.client.get('/api/user/profile').status_code, 200)
@@ -0,0 +1,145 @@
+"""
+Tests for the grouped moderation queue.
+审核队列：按被举报对象聚合、优先级排序、领取租约以及一次性处理全部举报。
+"""
+
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import AdminLog, Anime, Comment, ModerationTarget, Report
+from wangumi_app.services.moderation_queue import claim_targets, priority_score
+
+
+class ModerationQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.other_admin = User.objects.create_user(username="admin2", password="pass123", is_staff=True)
+        self.author = User.objects.create_user(username="author", password="pass123")
+        self.reporters = [User.objects.create_user(username=f"reporter{i}", password="pass123") for i in range(6)]
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.admin).access_token}"
+
+        self.anime = Anime.objects.create(title="测试番剧", created_by=self.author)
+        anime_type = ContentType.objects.get_for_model(Anime)
+        self.spam = Comment.objects.create(
+            content_type=anime_type, object_id=self.anime.id, user=self.author, score=1, content="广告"
+        )
+        self.abuse = Comment.objects.create(
+            content_type=anime_type, object_id=self.anime.id, user=self.author, score=1, content="骂人"
+        )
+
+    def _report(self, target, category, reporters):
+        for reporter in reporters:
+            Report.objects.create(
+                reporter=reporter, content_type=ContentType.objects.get_for_model(target),
+                object_id=target.pk, category=category,
+            )
+        return ModerationTarget.objects.get(
+            content_type=ContentType.objects.get_for_model(target), object_id=target.pk
+        )
+
+    def test_reports_grouped_per_target(self):
+        """测试同一对象的多条举报聚合为一个队列项"""
+        target = self._report(self.spam, "SPAM", self.reporters[:5])
+        self._report(self.spam, "OTHER", self.reporters[5:])
+        target.refresh_from_db()
+        self.assertEqual(ModerationTarget.objects.count(), 1)
+        self.assertEqual((target.report_count, target.pending_count), (6, 6))
+        self.assertEqual(target.categories, {"SPAM": 5, "OTHER": 1})
+        self.assertEqual(target.priority, priority_score({"SPAM": 5, "OTHER": 1}))
+
+    def test_queue_ordered_by_priority(self):
+        """测试严重分类的少量举报排在大量垃圾广告举报之前"""
+        self._report(self.spam, "SPAM", self.reporters[:3])
+        self._report(self.abuse, "HARASSMENT", self.reporters[:2])
+
+        data = self.client.get("/api/admin/moderation/queue/").json()["data"]
+        self.assertEqual([row["target_id"] for row in data["targets"]], [self.abuse.id, self.spam.id])
+        self.assertEqual(data["targets"][0]["target_preview"], "骂人")
+        self.assertEqual(data["stats"]["open_count"], 2)
+
+    def test_claim_skips_live_leases(self):
+        """测试已被领取的对象不会再分给其他管理员，租约过期后可重新领取"""
+        abuse = self._report(self.abuse, "HARASSMENT", self.reporters[:2])
+        spam = self._report(self.spam, "SPAM", self.reporters[:1])
+
+        self.assertEqual([t.pk for t in claim_targets(self.other_admin, 1)], [abuse.pk])
+        response = self.client.post(
+            "/api/admin/moderation/queue/claim/", data=json.dumps({"limit": 5}), content_type="application/json"
+        )
+        self.assertEqual([row["id"] for row in response.json()["data"]["targets"]], [spam.pk])
+
+        ModerationTarget.objects.filter(pk=abuse.pk).update(lease_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([t.pk for t in claim_targets(self.admin, 5)], [abuse.pk, spam.pk])
+
+    def test_resolve_closes_all_reports(self):
+        """测试一次处理关闭该对象全部待处理举报，隐藏内容并写操作日志"""
+        target = self._report(self.spam, "SPAM", self.reporters)
+        response = self.client.post(
+            f"/api/admin/moderation/queue/{target.pk}/resolve/",
+            data=json.dumps({"action": "RESOLVED", "resolution": "广告", "hide_content": True}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual((data["reports_closed"], data["content_hidden"]), (6, True))
+        self.assertFalse(Report.objects.filter(status="PENDING").exists())
+        self.spam.refresh_from_db()
+        self.assertTrue(self.spam.is_banned)
+        target.refresh_from_db()
+        self.assertEqual((target.status, target.pending_count, target.priority), ("RESOLVED", 0, 0))
+        self.assertEqual(AdminLog.objects.get().target_object_id, self.spam.id)
+
+        # 新举报会重新打开该对象
+        Report.objects.create(
+            reporter=self.author, content_type=ContentType.objects.get_for_model(Comment),
+            object_id=self.spam.id, category="SPAM",
+        )
+        target.refresh_from_db()
+        self.assertEqual((target.status, target.pending_count, target.report_count), ("OPEN", 1, 7))
+
+    def test_resolve_conflicts_with_other_lease(self):
+        target = self._report(self.abuse, "HARASSMENT", self.reporters[:1])
+        claim_targets(self.other_admin, 1)
+        response = self.client.post(
+            f"/api/admin/moderation/queue/{target.pk}/resolve/",
+            data=json.dumps({"action": "REJECTED"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(Report.objects.filter(status="PENDING").exists())
+
+    def test_action_endpoints_only_accept_post(self):
+        """测试领取与处理接口不响应 GET（不会返回举报列表或 500）"""
+        target = self._report(self.spam, "SPAM", self.reporters[:1])
+        self.assertEqual(self.client.get("/api/admin/moderation/queue/claim/").status_code, 405)
+        self.assertEqual(self.client.get(f"/api/admin/moderation/queue/{target.pk}/resolve/").status_code, 405)
+
+    def test_single_report_handling_updates_target(self):
+        """测试逐条处理举报后队列项随之关闭"""
+        target = self._report(self.spam, "SPAM", self.reporters[:1])
+        report = Report.objects.get()
+        response = self.client.post(
+            f"/api/admin/reports/{report.id}/handle/",
+            data=json.dumps({"action": "REJECTED"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        target.refresh_from_db()
+        self.assertEqual((target.status, target.pending_count), ("REJECTED", 0))
+
+    def test_rebuild_command(self):
+        self._report(self.spam, "SPAM", self.reporters[:2])
+        ModerationTarget.objects.all().delete()
+        call_command("rebuild_moderation_queue", stdout=StringIO())
+        target = ModerationTarget.objects.get()
+        self.assertEqual((target.object_id, target.pending_count), (self.spam.id, 2))
@@ -0,0 +1,134 @@
+"""
+Tests for the per-user moderation stats.
+用户内容/举报统计：信号维护、校正命令，以及管理后台用户列表的查询次数。
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import Anime, Comment, Reply, Report, UserBanLog, UserModerationStats, UserProfile
+from wangumi_app.services.moderation_stats import compute_stats
+
+
+def _stats(user):
+    stats = UserModerationStats.objects.get(user=user)
+    return {
+        "comments": stats.comments,
+        "replies": stats.replies,
+        "items_created": stats.items_created,
+        "reports_filed": stats.reports_filed,
+        "reports_received": stats.reports_received,
+    }
+
+
+class ModerationStatsSignalTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass123")
+        self.reporter = User.objects.create_user(username="reporter", password="pass123")
+        self.anime = Anime.objects.create(title="测试番剧", created_by=self.author)
+        self.comment = Comment.objects.create(
+            content_type=ContentType.objects.get_for_model(Anime), object_id=self.anime.id,
+            user=self.author, score=8, content="评论",
+        )
+        self.reply = Reply.objects.create(review=self.comment, user=self.author, content="回复")
+
+    def _report(self, target):
+        return Report.objects.create(
+            reporter=self.reporter, content_type=ContentType.objects.get_for_model(target),
+            object_id=target.pk, category="SPAM",
+        )
+
+    def test_counts_follow_writes(self):
+        """测试新增内容与举报后统计与源表一致"""
+        self._report(self.comment)
+        self._report(self.reply)
+        self._report(self.anime)
+        self.assertEqual(_stats(self.author), compute_stats(self.author.id))
+        self.assertEqual(_stats(self.author)["reports_received"], 3)
+        self.assertEqual(_stats(self.reporter)["reports_filed"], 3)
+
+    def test_counts_follow_deletes(self):
+        """测试删除内容或举报后扣减计数，删除评论同时扣减其回复"""
+        report = self._report(self.reply)
+        self._report(self.comment)
+        report.delete()
+        self.comment.delete()
+        self.assertEqual(
+            _stats(self.author),
+            {"comments": 0, "replies": 0, "items_created": 1, "reports_filed": 0, "reports_received": 0},
+        )
+        self.assertEqual(_stats(self.author), compute_stats(self.author.id))
+        self.assertEqual(_stats(self.reporter)["reports_filed"], 1)
+
+    def test_deleting_user_cascades_cleanly(self):
+        """测试删除用户时级联删除不会重建统计行，被举报人的计数同步扣减"""
+        self._report(self.comment)
+        self.reporter.delete()
+        self.assertEqual(_stats(self.author)["reports_received"], 0)
+        self.author.delete()
+        self.assertFalse(UserModerationStats.objects.exists())
+
+    def test_reconcile_fixes_drift(self):
+        UserModerationStats.objects.filter(user=self.author).update(comments=9, reports_received=4)
+        UserModerationStats.objects.filter(user=self.reporter).delete()
+        self._report(self.anime)
+        call_command("reconcile_moderation_stats", stdout=StringIO())
+        self.assertEqual(_stats(self.author), compute_stats(self.author.id))
+        self.assertEqual(_stats(self.reporter), compute_stats(self.reporter.id))
+
+
+class AdminUserListQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.admin).access_token}"
+
+    def _add_users(self, start, count):
+        for index in range(start, start + count):
+            user = User.objects.create_user(username=f"user{index}", password="pass123", is_active=index % 2 == 0)
+            UserProfile.objects.create(user=user, nickname=f"用户{index}")
+            Comment.objects.create(
+                content_type=ContentType.objects.get_for_model(User), object_id=user.id,
+                user=user, score=5, content="评论",
+            )
+            if not user.is_active:
+                UserBanLog.objects.create(user=user, action="BAN", reason=f"理由{index}", operated_by=self.admin)
+
+    def _list_queries(self):
+        self.client.get("/api/admin/users/")  # 预热认证缓存
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/admin/users/")
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()["data"]["users"]
+
+    def test_query_count_does_not_grow_with_page(self):
+        """测试用户列表的查询次数与本页用户数无关"""
+        self._add_users(0, 2)
+        small, _ = self._list_queries()
+        self._add_users(2, 10)
+        large, users = self._list_queries()
+        self.assertEqual(small, large)
+
+        banned = next(user for user in users if user["username"] == "user3")
+        self.assertEqual(banned["recent_ban_info"]["reason"], "理由3")
+        self.assertEqual(banned["stats"], {"total_comments": 1, "total_replies": 0, "animes_created": 0})
+        self.assertEqual(banned["profile"]["nickname"], "用户3")
+
+    def test_missing_stats_read_as_zeros(self):
+        """测试新用户自带统计行；缺失统计行的旧用户在列表里按零展示，读请求不补算也不建行"""
+        user = User.objects.create_user(username="newcomer", password="pass123")
+        self.assertEqual(_stats(user)["comments"], 0)
+        UserModerationStats.objects.filter(user=user).delete()
+
+        _, users = self._list_queries()
+        listed = next(item for item in users if item["username"] == "newcomer")
+        self.assertEqual(listed["stats"], {"total_comments": 0, "total_replies": 0, "animes_created": 0})
+        self.assertFalse(UserModerationStats.objects.filter(user=user).exists())
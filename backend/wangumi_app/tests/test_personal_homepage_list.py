@@ -208,6 +208,21 @@ class UserFollowingListViewTests(APITestCase):
         self.assertEqual(response.status_code, 200)
 
 
+    def test_following_list_with_relationship(self):
+        """测试 with_relationship 内嵌当前用户与列表用户的关注关系"""
+        url = f'/api/personal_homepage_following_list/{self.user1.id}'
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+        response = self.client.get(url, {'with_relationship': 1})
+        self.assertEqual(response.status_code, 200)
+        relationships = {item['id']: item['relationship'] for item in response.json()['results']}
+        self.assertEqual(relationships[self.user5.id], {'following': True, 'followed_by': True, 'mutual': True})
+        self.assertEqual(relationships[self.user2.id], {'following': True, 'followed_by': False, 'mutual': False})
+
+        # 默认不内嵌
+        response = self.client.get(url)
+        self.assertNotIn('relationship', response.json()['results'][0])
+
 class UserFollowerListViewTests(APITestCase):
     """用户粉丝列表API测试"""
 
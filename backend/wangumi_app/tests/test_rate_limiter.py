@@ -0,0 +1,116 @@
+"""
+Tests for the general rate limiter.
+滑动窗口与令牌桶限流：计数正确性、并发下不超限以及接口装饰器。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from wangumi_app.services.rate_limiter import hit, peek
+
+POLICIES = {
+    "test_window": {"algorithm": "sliding_window", "limit": 5, "window": 60},
+    "test_bucket": {"algorithm": "token_bucket", "limit": 5, "window": 10},
+    "test_contention_window": {"algorithm": "sliding_window", "limit": 50, "window": 3600},
+    "test_contention_bucket": {"algorithm": "token_bucket", "limit": 50, "window": 36000},
+}
+
+
+@override_settings(RATE_LIMITS=POLICIES)
+class RateLimiterAlgorithmTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sliding_window_limit(self):
+        """测试窗口内超过上限被拒绝，并给出重试时间"""
+        now = 6000.0
+        results = [hit("test_window", ["user:1"], now=now) for _ in range(6)]
+        self.assertTrue(all(result.allowed for result in results[:5]))
+        self.assertFalse(results[5].allowed)
+        self.assertGreater(results[5].retry_after, 0)
+        # 其他身份互不影响
+        self.assertTrue(hit("test_window", ["user:2"], now=now).allowed)
+
+    def test_sliding_window_weights_previous_window(self):
+        """测试上一窗口的计数按重叠比例计入"""
+        for _ in range(5):
+            hit("test_window", ["user:1"], now=6000.0)
+        # 下一窗口过去一半：上一窗口计 2.5 次，还能再请求 2 次
+        allowed = [hit("test_window", ["user:1"], now=6090.0).allowed for _ in range(3)]
+        self.assertEqual(allowed, [True, True, False])
+
+    def test_peek_does_not_count(self):
+        for _ in range(4):
+            hit("test_window", ["user:1"], now=6000.0)
+        for _ in range(3):
+            self.assertTrue(peek("test_window", ["user:1"], now=6000.0).allowed)
+        hit("test_window", ["user:1"], now=6000.0)
+        self.assertFalse(peek("test_window", ["user:1"], now=6000.0).allowed)
+
+    def test_multiple_identities_must_all_pass(self):
+        """测试多个身份一起检查，任一超限即拒绝"""
+        for _ in range(5):
+            hit("test_window", ["ip:1.1.1.1"], now=6000.0)
+        self.assertFalse(hit("test_window", ["user:1", "ip:1.1.1.1"], now=6000.0).allowed)
+
+    def test_token_bucket_burst_and_refill(self):
+        """测试令牌桶允许突发并按速率补充"""
+        allowed = [hit("test_bucket", ["user:1"], now=100.0).allowed for _ in range(6)]
+        self.assertEqual(allowed, [True] * 5 + [False])
+        # 速率为 0.5 个/秒，4 秒后补充 2 个
+        allowed = [hit("test_bucket", ["user:1"], now=104.0).allowed for _ in range(3)]
+        self.assertEqual(allowed, [True, True, False])
+
+    def test_token_bucket_rejection_takes_no_tokens(self):
+        """测试令牌桶多身份检查时，被后一个身份拒绝不会消耗前一个身份的令牌"""
+        for _ in range(5):
+            hit("test_bucket", ["user:1"], now=100.0)
+        for _ in range(3):
+            self.assertFalse(hit("test_bucket", ["ip:1.1.1.1", "user:1"], now=100.0).allowed)
+        allowed = [hit("test_bucket", ["ip:1.1.1.1"], now=100.0).allowed for _ in range(6)]
+        self.assertEqual(allowed, [True] * 5 + [False])
+
+    def test_no_overshoot_under_contention(self):
+        """测试大量线程并发请求时放行次数严格等于上限"""
+        for name in ("test_contention_window", "test_contention_bucket"):
+            with ThreadPoolExecutor(max_workers=32) as pool:
+                results = list(pool.map(lambda _: hit(name, ["user:1"], now=7200.0).allowed, range(320)))
+            self.assertEqual(sum(results), 50, name)
+
+
+class RateLimitedEndpointTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='limited', password='pass123')
+
+    def _login(self, password):
+        return self.client.post('/api/login/', {'username': 'limited', 'password': password}, format='json')
+
+    @override_settings(RATE_LIMITS={"login": {"limit": 3}})
+    def test_login_counts_only_failures(self):
+        """测试登录只统计失败次数，超过后连正确密码也被拒绝"""
+        for _ in range(5):
+            self.assertEqual(self._login('pass123').status_code, 200)
+        for _ in range(3):
+            self.assertEqual(self._login('wrong').status_code, 401)
+
+        response = self._login('pass123')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    @override_settings(RATE_LIMITS={"search": {"limit": 2}})
+    def test_search_returns_429(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/search/', {'query': ''}).status_code, 200)
+        response = self.client.get('/api/search/', {'query': ''})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['code'], 429)
+
+    @override_settings(RATE_LIMIT_ENABLED=False, RATE_LIMITS={"search": {"limit": 1}})
+    def test_can_be_disabled(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/search/', {'query': ''}).status_code, 200)
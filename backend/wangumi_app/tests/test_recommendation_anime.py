@@ -193,7 +193,7 @@ class RecommendationAPITest(TestCase):
         self.assertEqual(response1.json(), response2.json())
 
         # 验证缓存键存在
-        cache_key = f"recommend_{self.user.id}_None_1_20"
+        cache_key = f"recommend:{self.user.id}:None:1:20"
         cached_data = cache.get(cache_key)
         self.assertIsNotNone(cached_data)
 
@@ -118,6 +118,21 @@ class ReplyViewTests(TestCase):
         self.assertEqual(reply.content, "这是一条回复内容")
         self.assertEqual(reply.review, self.parent_comment)
 
+    def test_create_reply_increments_reply_count(self):
+        """测试创建回复会维护父评论的冗余回复数"""
+        client = self.get_authenticated_client(self.access_token2)
+
+        for content in ("第一条", "第二条"):
+            response = client.post(
+                f'/api/comments/{self.parent_comment.id}/replies/',
+                data=json.dumps({"content": content}),
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 201)
+
+        self.parent_comment.refresh_from_db()
+        self.assertEqual(self.parent_comment.reply_count, 2)
+
     def test_create_reply_empty_content(self):
         """测试创建空内容回复（应该失败）"""
         client = self.get_authenticated_client(self.access_token2)
@@ -0,0 +1,100 @@
+"""
+Tests for session and token invalidation.
+会话索引：登录写入、按用户失效与令牌批量拉黑。
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import UserProfile, UserSession
+from wangumi_app.services.session_security import (
+    index_existing_sessions, invalidate_user_sessions_and_tokens
+)
+
+
+class SessionInvalidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='session_user', password='pass123')
+        self.other = User.objects.create_user(username='session_other', password='pass123')
+        UserProfile.objects.create(user=self.user)
+
+    def _login(self, user):
+        client = Client()
+        self.assertTrue(client.login(username=user.username, password='pass123'))
+        return client.session.session_key
+
+    def test_login_indexes_session(self):
+        """测试登录时记录用户会话索引，退出时移除"""
+        client = Client()
+        client.login(username='session_user', password='pass123')
+        key = client.session.session_key
+        self.assertTrue(UserSession.objects.filter(user=self.user, session_key=key).exists())
+
+        client.logout()
+        self.assertFalse(UserSession.objects.filter(session_key=key).exists())
+
+    def test_login_drops_rows_of_gone_sessions(self):
+        """测试再次登录时删除该用户已不存在会话的索引（轮换 key 会删除旧会话）"""
+        old_key, other_key = self._login(self.user), self._login(self.other)
+        Session.objects.filter(session_key__in=[old_key, other_key]).delete()
+
+        new_key = self._login(self.user)
+
+        self.assertEqual(
+            list(UserSession.objects.filter(user=self.user).values_list('session_key', flat=True)), [new_key]
+        )
+        self.assertTrue(UserSession.objects.filter(session_key=other_key).exists())
+
+    def test_clear_command_prunes_expired_rows(self):
+        """测试清理命令删除过期会话及其索引，保留有效会话"""
+        expired, live = self._login(self.user), self._login(self.other)
+        Session.objects.filter(session_key=expired).update(expire_date=timezone.now() - timedelta(days=1))
+
+        out = StringIO()
+        call_command('clear_user_sessions', stdout=out)
+
+        self.assertIn('deleted=1', out.getvalue())
+        self.assertFalse(UserSession.objects.filter(session_key=expired).exists())
+        self.assertTrue(UserSession.objects.filter(session_key=live).exists())
+
+    def test_invalidation_only_touches_the_users_sessions(self):
+        """测试失效只删除该用户的会话，不扫描全站会话"""
+        keys = [self._login(self.user), self._login(self.user)]
+        other_key = self._login(self.other)
+
+        # 令牌版本自增并读回 + 按索引删除会话 + 删除索引 + 查询未拉黑的令牌（没有令牌时不写入）
+        with self.assertNumQueries(5):
+            invalidate_user_sessions_and_tokens(self.user)
+
+        self.assertFalse(Session.objects.filter(session_key__in=keys).exists())
+        self.assertFalse(UserSession.objects.filter(user=self.user).exists())
+        self.assertTrue(Session.objects.filter(session_key=other_key).exists())
+
+    def test_tokens_are_blacklisted_in_bulk(self):
+        """测试刷新令牌批量拉黑，重复执行不报错"""
+        for _ in range(3):
+            RefreshToken.for_user(self.user)
+        RefreshToken.for_user(self.other)
+
+        invalidate_user_sessions_and_tokens(self.user)
+        invalidate_user_sessions_and_tokens(self.user)
+
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.user).count(), 3)
+        self.assertFalse(BlacklistedToken.objects.filter(token__user=self.other).exists())
+        self.assertEqual(OutstandingToken.objects.filter(user=self.user).count(), 3)
+
+    def test_index_existing_sessions(self):
+        """测试为旧会话补建索引"""
+        key = self._login(self.user)
+        UserSession.objects.all().delete()
+
+        self.assertEqual(index_existing_sessions(), 1)
+        self.assertTrue(UserSession.objects.filter(user=self.user, session_key=key).exists())
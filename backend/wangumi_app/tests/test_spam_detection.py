@@ -0,0 +1,106 @@
+"""
+Tests for near-duplicate comment detection.
+近似重复内容检测：SimHash 指纹、分段索引查找、自动标记、重复发布限流与管理员内容簇接口。
+"""
+
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import Anime, Comment, ContentFingerprint
+from wangumi_app.services.spam_detection import find_near_duplicates, hamming, normalize_text, simhash
+
+SPAM = "限时福利！加群123456领取全套高清资源，先到先得，错过再等一年"
+SPAM_VARIANTS = [
+    "限时福利!!加群123456领取全套高清资源，先到先得，错过再等一年~",
+    "限时福利！加群 123456 领取全套高清资源 先到先得 错过再等一年",
+    "【限时福利】加群123456领取全套高清资源，先到先得，错过再等一年",
+]
+
+
+class SimHashTests(TestCase):
+    def test_variants_are_close_and_unrelated_text_is_far(self):
+        """测试标点、空白与全角的改动不影响指纹，不同内容的指纹相距很远"""
+        self.assertEqual(normalize_text("Ｈｅｌｌｏ， World！"), "helloworld")
+        base = simhash(SPAM)
+        for variant in SPAM_VARIANTS:
+            self.assertLessEqual(hamming(base, simhash(variant)), 3)
+        self.assertGreater(hamming(base, simhash("作画稳定，配乐出色，最后两集的节奏把控非常好")), 10)
+
+    def test_short_text_is_not_fingerprinted(self):
+        self.assertIsNone(simhash("好看！"))
+        self.assertFalse(find_near_duplicates("好看！").is_duplicate)
+
+
+@override_settings(RATE_LIMITS={"comment_post": {"limit": 100}})
+class NearDuplicatePostTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username="admin", password="pass123", is_staff=True)
+        self.spammers = [User.objects.create_user(username=f"spammer{i}", password="pass123") for i in range(3)]
+        self.animes = [Anime.objects.create(title=f"番剧{i}") for i in range(4)]
+
+    def _comment(self, user, anime, content):
+        return self.client.post(
+            "/api/comments/",
+            data=json.dumps({"scope": "ANIME", "object_id": anime.id, "score": 1, "content": content}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}",
+        )
+
+    def test_spam_wave_is_clustered_and_flagged(self):
+        """测试不同用户在不同番剧下发布的相似内容聚成一簇，达到阈值后自动标记"""
+        self.assertEqual(self._comment(self.spammers[0], self.animes[0], SPAM).status_code, 201)
+        self.assertEqual(self._comment(self.spammers[1], self.animes[1], SPAM_VARIANTS[0]).status_code, 201)
+        self.assertFalse(ContentFingerprint.objects.filter(flagged=True).exists())
+        self.assertEqual(self._comment(self.spammers[2], self.animes[2], SPAM_VARIANTS[1]).status_code, 201)
+        self._comment(self.admin, self.animes[0], "作画稳定，配乐出色，最后两集的节奏把控非常好")
+
+        flagged = ContentFingerprint.objects.filter(flagged=True)
+        self.assertEqual(flagged.count(), 3)
+        self.assertEqual(len({row.cluster_id for row in flagged}), 1)
+        self.assertFalse(ContentFingerprint.objects.get(user=self.admin).flagged)
+
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.admin).access_token}"
+        clusters = self.client.get("/api/admin/spam/clusters/").json()["data"]["clusters"]
+        self.assertEqual([(c["size"], c["user_count"]) for c in clusters], [(3, 3)])
+        self.assertTrue(clusters[0]["sample_preview"].startswith("限时福利"))
+
+        detail = self.client.get(f"/api/admin/spam/clusters/{clusters[0]['cluster_id']}/").json()["data"]
+        self.assertEqual(
+            sorted(detail["comment_ids"]),
+            sorted(Comment.objects.filter(user__in=self.spammers).values_list("id", flat=True)),
+        )
+        self.assertEqual(detail["user_ids"], sorted(user.id for user in self.spammers))
+
+    @override_settings(RATE_LIMITS={"comment_post": {"limit": 100}, "duplicate_post": {"limit": 2}})
+    def test_repeated_duplicates_are_rate_limited(self):
+        """测试同一用户反复发布相似内容被限流，正常评论不受影响"""
+        spammer = self.spammers[0]
+        statuses = [
+            self._comment(spammer, anime, content).status_code
+            for anime, content in zip(self.animes, [SPAM] + SPAM_VARIANTS)
+        ]
+        self.assertEqual(statuses, [201, 201, 201, 429])
+        self.assertEqual(Comment.objects.filter(user=spammer).count(), 3)
+
+    def test_deleted_comment_drops_fingerprint(self):
+        self._comment(self.spammers[0], self.animes[0], SPAM)
+        Comment.objects.get().delete()
+        self.assertFalse(ContentFingerprint.objects.exists())
+        self.assertFalse(find_near_duplicates(SPAM_VARIANTS[0]).is_duplicate)
+
+    def test_reply_is_checked(self):
+        self._comment(self.spammers[0], self.animes[0], SPAM)
+        comment = Comment.objects.get()
+        response = self.client.post(
+            f"/api/comments/{comment.id}/replies/",
+            data=json.dumps({"content": SPAM_VARIANTS[2]}),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.spammers[1]).access_token}",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ContentFingerprint.objects.values("cluster_id").distinct().count(), 1)
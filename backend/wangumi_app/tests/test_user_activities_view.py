@@ -10,9 +10,13 @@ from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 from datetime import datetime, timedelta
 
+from django.core.management import call_command
+from io import StringIO
+
 from wangumi_app.models import (
-    UserProfile, UserFollow, Anime, WatchStatus, Comment, Activity, PrivacySetting
+    UserProfile, UserFollow, Anime, Episode, WatchStatus, Comment, Like, Activity, PrivacySetting
 )
+from wangumi_app.views.user_activities_view import create_activity
 
 
 class UserActivityViewTests(APITestCase):
@@ -477,4 +481,97 @@ class ActivityPrivacyIntegrationTests(APITestCase):
         # 这个用户应该不能访问（因为不是互相关注）
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {follower_token}')
         response = self.client.get(url)
-        self.assertEqual(response.status_code, 403)
\ No newline at end of file
+        self.assertEqual(response.status_code, 403)
+
+
+class ActivityPayloadTests(APITestCase):
+    """动态展示快照测试"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='payload_owner', password='pass123')
+        UserProfile.objects.create(user=self.owner)
+        self.token = str(RefreshToken.for_user(self.owner).access_token)
+        self.anime = Anime.objects.create(
+            title='Payload Anime', title_cn='快照番剧', cover_url='https://img.example.com/cover.jpg'
+        )
+        self.episode = Episode.objects.create(anime=self.anime, episode_number=1, title='EP1')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def _list(self):
+        response = self.client.get('/api/user_activities/', {'user_id': self.owner.id})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']['list']
+
+    def test_create_activity_snapshots_payload(self):
+        """测试创建动态时写入展示快照"""
+        comment = Comment.objects.create(
+            user=self.owner, content_type=ContentType.objects.get_for_model(Episode),
+            object_id=self.episode.id, score=9, content='这一集很精彩', scope='EPISODE'
+        )
+        activity = create_activity(self.owner, comment, '创建了评论')
+
+        self.assertEqual(activity.payload, {
+            'title': 'Payload Anime - EP1',
+            'scope': 'EPISODE',
+            'thumbnail': 'https://img.example.com/cover.jpg',
+            'excerpt': '这一集很精彩',
+        })
+
+    def test_feed_survives_target_deletion(self):
+        """测试目标删除后动态仍展示快照标题"""
+        watch = WatchStatus.objects.create(user=self.owner, anime=self.anime, status='WATCHING')
+        create_activity(self.owner, watch, '新增追番')
+        watch.delete()
+
+        item = self._list()[0]
+        self.assertEqual(item['target_title'], 'Payload Anime')
+        self.assertEqual(item['thumbnail'], 'https://img.example.com/cover.jpg')
+
+    def test_feed_with_payloads_does_not_touch_targets(self):
+        """测试全部带快照时读取动态不再查询目标对象"""
+        for index in range(5):
+            anime = Anime.objects.create(title=f'Item {index}', title_cn=f'条目{index}')
+            create_activity(self.owner, anime, '新建了条目')
+        self._list()
+
+        # 目标用户、分页计数、当前页动态；认证用户与隐私设置命中缓存，不再查询任何目标对象
+        with self.assertNumQueries(3):
+            items = self._list()
+        self.assertEqual(items[0]['target_title'], 'Item 4')
+
+    def test_backfill_command_populates_legacy_rows(self):
+        """测试回填命令为旧动态生成快照"""
+        comment = Comment.objects.create(
+            user=self.owner, content_type=ContentType.objects.get_for_model(Anime),
+            object_id=self.anime.id, score=8, content='好看'
+        )
+        like = Like.objects.create(user=self.owner, comment=comment)
+        legacy = [
+            Activity.objects.create(
+                user=self.owner, content_type=ContentType.objects.get_for_model(Comment),
+                object_id=comment.id, action='COMMENT'
+            ),
+            Activity.objects.create(
+                user=self.owner, content_type=ContentType.objects.get_for_model(Like),
+                object_id=like.id, action='LIKE'
+            ),
+            Activity.objects.create(
+                user=self.owner, content_type=ContentType.objects.get_for_model(Comment),
+                object_id=999999, action='COMMENT'
+            ),
+        ]
+
+        # 回填前也能现场生成标题
+        titles = {item['id']: item['target_title'] for item in self._list()}
+        self.assertEqual(titles[legacy[0].id], 'Payload Anime')
+        self.assertEqual(titles[legacy[1].id], '好看')
+        self.assertEqual(titles[legacy[2].id], '[对象已删除]')
+
+        call_command('backfill_activity_payloads', batch_size=2, stdout=StringIO())
+
+        for activity in legacy:
+            activity.refresh_from_db()
+        self.assertEqual(legacy[0].payload['title'], 'Payload Anime')
+        self.assertEqual(legacy[1].payload['excerpt'], '好看')
+        self.assertIsNone(legacy[2].payload['title'])
+        self.assertFalse(Activity.objects.filter(payload={}).exists())
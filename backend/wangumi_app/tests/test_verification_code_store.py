@@ -0,0 +1,136 @@
+"""
+Tests for the verification code store.
+内存回退存储：时间轮过期、容量与 LRU 淘汰、并发安全，以及 redis 故障后的定期重试。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from wangumi_app.services import sms_verification
+from wangumi_app.services.sms_verification import ExpiringLRUStore, VerificationCodeStore
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyRedis:
+    """可以切换可用状态的 redis 客户端替身"""
+
+    def __init__(self):
+        self.available = True
+        self.data = {}
+        self.connects = 0
+
+    def from_url(self, *_args, **_kwargs):
+        self.connects += 1
+        return self
+
+    def _check(self):
+        if not self.available:
+            raise ConnectionError("redis down")
+
+    def setex(self, key, _ttl, value):
+        self._check()
+        self.data[key] = value
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+
+class ExpiringLRUStoreTests(SimpleTestCase):
+    def test_expiry(self):
+        """测试过期后读不到，重新写入的更晚过期时间不受旧桶影响"""
+        clock = FakeClock()
+        store = ExpiringLRUStore(10, clock=clock)
+        store.set("a", "1", ttl=5)
+        store.set("b", "2", ttl=5)
+        store.set("b", "3", ttl=60)
+        clock.now += 5
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(store.get("b"), "3")
+        self.assertEqual(len(store), 1)
+
+    def test_expiry_after_long_idle(self):
+        clock = FakeClock()
+        store = ExpiringLRUStore(10, clock=clock)
+        for index in range(3):
+            store.set(str(index), "v", ttl=10 + index)
+        clock.now += 10 ** 6
+        store.get("missing")
+        self.assertEqual(len(store), 0)
+
+    def test_capacity_evicts_least_recently_used(self):
+        store = ExpiringLRUStore(2, clock=FakeClock())
+        store.set("a", "1", ttl=60)
+        store.set("b", "2", ttl=60)
+        store.get("a")
+        store.set("c", "3", ttl=60)
+        self.assertEqual(store.get("a"), "1")
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.get("c"), "3")
+
+    def test_concurrent_access(self):
+        """测试多线程并发读写时数据一致且不超过容量"""
+        store = ExpiringLRUStore(500, clock=FakeClock())
+
+        def work(index):
+            key = f"key:{index % 800}"
+            store.set(key, str(index % 800), ttl=60)
+            value = store.get(key)
+            return value is None or value == str(index % 800)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(work, range(8000)))
+        self.assertTrue(all(results))
+        self.assertLessEqual(len(store), 500)
+
+
+@override_settings(SMS_REDIS_RETRY_SECONDS=30)
+class VerificationCodeStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.redis = FlakyRedis()
+        patcher = patch.object(sms_verification, "redis", SimpleNamespace(Redis=self.redis))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = VerificationCodeStore(clock=self.clock)
+
+    def test_falls_back_and_retries_redis(self):
+        """测试 redis 故障时回退到内存，重试间隔后恢复使用 redis"""
+        self.redis.available = False
+        with self.assertLogs(sms_verification.logger, "WARNING"):
+            self.store.set("a@example.com", "login", "hash-1", 300)
+        self.assertEqual(self.store.get("a@example.com", "login"), "hash-1")
+        # 重试间隔内不会再尝试连接
+        self.assertEqual(self.redis.connects, 1)
+
+        self.redis.available = True
+        self.clock.now += 31
+        self.store.set("b@example.com", "login", "hash-2", 300)
+        self.assertEqual(self.redis.connects, 2)
+        self.assertEqual(list(self.redis.data.values()), ["hash-2"])
+        # 故障期间写入内存的验证码仍然可用
+        self.assertEqual(self.store.get("a@example.com", "login"), "hash-1")
+
+    def test_redis_write_replaces_memory_code(self):
+        self.redis.available = False
+        with self.assertLogs(sms_verification.logger, "WARNING"):
+            self.store.set("a@example.com", "login", "old", 300)
+        self.redis.available = True
+        self.clock.now += 31
+        self.store.set("a@example.com", "login", "new", 300)
+        self.redis.data.clear()
+        self.assertIsNone(self.store.get("a@example.com", "login"))
@@ -0,0 +1,110 @@
+"""
+Tests for the visibility service.
+隐私与关注关系判定：缓存命中、信号失效与批量判定。
+"""
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wangumi_app.models import PrivacySetting, UserFollow, UserProfile
+from wangumi_app.services.visibility import (
+    can_view, get_privacy_levels, is_mutual_follow, visible_owner_ids
+)
+
+
+class VisibilityServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username='viewer', password='pass123')
+        self.public_user = User.objects.create_user(username='public_user', password='pass123')
+        self.friend_user = User.objects.create_user(username='friend_user', password='pass123')
+        self.mutual_user = User.objects.create_user(username='mutual_user', password='pass123')
+        self.private_user = User.objects.create_user(username='private_user', password='pass123')
+        PrivacySetting.objects.create(user=self.friend_user, activities='friends')
+        PrivacySetting.objects.create(user=self.mutual_user, activities='mutual')
+        PrivacySetting.objects.create(user=self.private_user, activities='self')
+        UserFollow.objects.create(follower=self.viewer, following=self.friend_user)
+        UserFollow.objects.create(follower=self.viewer, following=self.mutual_user)
+        self.owner_ids = [
+            self.public_user.id, self.friend_user.id, self.mutual_user.id, self.private_user.id
+        ]
+
+    def test_batch_decision(self):
+        """测试批量判定各隐私级别"""
+        visible = visible_owner_ids(self.viewer, self.owner_ids, 'activities')
+        self.assertEqual(visible, {self.public_user.id, self.friend_user.id})
+
+        anonymous = visible_owner_ids(AnonymousUser(), self.owner_ids, 'activities')
+        self.assertEqual(anonymous, {self.public_user.id})
+
+    def test_owner_sees_own_sections(self):
+        """测试用户总能看到自己的内容"""
+        self.assertTrue(can_view(self.private_user, self.private_user, 'activities'))
+        self.assertFalse(can_view(None, self.private_user, 'activities'))
+
+    def test_repeated_decisions_are_cached(self):
+        """测试第二次判定不再查询数据库"""
+        visible_owner_ids(self.viewer, self.owner_ids, 'activities')
+        with self.assertNumQueries(0):
+            visible_owner_ids(self.viewer, self.owner_ids, 'activities')
+            can_view(self.viewer, self.mutual_user, 'activities')
+
+    def test_batch_cost_does_not_grow_with_owners(self):
+        """测试批量判定的查询数与用户数量无关"""
+        # 隐私记录一次查询，关注/粉丝集合各一次
+        with self.assertNumQueries(3):
+            visible_owner_ids(self.viewer, self.owner_ids, 'activities')
+
+    def test_follow_invalidates_cached_edges(self):
+        """测试回关后互关判定立即生效"""
+        self.assertFalse(can_view(self.viewer, self.mutual_user, 'activities'))
+
+        follow = UserFollow.objects.create(follower=self.mutual_user, following=self.viewer)
+        self.assertTrue(is_mutual_follow(self.viewer, self.mutual_user))
+        self.assertTrue(can_view(self.viewer, self.mutual_user, 'activities'))
+
+        follow.delete()
+        self.assertFalse(can_view(self.viewer, self.mutual_user, 'activities'))
+
+    def test_missing_setting_defaults_to_public(self):
+        """测试没有隐私设置的用户默认公开"""
+        levels = get_privacy_levels([self.public_user.id])
+        self.assertEqual(levels[self.public_user.id]['watchlist'], 'public')
+
+
+class VisibilityInvalidationApiTests(APITestCase):
+    """通过接口修改隐私与关注后缓存失效"""
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username='api_viewer', password='pass123')
+        self.owner = User.objects.create_user(username='api_owner', password='pass123')
+        for user in (self.viewer, self.owner):
+            UserProfile.objects.create(user=user)
+        self.viewer_token = str(RefreshToken.for_user(self.viewer).access_token)
+        self.owner_token = str(RefreshToken.for_user(self.owner).access_token)
+
+    def test_privacy_update_invalidates_cache(self):
+        """测试更新隐私设置后立即生效"""
+        self.assertTrue(can_view(self.viewer, self.owner, 'followings'))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.owner_token}')
+        response = self.client.put('/api/users/privacy', {'followings': 'self'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertFalse(can_view(self.viewer, self.owner, 'followings'))
+
+    def test_follow_and_unfollow_invalidate_cache(self):
+        """测试关注与取消关注接口使好友可见判定立即变化"""
+        PrivacySetting.objects.create(user=self.owner, followers='friends')
+        self.assertFalse(can_view(self.viewer, self.owner, 'followers'))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.viewer_token}')
+        self.client.post(f'/api/users/{self.owner.id}/follow')
+        self.assertTrue(can_view(self.viewer, self.owner, 'followers'))
+
+        self.client.delete(f'/api/users/{self.owner.id}/unfollow')
+        self.assertFalse(can_view(self.viewer, self.owner, 'followers'))
@@ -6,6 +6,8 @@ urlpatterns = [
     path("anime", anime_views.AnimeListCreateView.as_view(), name="anime-list"),
     path("anime/user_entries", anime_views.UserEntryListView.as_view(), name="anime-user-list"),
     path("anime/<int:anime_id>", anime_views.anime_detail, name="anime-detail"),
+    path("anime/<int:anime_id>/episodes", anime_views.anime_episodes, name="anime-episodes"),
+    path("genres", anime_views.genre_list, name="genre-list"),
     path("anime/delete/<int:anime_id>",anime_views.anime_delete,name="item-delete"),
     path("edit_item/",anime_views.anime_modify,name="item-modify"),
 ]
@@ -0,0 +1,6 @@
+from django.urls import path
+from wangumi_app.views.bulk_moderation_view import BulkModerationView
+
+urlpatterns = [
+    path('admin/moderation/bulk/', BulkModerationView.as_view(), name='admin-moderation-bulk'),
+]
@@ -7,4 +7,5 @@ urlpatterns = [
     
     path("users/<int:id>/follow", follow_view.follow_user, name="follow_user"),
     path("users/<int:id>/unfollow", follow_view.unfollow_user, name="unfollow_user"),
+    path("users/relationships", follow_view.relationships, name="user_relationships"),
 ]
@@ -0,0 +1,7 @@
+from django.urls import path
+from wangumi_app.views.home_timeline_view import HomeTimelineView
+
+
+urlpatterns = [
+    path("home_timeline/", HomeTimelineView.as_view(), name="home_timeline"),
+]
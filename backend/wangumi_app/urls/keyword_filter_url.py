@@ -0,0 +1,9 @@
+from django.urls import path
+from wangumi_app.views.keyword_filter_view import KeywordListView, KeywordDetailView, KeywordFlagListView, KeywordFlagReviewView
+
+urlpatterns = [
+    path('admin/keywords/', KeywordListView.as_view(), name='admin-keyword-list'),
+    path('admin/keywords/<int:keyword_id>/', KeywordDetailView.as_view(), name='admin-keyword-detail'),
+    path('admin/keywords/flags/', KeywordFlagListView.as_view(), name='admin-keyword-flags'),
+    path('admin/keywords/flags/<int:flag_id>/review/', KeywordFlagReviewView.as_view(), name='admin-keyword-flag-review'),
+]
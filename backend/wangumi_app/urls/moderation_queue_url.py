@@ -0,0 +1,8 @@
+from django.urls import path
+from wangumi_app.views.moderation_queue_view import ModerationQueueView, ModerationClaimView, ModerationResolveView
+
+urlpatterns = [
+    path('admin/moderation/queue/', ModerationQueueView.as_view(), name='admin-moderation-queue'),
+    path('admin/moderation/queue/claim/', ModerationClaimView.as_view(), name='admin-moderation-claim'),
+    path('admin/moderation/queue/<int:target_id>/resolve/', ModerationResolveView.as_view(), name='admin-moderation-resolve'),
+]
@@ -0,0 +1,7 @@
+from django.urls import path
+from wangumi_app.views.spam_cluster_view import SpamClusterListView, SpamClusterDetailView
+
+urlpatterns = [
+    path('admin/spam/clusters/', SpamClusterListView.as_view(), name='admin-spam-clusters'),
+    path('admin/spam/clusters/<int:cluster_id>/', SpamClusterDetailView.as_view(), name='admin-spam-cluster-detail'),
+]
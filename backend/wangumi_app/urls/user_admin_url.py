@@ -1,5 +1,5 @@
 from django.urls import path
-from wangumi_app.views.user_admin_views import UserListStatusView, UserStatusView, BanUserView, UnbanUserView
+from wangumi_app.views.user_admin_views import UserListStatusView, UserStatusView, BanUserView, UnbanUserView, ContentSweepStatusView
 
 urlpatterns = [
     # ... 其他路由
@@ -9,4 +9,5 @@ urlpatterns = [
     path('admin/users/<int:user_id>/status/', UserStatusView.as_view(), name='admin-user-status'),  # 原有：获取单个用户状态
     path('admin/users/<int:user_id>/ban/', BanUserView.as_view(), name='admin-user-ban'),  # 原有：封禁用户
     path('admin/users/<int:user_id>/unban/', UnbanUserView.as_view(), name='admin-user-unban'),  # 原有：解封用户
+    path('admin/logs/<int:log_id>/content-sweep/', ContentSweepStatusView.as_view(), name='admin-content-sweep'),  # 封禁/解封内容处理进度
 ]
\ No newline at end of file
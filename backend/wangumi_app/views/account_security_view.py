@@ -3,7 +3,7 @@ from django.core.exceptions import ValidationError
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 
 from wangumi_app.services.session_security import invalidate_user_sessions_and_tokens
 
@@ -11,7 +11,7 @@ from wangumi_app.services.session_security import invalidate_user_sessions_and_t
 class PasswordChangeView(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def post(self, request):
         user = request.user
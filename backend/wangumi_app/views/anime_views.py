@@ -1,28 +1,26 @@
-from functools import reduce
 import json
 
 from django.core.paginator import Paginator
-from django.db.models import Max, Q
 from django.http import JsonResponse
+from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.exceptions import InvalidToken
 
-from wangumi_app.models import Anime, AnimeStaff, CharacterAppearance, CharacterVoice, Episode, Comment
+from wangumi_app.models import Anime
+from wangumi_app.services.anime_detail import (
+    detail_versions, episodes_version, get_anime_comments, get_anime_detail, list_version
+)
+from wangumi_app.services.episodes import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, list_episodes
+from wangumi_app.services.genres import anime_ids_with_genres, genre_counts
 from wangumi_app.views.user_activities_view import create_activity
 from wangumi_app.utils import build_error_response, resolve_cover_url
+from wangumi_app.views.utils import conditional_on_versions
 
-STATUS_DISPLAY = {
-    "FINISHED": "已完结",
-    "RELEASING": "连载中",
-    "NOT_YET_RELEASED": "未开播",
-    "CANCELLED": "已取消",
-    "HIATUS": "暂停连载",
-}
 
 
 
@@ -63,12 +61,8 @@ def _build_anime_list_response(request, base_queryset):
 
     queryset = base_queryset
     if categories:
-        q_objects = [
-            Q(genres__contains=[category_name])
-            for category_name in categories
-        ]
-        combined = reduce(lambda acc, q: acc | q, q_objects)
-        queryset = queryset.filter(combined)
+        # 多个类型取并集；经 (genre, anime) 索引查出条目 id，不再扫描 genres JSON 字段
+        queryset = queryset.filter(id__in=anime_ids_with_genres(categories))
 
     queryset = queryset.order_by(order_by)
 
@@ -115,7 +109,7 @@ def authenticate_user(request):
     user = getattr(request, "user", None)
     if getattr(user, "is_authenticated", False):
         return user
-    authenticator = JWTAuthentication()
+    authenticator = CachedJWTAuthentication()
     try:
         auth_result = authenticator.authenticate(request)
     except (AuthenticationFailed, InvalidToken):
@@ -126,7 +120,7 @@ def authenticate_user(request):
 
 
 class AnimeListCreateView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_permissions(self):
@@ -135,6 +129,7 @@ class AnimeListCreateView(APIView):
             return []
         return super().get_permissions()
 
+    @method_decorator(conditional_on_versions(lambda request: [list_version()]))
     def get(self, request):
         """
             sort: 排序方式 (热度/时间/评分, 默认热度)
@@ -304,140 +299,78 @@ def anime_delete(request, anime_id: int):
     )
 
 
+@conditional_on_versions(lambda request, anime_id: [episodes_version(anime_id)])
+def anime_episodes(request, anime_id: int):
+    """
+    分页获取剧集列表，按集数升序。
+        from / to: 集数范围（闭区间，可选）
+        cursor: 上一页返回的 next_cursor，从该集之后继续（可选）
+        type: 剧集类型 episode_type（可选）
+        limit: 每页数量（默认 50，最多 200）
+    """
+    if request.method != "GET":
+        return JsonResponse({"code": 405, "message": "Method Not Allowed", "data": None}, status=405)
+    if not Anime.objects.filter(pk=anime_id).exists():
+        return JsonResponse({"code": 404, "message": "番剧不存在", "data": None}, status=404)
+
+    params = {}
+    for name, key in (("from", "start"), ("to", "end"), ("cursor", "cursor"), ("type", "episode_type")):
+        raw = (request.GET.get(name) or "").strip()
+        if raw:
+            try:
+                params[key] = int(raw)
+            except ValueError:
+                return build_error_response(f"{name} 需要是整数")
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return build_error_response("limit 需要是正整数")
+    if limit <= 0:
+        return build_error_response("limit 需要是正整数")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    page = list_episodes(anime_id, limit=limit, **params)
+    return JsonResponse({
+        "code": 0,
+        "message": "success",
+        "data": {
+            "anime_id": anime_id,
+            "list": page.episodes,
+            "next_cursor": page.next_cursor,
+            "has_more": page.next_cursor is not None,
+            "limit": limit,
+        },
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def genre_list(request):
+    """全部类型及其条目数，按条目数降序；结果带缓存"""
+    if request.method != "GET":
+        return JsonResponse({"code": 405, "message": "Method Not Allowed", "data": None}, status=405)
+    return JsonResponse(
+        {"code": 0, "message": "success", "data": {"genres": genre_counts()}},
+        json_dumps_params={'ensure_ascii': False}
+    )
+
+
 class UserEntryListView(APIView):
 
+    @method_decorator(conditional_on_versions(lambda request: [list_version()]))
     def get(self, request):
         queryset = Anime.objects.filter(is_admin=False)
         return _build_anime_list_response(request, queryset)
 
 
+@conditional_on_versions(lambda request, anime_id: detail_versions(anime_id))
 def anime_detail(request, anime_id: int):
     if request.method == "DELETE":
         return anime_delete(request, anime_id)
     if request.method != "GET":
         return JsonResponse({"code": 405, "message": "Method Not Allowed", "data": None}, status=405)
-    anime = Anime.objects.filter(pk=anime_id).first()
-    if not anime:
+    # 详情文档按内容版本缓存，评论单独缓存且只取最新若干条
+    data = get_anime_detail(anime_id)
+    if data is None:
         return JsonResponse({"code": 404, "message": "番剧不存在", "data": None}, status=404)
-
-    character_appearances = (
-        CharacterAppearance.objects.filter(anime=anime)
-        .select_related("character")
-        .order_by("order", "id")
-    )
-    character_ids = [appearance.character_id for appearance in character_appearances if appearance.character_id]
-    voices = (
-        CharacterVoice.objects.filter(character_id__in=character_ids)
-        .select_related("person")
-    )
-    voices_by_character = {}
-    for voice in voices:
-        voices_by_character.setdefault(voice.character_id, []).append(voice.person.pers_name)
-
-    characters_payload = []
-    for appearance in character_appearances:
-        character = appearance.character
-        if character is None:
-            continue
-        characters_payload.append(
-            {
-                "name": character.name,
-                "avatar": character.image or "",
-                "voiceActors": voices_by_character.get(character.id, []),
-            }
-        )
-
-    staff_members = (
-        AnimeStaff.objects.filter(anime=anime)
-        .select_related("person", "role", "character")
-        .order_by("order", "id")
-    )
-    staff_payload = []
-    for member in staff_members:
-        staff_entry = {
-            "role": member.role.name if member.role else "",
-            "name": member.person.pers_name if member.person else "",
-        }
-        if member.character:
-            staff_entry["character"] = member.character.name
-        staff_payload.append(staff_entry)
-
-    episodes_payload = []
-    for ep in Episode.objects.filter(anime=anime).order_by("episode_number"):
-        online_urls = []
-        raw_urls = ep.online_urls
-        if raw_urls:
-            try:
-                import json
-
-                parsed = json.loads(raw_urls) if isinstance(raw_urls, str) else raw_urls
-                if isinstance(parsed, list):
-                    online_urls = parsed
-            except Exception:
-                online_urls = []
-        episodes_payload.append(
-            {
-                "number": ep.episode_number,
-                "title": ep.title,
-                "title_cn": ep.title_cn,
-                "description": ep.description,
-                "release_date": ep.release_date.isoformat() if ep.release_date else None,
-                "online_urls": online_urls,
-            }
-        )
-
-    max_episode = (
-        Episode.objects.filter(anime=anime).aggregate(max_ep=Max("episode_number")).get("max_ep")
-    )
-    if max_episode:
-        update_progress = f"已更新至第{max_episode}集"
-    elif anime.total_episodes:
-        update_progress = f"共{anime.total_episodes}集"
-    else:
-        update_progress = "暂无更新信息"
-
-    status_display = STATUS_DISPLAY.get((anime.status or "").upper(), anime.status or "未知")
-
-    comment_lists= (
-        Comment.objects.filter(object_id=anime.id)
-            .select_related('user')
-            .order_by('-created_at') 
-        )
-    comment_payload = []
-    for comment in comment_lists:
-        comment_payload.append({
-            "user": comment.user.username if comment.user else "匿名",
-            "content": comment.content,
-            "createdAt": comment.created_at.isoformat() if comment.created_at else None,
-        })
-
-    data = {
-        "basic": {
-            "id": anime.id,
-            "title": anime.title,
-            "titleJapanese": anime.title_cn,
-            "cover": resolve_cover_url(anime),
-            "rating": anime.rating,
-            "summary": anime.description,
-        },
-        "meta": {
-            "category": anime.genres or [],
-            "status": status_display,
-            "episodes": anime.total_episodes,
-            "episodes_detail": episodes_payload,
-            "releaseDate": anime.release_date.isoformat() if anime.release_date else None,
-            "updateProgress": update_progress,
-            "createdBy": getattr(getattr(anime, 'created_by', None), 'username', None),
-            "createdAt": anime.created_at.isoformat() if anime.created_at else None,
-            "isAdmin": anime.is_admin,
-        },
-        "relations": {
-            "characters": characters_payload,
-            "staff": staff_payload,
-        },
-        "comments":{
-            "list": comment_payload,
-        }
-    }
+    data = {**data, "comments": {"list": get_anime_comments(anime_id)}}
 
     return JsonResponse({"code": 0, "message": "success", "data": data}, json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,121 @@
+import json
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+from rest_framework.views import APIView
+from wangumi_app.authentication import CachedJWTAuthentication
+from rest_framework.response import Response
+from rest_framework import status
+
+from wangumi_app.services.bulk_moderation import (
+    MAX_BULK_ITEMS,
+    bulk_ban_users,
+    bulk_handle_reports,
+    bulk_hide_comments,
+)
+from wangumi_app.views.report_admin_views import IsAdminUser
+
+BULK_ACTIONS = ('resolve_reports', 'reject_reports', 'hide_comments', 'ban_users')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BulkModerationView(APIView):
+    """批量管理操作：批量处理举报、隐藏评论、封禁用户，逐项返回结果"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            action = data.get('action')
+            ids = data.get('ids')
+
+            # 参数验证
+            if action not in BULK_ACTIONS:
+                return Response({
+                    "code": 400,
+                    "message": f"action参数必须是{'、'.join(BULK_ACTIONS)}之一",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if not isinstance(ids, list) or not ids or not all(isinstance(item, int) for item in ids):
+                return Response({
+                    "code": 400,
+                    "message": "ids必须是非空的整数列表",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > MAX_BULK_ITEMS:
+                return Response({
+                    "code": 400,
+                    "message": f"单次最多操作{MAX_BULK_ITEMS}项",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            meta = {
+                "ip_address": self._get_client_ip(request),
+                "user_agent": request.META.get('HTTP_USER_AGENT', '')
+            }
+            if action in ('resolve_reports', 'reject_reports'):
+                results = bulk_handle_reports(
+                    request.user, ids,
+                    'RESOLVED' if action == 'resolve_reports' else 'REJECTED',
+                    resolution=data.get('resolution', ''), meta=meta
+                )
+            elif action == 'hide_comments':
+                results = bulk_hide_comments(request.user, ids, reason=data.get('reason', ''), meta=meta)
+            else:
+                reason = data.get('reason')
+                if not reason:
+                    return Response({
+                        "code": 400,
+                        "message": "封禁理由不能为空",
+                        "data": None
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                ban_duration = data.get('ban_duration', 7)
+                if ban_duration is not None and (
+                    isinstance(ban_duration, bool) or not isinstance(ban_duration, int) or ban_duration < 0
+                ):
+                    return Response({
+                        "code": 400,
+                        "message": "ban_duration必须是非负整数",
+                        "data": None
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                results = bulk_ban_users(
+                    request.user, ids, reason,
+                    ban_duration=ban_duration,
+                    delete_content=data.get('delete_content', False),
+                    meta=meta
+                )
+
+            succeeded = sum(1 for result in results if result["success"])
+            return Response({
+                "code": 200,
+                "message": "批量操作完成",
+                "data": {
+                    "action": action,
+                    "succeeded": succeeded,
+                    "failed": len(results) - succeeded,
+                    "results": results
+                }
+            })
+
+        except json.JSONDecodeError:
+            return Response({
+                "code": 400,
+                "message": "请求体格式错误",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _get_client_ip(self, request):
+        """获取客户端IP"""
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            ip = x_forwarded_for.split(',')[0]
+        else:
+            ip = request.META.get('REMOTE_ADDR')
+        return ip
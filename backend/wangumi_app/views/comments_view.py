@@ -8,11 +8,16 @@ from django.db.models import F,Count, Avg, Q
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
 
 from wangumi_app.models import Comment, Anime, Episode, Like, WatchStatus, Reply, Character, Person
+from wangumi_app.services.author_cards import avatar_or_default, get_author_card, get_author_cards
+from wangumi_app.services.keyword_filter import record_flag, screen_text
+from wangumi_app.services.rate_limiter import by_user_or_ip, hit, rate_limit
+from wangumi_app.services.spam_detection import find_near_duplicates, record_fingerprint
+from wangumi_app.services.reply_threads import MAX_EMBEDDED_REPLIES, fetch_latest_replies
 from wangumi_app.views.user_activities_view import create_activity
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -32,7 +37,7 @@ class CommentView(APIView):
         if self.request.method == 'GET':
             self.authentication_classes = []
         else:
-            self.authentication_classes = [JWTAuthentication]
+            self.authentication_classes = [CachedJWTAuthentication]
         return super().get_authentication_classes()
 
     def get(self, request):
@@ -46,6 +51,8 @@ class CommentView(APIView):
             order_by = request.GET.get('order_by', 'time_desc')
             min_score = request.GET.get('min_score')
             max_score = request.GET.get('max_score')
+            # 可选：为每条评论内嵌最新的 N 条回复，避免客户端逐条请求回复列表
+            with_replies = max(min(int(request.GET.get('with_replies', 0) or 0), MAX_EMBEDDED_REPLIES), 0)
 
             # 验证必需参数
             if not scope or not object_id:
@@ -69,7 +76,8 @@ class CommentView(APIView):
             comments_queryset = Comment.objects.filter(
                 content_type=content_type,
                 object_id=object_id,
-                scope=scope
+                scope=scope,
+                is_banned=False  # 被管理员隐藏（软删除）的评论不对外展示
             ).select_related('user')
 
             # 评分过滤
@@ -120,34 +128,41 @@ class CommentView(APIView):
                     except WatchStatus.DoesNotExist:
                         user_watch_status = None
 
-            # 获取回复数量
+            # 回复数量直接读取冗余计数；需要内嵌回复时用一次窗口函数查询取整页的最新回复
             comment_ids = [comment.id for comment in comments_page]
-            reply_counts = dict(
-                Reply.objects.filter(review_id__in=comment_ids)
-                .values('review_id')
-                .annotate(count=Count('id'))
-                .values_list('review_id', 'count')
-            )
+            latest_replies = fetch_latest_replies(comment_ids, with_replies) if with_replies else {}
+
+            # 一次性取出整页（含内嵌回复）作者的卡片，避免逐行查询用户资料
+            author_ids = {comment.user_id for comment in comments_page}
+            for replies in latest_replies.values():
+                author_ids.update(reply.user_id for reply in replies)
+            author_cards = get_author_cards(author_ids)
 
             # 构建评论数据
             comments_data = []
             for comment in comments_page:
-                author_info = self._get_author_info(comment.user)
+                author_info = self._get_author_info(comment.user, author_cards)
                 is_current_user = request.user.is_authenticated and comment.user_id == request.user.id
                 is_liked = comment.id in user_liked_comments if request.user.is_authenticated else False
 
-                comments_data.append({
+                comment_data = {
                     "comment_id": comment.id,
                     "score": comment.score,
                     "content": comment.content,
                     "author": author_info,
                     "likes_count": comment.likes,
                     "is_liked": is_liked,
-                    "replies_count": reply_counts.get(comment.id, 0),
+                    "replies_count": comment.reply_count,
                     "created_at": comment.created_at.isoformat() if comment.created_at else None,
                     "is_author": is_current_user,
                     "user_watch_status": user_watch_status if is_current_user else None
-                })
+                }
+                if with_replies:
+                    comment_data["latest_replies"] = [
+                        self._serialize_embedded_reply(reply, request, author_cards)
+                        for reply in latest_replies.get(comment.id, [])
+                    ]
+                comments_data.append(comment_data)
 
             # 获取评分统计
             rating_stats = self._get_rating_stats(comments_queryset)
@@ -181,6 +196,16 @@ class CommentView(APIView):
                 "data": None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _serialize_embedded_reply(self, reply, request, author_cards=None):
+        """序列化内嵌在评论列表中的回复，字段与回复列表接口保持一致"""
+        return {
+            "reply_id": reply.id,
+            "content": reply.content,
+            "author": self._get_author_info(reply.user, author_cards),
+            "created_at": reply.created_at.isoformat() if reply.created_at else None,
+            "is_author": request.user.is_authenticated and reply.user_id == request.user.id
+        }
+
     def _get_rating_stats(self, comments_queryset):
         """获取评分统计信息"""
         try:
@@ -266,40 +291,28 @@ class CommentView(APIView):
         }
         return scope_map.get(scope, '对象')
 
-    def _get_author_info(self, user):
-        """获取作者信息"""
-        try:
-            level = getattr(user, 'level', 1) if hasattr(user, 'level') else 1
-            is_verified = getattr(user, 'is_verified', False) if hasattr(user, 'is_verified') else False
-            
-            return {
-                "user_id": user.id,
-                "username": user.username,
-                "avatar": self._get_user_avatar(user),
-                "level": level,
-                "is_verified": is_verified
-            }
-        except:
-            return {
-                "user_id": user.id,
-                "username": user.username,
-                "avatar": "/avatars/default.jpg",
-                "level": 1,
-                "is_verified": False
-            }
+    def _get_author_info(self, user, cards=None):
+        """获取作者信息（优先使用批量取出的作者卡片）"""
+        card = (cards or {}).get(user.id) or get_author_card(user.id)
+        level = getattr(user, 'level', 1) if hasattr(user, 'level') else 1
+        is_verified = getattr(user, 'is_verified', False) if hasattr(user, 'is_verified') else False
+
+        return {
+            "user_id": user.id,
+            "username": user.username,
+            "avatar": avatar_or_default(card),
+            "level": level,
+            "is_verified": is_verified
+        }
 
     def _get_user_avatar(self, user):
         """获取用户头像URL"""
-        try:
-            if hasattr(user, 'userprofile') and user.userprofile.avatar:
-                return user.userprofile.avatar.url
-        except:
-            pass
-        return "/avatars/default.jpg"
+        return avatar_or_default(get_author_card(user.id))
     
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @rate_limit("comment_post")
     @transaction.atomic
     def post(self, request):
         """发表或更新评论"""
@@ -320,6 +333,16 @@ class CommentView(APIView):
                     "errors": validation_errors
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+            # 关键词过滤：命中违禁词拒绝发布，打码词替换为 *，剧透等关键词标记待审核
+            screen_result = screen_text(content)
+            if screen_result.blocked:
+                return Response({
+                    "code": 400,
+                    "message": "内容包含违禁词，请修改后再发布",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+            content = screen_result.masked_text
+
             # 验证对象存在性并获取对象信息
             target_object, object_info = self._get_target_object(scope, object_id)
             if not target_object:
@@ -357,6 +380,15 @@ class CommentView(APIView):
                 comment = existing_comment
                 message = "评论更新成功"
             else:
+                # 近似重复内容检测：短时间内反复发布相似内容的用户被限流
+                duplicate_check = find_near_duplicates(content)
+                if duplicate_check.is_duplicate and not hit("duplicate_post", [by_user_or_ip(request)]).allowed:
+                    return Response({
+                        "code": 429,
+                        "message": "检测到重复发布相似内容，请稍后再试",
+                        "data": None
+                    }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
                 # 创建新评论
                 comment = Comment.objects.create(
                     content_type=content_type,
@@ -366,10 +398,13 @@ class CommentView(APIView):
                     content=content,
                     scope=scope
                 )
+                record_fingerprint(duplicate_check, comment, request.user.id)
                 heat_increased = self._increase_heat(target_object, scope)
                 message = "评论发表成功"
                 create_activity(request.user, comment, "创建了评论")  # 创建动态记录
 
+            record_flag(screen_result, comment, request.user.id, created=not is_update)
+
             # 更新对象的评分
             self._update_object_rating(comment)
 
@@ -537,6 +572,17 @@ class CommentView(APIView):
                     "data": None
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+            # 关键词过滤
+            screen_result = screen_text(content) if content else None
+            if screen_result is not None:
+                if screen_result.blocked:
+                    return Response({
+                        "code": 400,
+                        "message": "内容包含违禁词，请修改后再发布",
+                        "data": None
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                content = screen_result.masked_text
+
             # 获取评论对象
             try:
                 comment = Comment.objects.get(id=comment_id)
@@ -566,6 +612,8 @@ class CommentView(APIView):
             
             if update_fields:
                 comment.save(update_fields=update_fields)
+            if screen_result is not None:
+                record_flag(screen_result, comment, request.user.id)
 
             # 更新相关对象的评分
             self._update_object_rating(comment)
@@ -4,7 +4,7 @@ from django.core.validators import validate_email
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 
 from wangumi_app.models import UserProfile
 from wangumi_app.services import (
@@ -20,7 +20,7 @@ User = get_user_model()
 
 class ContactChangeRequestView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def post(self, request):
         user = request.user
@@ -61,7 +61,7 @@ class ContactChangeRequestView(APIView):
 
 class ContactChangeConfirmView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def post(self, request):
         user = request.user
@@ -9,9 +9,12 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from rest_framework_simplejwt.authentication import JWTAuthentication  # 和 profile_view 一样
+from wangumi_app.authentication import CachedJWTAuthentication  # 和 profile_view 一样
 
 from wangumi_app.models import UserFollow  # 你们项目里的关注关系模型
+from wangumi_app.services.follow_counts import record_follow, record_unfollow
+from wangumi_app.services.home_timeline import backfill_followee, remove_followee
+from wangumi_app.services.relationships import MAX_RELATIONSHIP_IDS, get_relationships
 
 User = get_user_model()
 
@@ -38,7 +41,7 @@ def _err(message: str, http_status: int = status.HTTP_400_BAD_REQUEST, code: int
 
 
 @api_view(["POST"])
-@authentication_classes([JWTAuthentication])          # ★ 关键：显式使用 JWT
+@authentication_classes([CachedJWTAuthentication])          # ★ 关键：显式使用 JWT
 @permission_classes([permissions.IsAuthenticated])    # 只允许登录用户
 def follow_user(request: Request, id: int):
     """
@@ -60,10 +63,15 @@ def follow_user(request: Request, id: int):
     try:
         with transaction.atomic():
             # 如果已存在则抛 IntegrityError 或 get_or_create 幂等处理
-            UserFollow.objects.get_or_create(
+            _, created = UserFollow.objects.get_or_create(
                 follower=me,
                 following=target_user,
             )
+            if created:
+                # 只有真正新建关系时才计数，重复关注不会让计数漂移
+                record_follow(me.id, target_user.id)
+                # 新关注：把对方最近的动态补进自己的首页时间线
+                backfill_followee(me.id, target_user.id)
     except IntegrityError:
         # 已经关注过了，当作幂等成功
         pass
@@ -72,7 +80,7 @@ def follow_user(request: Request, id: int):
 
 
 @api_view(["DELETE"])
-@authentication_classes([JWTAuthentication])          # ★ 关键：显式使用 JWT
+@authentication_classes([CachedJWTAuthentication])          # ★ 关键：显式使用 JWT
 @permission_classes([permissions.IsAuthenticated])
 def unfollow_user(request: Request, id: int):
     """
@@ -87,9 +95,43 @@ def unfollow_user(request: Request, id: int):
     target_user = get_object_or_404(User, id=id)
 
     with transaction.atomic():
-        UserFollow.objects.filter(
+        deleted, _ = UserFollow.objects.filter(
             follower=me,
             following=target_user,
         ).delete()
+        if deleted:
+            # 只有真正删除了关系才减少计数（重复取消关注保持幂等）
+            record_unfollow(me.id, target_user.id)
+        # 取消关注后从首页时间线移除对方的动态
+        remove_followee(me.id, target_user.id)
 
     return _ok({"success": True})
+
+
+@api_view(["GET"])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def relationships(request: Request):
+    """
+    批量查询关注关系：
+    GET /api/users/relationships?ids=1,2,3
+
+    一次返回当前用户与每个用户之间的 following（我关注了对方）、
+    followed_by（对方关注了我）、mutual（互相关注）标记，
+    供粉丝列表、评论作者、推荐用户等列表页渲染按钮使用。
+    """
+    raw_ids = request.GET.get("ids", "")
+    try:
+        user_ids = list(dict.fromkeys(int(item) for item in raw_ids.split(",") if item.strip()))
+    except ValueError:
+        return _err("ids must be comma separated integers")
+
+    if not user_ids:
+        return _err("ids is required")
+    if len(user_ids) > MAX_RELATIONSHIP_IDS:
+        return _err(f"at most {MAX_RELATIONSHIP_IDS} ids per request")
+
+    flags = get_relationships(request.user.id, user_ids)
+    return _ok({
+        "list": [{"user_id": user_id, **flags[user_id]} for user_id in user_ids],
+    })
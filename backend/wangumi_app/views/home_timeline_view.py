@@ -0,0 +1,59 @@
+from django.http import JsonResponse
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from wangumi_app.authentication import CachedJWTAuthentication
+
+from wangumi_app.utils import build_error_response
+from wangumi_app.services.author_cards import get_author_cards
+from wangumi_app.services.home_timeline import get_home_timeline
+from wangumi_app.views.user_activities_view import serialize_activities
+
+
+class HomeTimelineView(APIView):
+    """
+    /api/home_timeline/
+    查询当前用户关注的人发布的动态，按时间倒序排列。
+    普通用户的动态在发布时写扩散到关注者的时间线，粉丝数很多的用户在读取时合并，
+    两部分都按发布者当前的动态隐私设置过滤。
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # 处理分页参数
+        try:
+            page = int(request.GET.get("page", 1))
+            limit = int(request.GET.get("limit", 20))
+        except ValueError:
+            return build_error_response("page 和 limit 需要是正整数")
+
+        if page <= 0 or limit <= 0:
+            return build_error_response("page 和 limit 需要是正整数")
+
+        limit = min(limit, 100)
+
+        activities, has_more = get_home_timeline(request.user, page, limit)
+        results = serialize_activities(activities)
+
+        # 附上发布者信息
+        author_cards = get_author_cards(act.user_id for act in activities)
+        for act, item in zip(activities, results):
+            card = author_cards.get(act.user_id)
+            item["user"] = {
+                "user_id": act.user_id,
+                "username": act.user.username,
+                "avatar": card["avatar"] if card else None,
+            }
+
+        return JsonResponse({
+            "code": 0,
+            "message": "success",
+            "data": {
+                "list": results,
+                "pagination": {
+                    "page": page,
+                    "limit": limit,
+                    "has_more": has_more,
+                },
+            },
+        })
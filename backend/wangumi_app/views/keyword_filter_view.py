@@ -0,0 +1,280 @@
+import json
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+from django.db import transaction
+from django.core.paginator import Paginator
+from rest_framework.views import APIView
+from wangumi_app.authentication import CachedJWTAuthentication
+from rest_framework.response import Response
+from rest_framework import status
+
+from wangumi_app.models import FilterKeyword, KeywordFlag
+from wangumi_app.services.generic_prefetch import prefetch_generic_targets
+from wangumi_app.services.keyword_filter import invalidate_keyword_filter, normalize_keyword
+from wangumi_app.views.report_admin_views import IsAdminUser, ReportTargetDisplayMixin
+
+VALID_ACTIONS = [choice[0] for choice in FilterKeyword.ACTION_CHOICES]
+MAX_IMPORT_WORDS = 5000
+
+
+def _serialize_keyword(keyword):
+    return {
+        "id": keyword.id,
+        "word": keyword.word,
+        "action": keyword.action,
+        "action_display": keyword.get_action_display(),
+        "is_active": keyword.is_active,
+        "updated_at": keyword.updated_at.isoformat() if keyword.updated_at else None
+    }
+
+
+def _page(queryset, request):
+    page = int(request.GET.get('page', 1))
+    page_size = min(int(request.GET.get('page_size', 20)), 100)
+    paginator = Paginator(queryset, page_size)
+    try:
+        items = paginator.page(page)
+    except:
+        items = paginator.page(1)
+    return list(items), {
+        "total": paginator.count,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": paginator.num_pages
+    }
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class KeywordListView(APIView):
+    """关键词词表：查询与新增（支持批量导入）"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            queryset = FilterKeyword.objects.all().order_by('-updated_at')
+            search = request.GET.get('search', '')
+            action = request.GET.get('action')
+            if search:
+                queryset = queryset.filter(word__contains=normalize_keyword(search))
+            if action:
+                queryset = queryset.filter(action=action)
+
+            keywords, pagination = _page(queryset, request)
+            return Response({
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "keywords": [_serialize_keyword(keyword) for keyword in keywords],
+                    "pagination": pagination
+                }
+            })
+
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @transaction.atomic
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            action = data.get('action', 'BLOCK')
+            words = data.get('words')
+            if words is None:
+                words = [data.get('word', '')]
+
+            # 参数验证
+            if action not in VALID_ACTIONS:
+                return Response({
+                    "code": 400,
+                    "message": f"action参数必须是{'、'.join(VALID_ACTIONS)}之一",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if not isinstance(words, list) or len(words) > MAX_IMPORT_WORDS:
+                return Response({
+                    "code": 400,
+                    "message": f"words必须是列表，单次最多导入{MAX_IMPORT_WORDS}个",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+            normalized = list(dict.fromkeys(normalize_keyword(str(word)) for word in words))
+            normalized = [word for word in normalized if word]
+            if not normalized or any(len(word) > 100 for word in normalized):
+                return Response({
+                    "code": 400,
+                    "message": "关键词不能为空且不能超过100字符",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # 已存在的关键词跳过；bulk_create 不触发信号，手动通知各进程重建自动机
+            existing = set(FilterKeyword.objects.filter(word__in=normalized).values_list('word', flat=True))
+            FilterKeyword.objects.bulk_create(
+                [
+                    FilterKeyword(word=word, action=action, created_by=request.user)
+                    for word in normalized if word not in existing
+                ],
+                batch_size=1000,
+                ignore_conflicts=True
+            )
+            invalidate_keyword_filter()
+
+            return Response({
+                "code": 201,
+                "message": "关键词添加成功",
+                "data": {
+                    "created": len(normalized) - len(existing),
+                    "skipped": sorted(existing)
+                }
+            }, status=status.HTTP_201_CREATED)
+
+        except json.JSONDecodeError:
+            return Response({
+                "code": 400,
+                "message": "请求体格式错误",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class KeywordDetailView(APIView):
+    """修改或删除单个关键词"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    @transaction.atomic
+    def patch(self, request, keyword_id):
+        try:
+            data = json.loads(request.body)
+            keyword = FilterKeyword.objects.get(id=keyword_id)
+            if 'action' in data:
+                if data['action'] not in VALID_ACTIONS:
+                    return Response({
+                        "code": 400,
+                        "message": f"action参数必须是{'、'.join(VALID_ACTIONS)}之一",
+                        "data": None
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                keyword.action = data['action']
+            if 'is_active' in data:
+                keyword.is_active = bool(data['is_active'])
+            keyword.save()
+
+            return Response({
+                "code": 200,
+                "message": "关键词更新成功",
+                "data": _serialize_keyword(keyword)
+            })
+
+        except FilterKeyword.DoesNotExist:
+            return Response({
+                "code": 404,
+                "message": "关键词不存在",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+        except json.JSONDecodeError:
+            return Response({
+                "code": 400,
+                "message": "请求体格式错误",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @transaction.atomic
+    def delete(self, request, keyword_id):
+        try:
+            FilterKeyword.objects.get(id=keyword_id).delete()
+            return Response({
+                "code": 200,
+                "message": "关键词已删除",
+                "data": None
+            })
+
+        except FilterKeyword.DoesNotExist:
+            return Response({
+                "code": 404,
+                "message": "关键词不存在",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class KeywordFlagListView(ReportTargetDisplayMixin, APIView):
+    """命中“标记待审核”关键词的内容列表，默认只列出未复核的"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            reviewed = request.GET.get('reviewed') in ('1', 'true')
+            queryset = (
+                KeywordFlag.objects.select_related('content_type', 'user')
+                .filter(reviewed=reviewed)
+                .order_by('-created_at')
+            )
+            flags, pagination = _page(queryset, request)
+            prefetch_generic_targets(flags)
+
+            return Response({
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "flags": [{
+                        "id": flag.id,
+                        "target_type": self._get_target_type_display(flag.content_type),
+                        "target_id": flag.object_id,
+                        "target_preview": self._get_target_preview(flag),
+                        "keywords": flag.keywords,
+                        "user": {
+                            "user_id": flag.user.id,
+                            "username": flag.user.username
+                        },
+                        "reviewed": flag.reviewed,
+                        "created_at": flag.created_at.isoformat()
+                    } for flag in flags],
+                    "pagination": pagination
+                }
+            })
+
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class KeywordFlagReviewView(APIView):
+    """将标记内容设为已复核"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, flag_id):
+        updated = KeywordFlag.objects.filter(id=flag_id).update(reviewed=True)
+        if not updated:
+            return Response({
+                "code": 404,
+                "message": "标记记录不存在",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "code": 200,
+            "message": "已复核",
+            "data": {"flag_id": flag_id}
+        })
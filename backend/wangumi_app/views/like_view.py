@@ -6,19 +6,21 @@ from django.db import transaction
 from django.db.models import F
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
 
 from wangumi_app.models import Comment, Like
+from wangumi_app.services.rate_limiter import rate_limit
 from wangumi_app.views.user_activities_view import create_activity
 
 @method_decorator(csrf_exempt, name='dispatch')
 class LikeView(APIView):
     """点赞功能接口 - 对评论进行点赞/取消点赞"""
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @rate_limit("like")
     @transaction.atomic
     def post(self, request, comment_id):
         """点赞评论"""
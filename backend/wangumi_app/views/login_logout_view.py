@@ -1,21 +1,41 @@
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from django.views.decorators.csrf import csrf_exempt
 
+from wangumi_app.authentication import CachedJWTAuthentication
+from wangumi_app.services.rate_limiter import by_field, by_ip, rate_limit
+from wangumi_app.services.session_security import invalidate_user_sessions_and_tokens
+from wangumi_app.services.token_versions import TOKEN_VERSION_CLAIM, get_token_version
+
 # ------------------
 # 登录接口
 # ------------------
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """签发令牌时写入用户当前的令牌版本号（刷新得到的 access token 会沿用该声明）"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = get_token_version(user.id)
+        return token
+
+
 class LoginView(TokenObtainPairView):
     """
     DRF SimpleJWT 自带登录接口，返回 access + refresh token
     """
-    pass  # 直接使用父类即可，无需额外逻辑
+    serializer_class = VersionedTokenObtainPairSerializer
+
+    # 只统计失败的登录：同一 IP 或同一用户名短时间内失败过多时拒绝
+    @rate_limit("login", keys=(by_ip, by_field("username")))
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
 
 # ------------------
 # 登出接口
@@ -24,7 +44,7 @@ class LogoutView(APIView):
     """
     登出逻辑：把 refresh token 加入黑名单
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @csrf_exempt
@@ -72,24 +92,20 @@ class LogoutView(APIView):
 # ------------------
 class LogoutAllView(APIView):
     """
-    登出用户所有设备，需要配合使用才能实现
-    通过修改用户密码或使用其他方式强制所有token失效
+    登出用户所有设备：令牌版本号自增，所有已签发的 token 立即失效
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @csrf_exempt
     def post(self, request):
         """
         强制用户登出所有设备
-        通过重置密码的JWT版本号来实现
+        通过自增用户的 JWT 版本号来实现，同时清理会话并拉黑 refresh token
         """
         try:
             user = request.user
-            # 更新用户的last_login时间，这会使之前所有的token失效
-            from django.utils import timezone
-            user.last_login = timezone.now()
-            user.save()
+            invalidate_user_sessions_and_tokens(user)
 
             return Response({
                 "code": 0,
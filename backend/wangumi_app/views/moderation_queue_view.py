@@ -0,0 +1,199 @@
+import json
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+from django.utils import timezone
+from django.core.paginator import Paginator
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from wangumi_app.models import ModerationTarget
+from wangumi_app.services.generic_prefetch import prefetch_generic_targets
+from wangumi_app.services.moderation_queue import (
+    MAX_CLAIM,
+    ModerationLeaseError,
+    claim_targets,
+    queue_stats,
+    resolve_target,
+)
+from wangumi_app.authentication import CachedJWTAuthentication
+from wangumi_app.views.report_admin_views import IsAdminUser, ReportTargetDisplayMixin
+
+
+def _serialize_target(view, target, now):
+    """被举报对象在队列中的展示数据，租约过期后不再显示领取人"""
+    leased = target.claimed_by_id is not None and target.lease_until is not None and target.lease_until > now
+    return {
+        "id": target.id,
+        "target_type": view._get_target_type_display(target.content_type),
+        "target_id": target.object_id,
+        "target_preview": view._get_target_preview(target),
+        "report_count": target.report_count,
+        "pending_count": target.pending_count,
+        "categories": target.categories,
+        "priority": target.priority,
+        "status": target.status,
+        "first_reported_at": target.first_reported_at.isoformat(),
+        "last_reported_at": target.last_reported_at.isoformat(),
+        "claimed_by": {
+            "user_id": target.claimed_by.id,
+            "username": target.claimed_by.username
+        } if leased else None,
+        "lease_until": target.lease_until.isoformat() if leased else None,
+    }
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ModerationQueueView(ReportTargetDisplayMixin, APIView):
+    """审核队列：按被举报对象聚合，按优先级排序"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            status_filter = request.GET.get('status', 'OPEN')
+            page = int(request.GET.get('page', 1))
+            page_size = min(int(request.GET.get('page_size', 20)), 50)
+
+            queryset = (
+                ModerationTarget.objects.select_related('content_type', 'claimed_by')
+                .filter(status=status_filter)
+                .order_by('-priority', 'first_reported_at')
+            )
+            paginator = Paginator(queryset, page_size)
+            try:
+                targets_page = paginator.page(page)
+            except:
+                targets_page = paginator.page(1)
+
+            # 被举报对象按内容类型批量取出
+            targets = list(targets_page)
+            prefetch_generic_targets(targets)
+
+            now = timezone.now()
+            return Response({
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "targets": [_serialize_target(self, target, now) for target in targets],
+                    "pagination": {
+                        "total": paginator.count,
+                        "page": page,
+                        "page_size": page_size,
+                        "total_pages": paginator.num_pages
+                    },
+                    "stats": queue_stats()
+                }
+            })
+
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ModerationClaimView(ReportTargetDisplayMixin, APIView):
+    """领取优先级最高的若干个待处理对象（带租约）"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+            limit = int(data.get('limit', 1))
+            if not 1 <= limit <= MAX_CLAIM:
+                return Response({
+                    "code": 400,
+                    "message": f"limit参数必须在1到{MAX_CLAIM}之间",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            targets = claim_targets(request.user, limit)
+            prefetch_generic_targets(targets)
+            now = timezone.now()
+            return Response({
+                "code": 200,
+                "message": "领取成功",
+                "data": {"targets": [_serialize_target(self, target, now) for target in targets]}
+            })
+
+        except (json.JSONDecodeError, TypeError, ValueError):
+            return Response({
+                "code": 400,
+                "message": "请求体格式错误",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ModerationResolveView(APIView):
+    """一次性处理被举报对象的全部待处理举报"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, target_id):
+        try:
+            data = json.loads(request.body)
+            action = data.get('action')
+            if action not in ['RESOLVED', 'REJECTED']:
+                return Response({
+                    "code": 400,
+                    "message": "action参数必须是RESOLVED或REJECTED",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            target, closed, content_hidden = resolve_target(
+                target_id,
+                request.user,
+                action,
+                resolution=data.get('resolution', ''),
+                hide_content=bool(data.get('hide_content', False)),
+            )
+            return Response({
+                "code": 200,
+                "message": "举报处理成功",
+                "data": {
+                    "target_id": target.id,
+                    "action": action,
+                    "reports_closed": closed,
+                    "content_hidden": content_hidden,
+                    "handled_at": target.resolved_at.isoformat()
+                }
+            })
+
+        except ModerationTarget.DoesNotExist:
+            return Response({
+                "code": 404,
+                "message": "审核对象不存在",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+        except ModerationLeaseError:
+            return Response({
+                "code": 409,
+                "message": "该对象已被其他管理员领取",
+                "data": None
+            }, status=status.HTTP_409_CONFLICT)
+        except json.JSONDecodeError:
+            return Response({
+                "code": 400,
+                "message": "请求体格式错误",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -4,10 +4,13 @@ from django.contrib.auth.models import User
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 
 from wangumi_app.models import UserProfile, UserFollow, WatchStatus, Anime, PrivacySetting
 from wangumi_app.utils import build_error_response
+from wangumi_app.services import visibility
+from wangumi_app.services.author_cards import get_author_cards
+from wangumi_app.services.relationships import get_relationships
 """
 用户主页列表视图
 提供关注列表、粉丝列表、番剧列表的API接口
@@ -16,37 +19,19 @@ from wangumi_app.utils import build_error_response
 
 def is_following(viewer, owner):
     """检查viewer是否关注了owner"""
-    return UserFollow.objects.filter(follower=viewer, following=owner).exists()
+    return visibility.is_following(viewer, owner)
 
 def is_mutual_follow(viewer, owner):
     """检查viewer和owner是否互相关注"""
-    return (
-        UserFollow.objects.filter(follower=viewer, following=owner).exists() and
-        UserFollow.objects.filter(follower=owner, following=viewer).exists()
-    )
+    return visibility.is_mutual_follow(viewer, owner)
 
 def get_privacy_setting(user, field_name):
-    """获取用户的隐私设置"""
-    try:
-        privacy_setting = PrivacySetting.objects.get(user=user)
-        return getattr(privacy_setting, field_name, "public")
-    except PrivacySetting.DoesNotExist:
-        # 如果没有隐私设置，默认为公开
-        return "public"
+    """获取用户的隐私设置（没有设置时默认为公开）"""
+    return visibility.get_privacy_levels([user.id])[user.id].get(field_name, "public")
 
 def check_privacy(viewer, owner, field_name):
-    """检查隐私设置是否允许查看"""
-    privacy_setting = get_privacy_setting(owner, field_name)
-
-    if privacy_setting == 'public':
-        return True
-    elif privacy_setting == 'self':
-        return viewer and viewer.id == owner.id
-    elif privacy_setting == 'friends':
-        return viewer and (viewer.id == owner.id or is_following(viewer, owner))
-    elif privacy_setting == 'mutual':
-        return viewer and (viewer.id == owner.id or is_mutual_follow(viewer, owner))
-    return False
+    """检查隐私设置是否允许查看（隐私记录与关注关系均走缓存）"""
+    return visibility.can_view(viewer, owner, field_name)
 
 def get_pagination_params(request):
     """获取分页参数，返回 (page, limit)"""
@@ -62,13 +47,17 @@ def get_pagination_params(request):
     limit = min(limit, 100)  # 限制最大每页数量
     return page, limit, None
 
+def wants_relationships(request):
+    """是否在列表中内嵌当前用户与每个用户的关注关系（?with_relationship=1）"""
+    return request.GET.get('with_relationship', '').lower() in ('1', 'true')
+
 class UserFollowingListView(APIView):
     """
     获取用户的关注列表
     GET /api/users/{user_id}/following/
     """
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def get(self, request, user_id):
         # 1. 验证查看的用户存在
@@ -88,30 +77,35 @@ class UserFollowingListView(APIView):
         # 4. 查询关注列表
         followings = UserFollow.objects.filter(
             follower=user
-        ).select_related('following', 'following__userprofile').order_by('-created_at')
+        ).select_related('following').order_by('-created_at')
         
         # 5. 分页
         paginator = Paginator(followings, limit)
         page_obj = paginator.get_page(page)
         
         # 6. 构造返回数据
+        author_cards = get_author_cards(follow.following_id for follow in page_obj)
+        relationships = (
+            get_relationships(request.user.id, [follow.following_id for follow in page_obj])
+            if wants_relationships(request) else None
+        )
         followings_data = []
         for follow in page_obj:
             following_user = follow.following
-            try:
-                following_profile = following_user.userprofile
-                avatar_url = following_profile.avatar.url if following_profile.avatar else None
-            except UserProfile.DoesNotExist:
-                avatar_url = None
+            card = author_cards.get(following_user.id)
+            avatar_url = card["avatar"] if card else None
             
             user_url = f"/api/users/{following_user.id}/"
-            followings_data.append({
+            item = {
                 'id': following_user.id,
                 'username': following_user.username,
                 'avatar': avatar_url,
                 'followed_at': follow.created_at.isoformat(),
                 'user_url': user_url,
-            })
+            }
+            if relationships is not None:
+                item['relationship'] = relationships[following_user.id]
+            followings_data.append(item)
         
         return Response({
             'count': paginator.count,
@@ -128,7 +122,7 @@ class UserFollowerListView(APIView):
     GET /api/users/{user_id}/followers/
     """
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     def get(self, request, user_id):
         # 1. 验证用户存在
         user = get_object_or_404(User, pk=user_id)
@@ -147,28 +141,33 @@ class UserFollowerListView(APIView):
         # 4. 查询粉丝列表
         followers = UserFollow.objects.filter(
             following=user
-        ).select_related('follower', 'follower__userprofile').order_by('-created_at')
+        ).select_related('follower').order_by('-created_at')
         
         # 5. 分页
         paginator = Paginator(followers, limit)
         page_obj = paginator.get_page(page)
         
         # 6. 构造返回数据
+        author_cards = get_author_cards(follow.follower_id for follow in page_obj)
+        relationships = (
+            get_relationships(request.user.id, [follow.follower_id for follow in page_obj])
+            if wants_relationships(request) else None
+        )
         followers_data = []
         for follow in page_obj:
             follower_user = follow.follower
-            try:
-                follower_profile = follower_user.userprofile
-                avatar_url = follower_profile.avatar.url if follower_profile.avatar else None
-            except UserProfile.DoesNotExist:
-                avatar_url = None
+            card = author_cards.get(follower_user.id)
+            avatar_url = card["avatar"] if card else None
             
-            followers_data.append({
+            item = {
                 'id': follower_user.id,
                 'username': follower_user.username,
                 'avatar': avatar_url,
                 'followed_at': follow.created_at.isoformat(),
-            })
+            }
+            if relationships is not None:
+                item['relationship'] = relationships[follower_user.id]
+            followers_data.append(item)
         
         return Response({
             'count': paginator.count,
@@ -186,7 +185,7 @@ class UserAnimeListView(APIView):
     支持按状态筛选: ?status=WATCHING
     """
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     def get(self, request, user_id):
         # 1. 验证用户存在
         user = get_object_or_404(User, pk=user_id)
@@ -12,7 +12,7 @@ from rest_framework.decorators import (
 from rest_framework.response import Response
 from rest_framework.request import Request
 
-from rest_framework_simplejwt.authentication import JWTAuthentication   # ★必须添加
+from wangumi_app.authentication import CachedJWTAuthentication   # ★必须添加
 
 from wangumi_app.models import PrivacySetting
 
@@ -27,7 +27,7 @@ def _err(msg: str, http_status=status.HTTP_400_BAD_REQUEST, code: int = 1):
 
 
 @api_view(["GET", "PUT"])
-@authentication_classes([JWTAuthentication])          # ★★★ 加上 JWT 认证 ★★★
+@authentication_classes([CachedJWTAuthentication])          # ★★★ 加上 JWT 认证 ★★★
 @permission_classes([permissions.IsAuthenticated])     # 保持原有权限判断
 def privacy_settings(request: Request):
     """
@@ -5,12 +5,13 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 
 from django.core.files.uploadedfile import UploadedFile
 from PIL import Image
 
 from wangumi_app.models import UserProfile
+from wangumi_app.services.author_cards import invalidate_author_cards
 
 User = get_user_model()
 
@@ -41,7 +42,7 @@ class ProfileEditView(APIView):
     """
 
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     @transaction.atomic
     def post(self, request):
@@ -97,6 +98,7 @@ class ProfileEditView(APIView):
         profile.gender = gender
         profile.location = location
         profile.save()
+        invalidate_author_cards(user.id)
 
         data = {
             "username": user.username,
@@ -125,7 +127,7 @@ class AvatarUploadView(APIView):
     """
 
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     MAX_AVATAR_SIZE = 2 * 1024 * 1024  # 2MB
     ALLOWED_EXTS = {"jpg", "jpeg", "png"}
@@ -172,6 +174,7 @@ class AvatarUploadView(APIView):
 
         profile.avatar = avatar
         profile.save(update_fields=["avatar"])
+        invalidate_author_cards(user.id)
 
         data = {
             "avatar_url": profile.avatar.url if profile.avatar else "",
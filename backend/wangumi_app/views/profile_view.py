@@ -2,6 +2,7 @@ from typing import Dict, Any
 
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
+from django.views.decorators.vary import vary_on_headers
 
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -9,7 +10,9 @@ from rest_framework.response import Response
 from rest_framework import status
 
 # 新增：显式使用 SimpleJWT 的认证类
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
+from wangumi_app.services.content_versions import profile_version
+from wangumi_app.views.utils import conditional_on_versions
 
 User = get_user_model()
 
@@ -48,8 +51,13 @@ def _build_profile_dict(user: "User", is_self: bool) -> Dict[str, Any]:
                 pass
         return 0
 
-    following_count = _safe_count(["following", "followings", "following_set"])
-    follower_count = _safe_count(["followers", "follower", "followers_set"])
+    # 优先读取 Profile 上维护的冗余计数，没有 Profile 时才实时统计
+    if profile is not None:
+        following_count = profile.following_count
+        follower_count = profile.follower_count
+    else:
+        following_count = _safe_count(["following", "followings", "following_set"])
+        follower_count = _safe_count(["followers", "follower", "followers_set"])
 
     base = {
         "id": user.id,
@@ -97,21 +105,33 @@ def _ok(data: Any, message: str = "success", code: int = 0, http_status=status.H
     return Response({"code": code, "message": message, "data": data}, status=http_status)
 
 
+def _profile_versions(request, user_id: int):
+    # 本人看到的字段更多，ETag 需区分本人与他人
+    token, changed_at = profile_version(user_id)
+    is_self = request.user.is_authenticated and request.user.id == user_id
+    return [(f"{token}{'-self' if is_self else ''}", changed_at)]
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@vary_on_headers("Authorization")
+@conditional_on_versions(_profile_versions)
 def profile_by_user_id(request, user_id: int):
     """
     GET /api/users/<user_id>/profile
     查看任意用户主页（公开信息）。
+    资料未变化时，携带 If-None-Match / If-Modified-Since 的请求返回 304。
     """
-    user = get_object_or_404(User, pk=user_id)
+    user = get_object_or_404(User.objects.select_related("userprofile"), pk=user_id)
     data = _build_profile_dict(user, is_self=(request.user.is_authenticated and request.user.id == user.id))
     return _ok(data)
 
 
 @api_view(["GET"])
-@authentication_classes([JWTAuthentication])   # 新增：使用 JWT 做认证
+@authentication_classes([CachedJWTAuthentication])   # 新增：使用 JWT 做认证
 @permission_classes([IsAuthenticated])
+@vary_on_headers("Authorization")
+@conditional_on_versions(lambda request: [profile_version(request.user.id)])
 def my_profile(request):
     """
     GET /api/user/profile
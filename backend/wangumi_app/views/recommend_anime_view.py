@@ -2,17 +2,16 @@
 from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.http import JsonResponse
-from django.db.models import F, FloatField, ExpressionWrapper,Q
-from functools import reduce
-import operator
+from django.db.models import F, FloatField, ExpressionWrapper
 from rest_framework import permissions
 from rest_framework.response import Response
 
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 
 
 from wangumi_app.models import Anime, Comment, WatchStatus, UserFollow
+from wangumi_app.services.genres import anime_ids_with_genres
 from wangumi_app.utils import build_error_response, resolve_cover_url
 from django.db.models import Count, Avg
 
@@ -23,7 +22,7 @@ GAMMA = 0.2   # 热度权重
 
 class ContactChangeRequestView(APIView):
     permission_classes = [permissions.AllowAny]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     def get(self,request):
         user = request.user if request.user.is_authenticated else None
         try:
@@ -45,7 +44,7 @@ class ContactChangeRequestView(APIView):
             return self._get_hot_only(page, limit)
 
         #优先从缓存获取推荐结果
-        cache_key = f"recommend_{user.id}_{source}_{page}_{limit}"
+        cache_key = f"recommend:{user.id}:{source}:{page}:{limit}"
         cached_data = cache.get(cache_key)
         if cached_data:
             return Response(cached_data)
@@ -136,9 +135,8 @@ class ContactChangeRequestView(APIView):
         if not tag_weights:
             return []
 
-        genre_queries = [Q(genres__contains=genre) for genre in tag_weights.keys()]
-        combined_query = reduce(operator.or_, genre_queries)
-        interest_based = Anime.objects.filter(combined_query)
+        # 通过类型关联表的索引查出候选条目，避免逐行扫描 genres JSON 字段
+        interest_based = Anime.objects.filter(id__in=anime_ids_with_genres(tag_weights.keys()))
         recs = []
         for anime in interest_based:
             score = 0
@@ -6,14 +6,15 @@ from django.templatetags.static import static
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.pagination import PageNumberPagination
 from django.http import JsonResponse
-from functools import reduce
-import operator
 
 from wangumi_app.models import UserFollow, WatchStatus, Anime, Comment, Like, Reply
 from wangumi_app.utils import build_error_response, resolve_cover_url, resolve_avatar_url
+from wangumi_app.services.genres import anime_ids_with_genres
+from wangumi_app.services.relationships import get_relationships
+from wangumi_app.views.personal_homepage_list_view import wants_relationships
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -25,7 +26,7 @@ GAMMA = 0.2   # 热度权重
 
 class UserRecommendationView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def get(self, request):
         user = request.user
@@ -82,6 +83,12 @@ class UserRecommendationView(APIView):
             for u in page_obj
         ]
 
+        # 可选：内嵌关注关系（推荐列表已排除我关注的人，主要用于展示"对方关注了我"）
+        if wants_relationships(request):
+            relationships = get_relationships(user.id, [item["id"] for item in data])
+            for item in data:
+                item["relationship"] = relationships[item["id"]]
+
         return paginator.get_paginated_response(data)
 
 
@@ -218,11 +225,8 @@ class recommendItemItemRecommendationView(APIView):
             return []
 
         # 基于标签权重推荐相似条目
-        genre_queries = [Q(genres__contains=genre) for genre in tag_weights.keys()]
-        combined_query = reduce(operator.or_, genre_queries)
-
         interest_based = Anime.objects.filter(
-            combined_query,
+            id__in=anime_ids_with_genres(tag_weights.keys()),
             is_admin=False
         )
 
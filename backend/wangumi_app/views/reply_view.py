@@ -7,19 +7,23 @@ from django.core.paginator import Paginator
 from django.db.models import Count
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 
 from wangumi_app.models import Comment, Reply, Like
+from wangumi_app.services.author_cards import avatar_or_default, get_author_card, get_author_cards
+from wangumi_app.services.keyword_filter import record_flag, screen_text
+from wangumi_app.services.rate_limiter import by_user_or_ip, hit
+from wangumi_app.services.spam_detection import find_near_duplicates, record_fingerprint
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ReplyView(APIView):
     """回复功能接口 - 创建回复和获取回复列表"""
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get_permissions(self):
@@ -35,15 +39,15 @@ class ReplyView(APIView):
         if self.request.method == 'GET':
             self.authentication_classes = []
         else:
-            self.authentication_classes = [JWTAuthentication]
+            self.authentication_classes = [CachedJWTAuthentication]
         return super().get_authentication_classes()
 
     def get(self, request, comment_id):
         """获取特定评论的回复列表"""
         try:
-            # 验证评论是否存在
+            # 验证评论是否存在（连同作者一起取出，避免序列化父评论时再查一次）
             try:
-                parent_comment = Comment.objects.get(id=comment_id)
+                parent_comment = Comment.objects.select_related('user').get(id=comment_id, is_banned=False)
             except Comment.DoesNotExist:
                 return Response({
                     "code": 404,
@@ -57,7 +61,7 @@ class ReplyView(APIView):
             order_by = request.GET.get('order_by', 'time_desc')
 
             # 构建回复查询集
-            replies_queryset = Reply.objects.filter(review=parent_comment).select_related('user')
+            replies_queryset = Reply.objects.filter(review=parent_comment, is_banned=False).select_related('user')
 
             # 排序
             if order_by == 'time_asc':
@@ -91,10 +95,15 @@ class ReplyView(APIView):
                     ).values_list('comment_id', flat=True)
                 )
 
+            # 一次性取出父评论与本页回复作者的卡片
+            author_cards = get_author_cards(
+                [parent_comment.user_id] + [reply.user_id for reply in replies_page]
+            )
+
             # 构建回复数据
             replies_data = []
             for reply in replies_page:
-                author_info = self._get_author_info(reply.user)
+                author_info = self._get_author_info(reply.user, author_cards)
                 is_current_user = request.user.is_authenticated and reply.user_id == request.user.id
                 
                 # 检查是否点赞（根据你的Like模型结构调整）
@@ -114,7 +123,7 @@ class ReplyView(APIView):
                 "comment_id": parent_comment.id,
                 "parent_comment": {
                     "content": parent_comment.content,
-                    "author": self._get_author_info(parent_comment.user)
+                    "author": self._get_author_info(parent_comment.user, author_cards)
                 },
                 "total_replies": paginator.count,
                 "page": page,
@@ -136,36 +145,23 @@ class ReplyView(APIView):
                 "data": None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _get_author_info(self, user):
-        """获取作者信息"""
-        try:
-            level = getattr(user, 'level', 1) if hasattr(user, 'level') else 1
-            is_verified = getattr(user, 'is_verified', False) if hasattr(user, 'is_verified') else False
-            
-            return {
-                "user_id": user.id,
-                "username": user.username,
-                "avatar": self._get_user_avatar(user),
-                "level": level,
-                "is_verified": is_verified
-            }
-        except:
-            return {
-                "user_id": user.id,
-                "username": user.username,
-                "avatar": "/avatars/default.jpg",
-                "level": 1,
-                "is_verified": False
-            }
+    def _get_author_info(self, user, cards=None):
+        """获取作者信息（优先使用批量取出的作者卡片）"""
+        card = (cards or {}).get(user.id) or get_author_card(user.id)
+        level = getattr(user, 'level', 1) if hasattr(user, 'level') else 1
+        is_verified = getattr(user, 'is_verified', False) if hasattr(user, 'is_verified') else False
+
+        return {
+            "user_id": user.id,
+            "username": user.username,
+            "avatar": avatar_or_default(card),
+            "level": level,
+            "is_verified": is_verified
+        }
 
     def _get_user_avatar(self, user):
         """获取用户头像URL"""
-        try:
-            if hasattr(user, 'userprofile') and user.userprofile.avatar:
-                return user.userprofile.avatar.url
-        except:
-            pass
-        return "/avatars/default.jpg"
+        return avatar_or_default(get_author_card(user.id))
 
     @transaction.atomic
     def post(self, request, comment_id):
@@ -191,9 +187,19 @@ class ReplyView(APIView):
                     "data": None
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+            # 关键词过滤：命中违禁词拒绝发布，打码词替换为 *，剧透等关键词标记待审核
+            screen_result = screen_text(content)
+            if screen_result.blocked:
+                return Response({
+                    "code": 400,
+                    "message": "内容包含违禁词，请修改后再发布",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+            content = screen_result.masked_text
+
             # 验证评论是否存在
             try:
-                parent_comment = Comment.objects.get(id=comment_id)
+                parent_comment = Comment.objects.select_related('user').get(id=comment_id, is_banned=False)
             except Comment.DoesNotExist:
                 return Response({
                     "code": 404,
@@ -209,17 +215,23 @@ class ReplyView(APIView):
             #         "data": None
             #     }, status=status.HTTP_400_BAD_REQUEST)
 
+            # 近似重复内容检测：短时间内反复发布相似内容的用户被限流
+            duplicate_check = find_near_duplicates(content)
+            if duplicate_check.is_duplicate and not hit("duplicate_post", [by_user_or_ip(request)]).allowed:
+                return Response({
+                    "code": 429,
+                    "message": "检测到重复发布相似内容，请稍后再试",
+                    "data": None
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
             # 创建回复记录
             reply = Reply.objects.create(
                 review=parent_comment,
                 user=request.user,
                 content=content
             )
-
-            # 更新父评论的回复计数（如果模型有这个字段）
-            if hasattr(parent_comment, 'comments'):
-                parent_comment.comments = parent_comment.comments + 1 if parent_comment.comments else 1
-                parent_comment.save(update_fields=['comments'])
+            record_fingerprint(duplicate_check, reply, request.user.id)
+            record_flag(screen_result, reply, request.user.id, created=True)
 
             # 准备响应数据
             response_data = {
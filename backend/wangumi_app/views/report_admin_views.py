@@ -9,11 +9,14 @@ from django.db.models import Q, Count
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
 
 from wangumi_app.models import Report, Comment, Reply, User, Anime, Episode
+from wangumi_app.services.author_cards import avatar_or_default, get_author_cards
+from wangumi_app.services.generic_prefetch import prefetch_generic_targets
+from wangumi_app.services.reply_threads import adjust_reply_count
 
 class IsAdminUser(IsAuthenticated):
     """自定义权限类，验证是否为管理员"""
@@ -22,11 +25,37 @@ class IsAdminUser(IsAuthenticated):
             request.user.is_staff or request.user.is_superuser
         )
 
+class ReportTargetDisplayMixin:
+    """被举报对象的类型与内容预览，供举报列表、审核队列等管理接口共用"""
+
+    def _get_target_preview(self, report):
+        """获取被举报内容的预览"""
+        try:
+            target = report.content_object
+            if isinstance(target, Comment):
+                return target.content[:50] + "..." if len(target.content) > 50 else target.content
+            elif isinstance(target, Anime):
+                return f"番剧: {target.title}"
+            elif isinstance(target, Reply):
+                return target.content[:50] + "..." if len(target.content) > 50 else target.content
+            return "未知内容"
+        except:
+            return "内容已删除"
+
+    def _get_target_type_display(self, content_type):
+        """获取被举报类型的中文显示"""
+        type_map = {
+            'comment': '评论',
+            'anime': '番剧条目',
+            'reply': '回复'
+        }
+        return type_map.get(content_type.model, '未知类型')
+
 @method_decorator(csrf_exempt, name='dispatch')
-class ReportListView(APIView):
+class ReportListView(ReportTargetDisplayMixin, APIView):
     """获取举报列表"""
     
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def get(self, request):
@@ -52,9 +81,13 @@ class ReportListView(APIView):
             except:
                 reports_page = paginator.page(1)
 
+            # 按内容类型批量取出被举报对象，避免逐条访问 content_object
+            reports = list(reports_page)
+            prefetch_generic_targets(reports)
+
             # 构建举报数据
             reports_data = []
-            for report in reports_page:
+            for report in reports:
                 target_preview = self._get_target_preview(report)
                 
                 reports_data.append({
@@ -73,12 +106,12 @@ class ReportListView(APIView):
                     "created_at": report.created_at.isoformat() if report.created_at else None
                 })
 
-            # 获取统计信息
-            stats = {
-                "pending_count": Report.objects.filter(status='PENDING').count(),
-                "resolved_count": Report.objects.filter(status='RESOLVED').count(),
-                "rejected_count": Report.objects.filter(status='REJECTED').count()
-            }
+            # 获取统计信息（一次聚合查询）
+            stats = Report.objects.aggregate(
+                pending_count=Count('id', filter=Q(status='PENDING')),
+                resolved_count=Count('id', filter=Q(status='RESOLVED')),
+                rejected_count=Count('id', filter=Q(status='REJECTED'))
+            )
 
             response_data = {
                 "reports": reports_data,
@@ -104,41 +137,21 @@ class ReportListView(APIView):
                 "data": None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _get_target_preview(self, report):
-        """获取被举报内容的预览"""
-        try:
-            target = report.content_object
-            if isinstance(target, Comment):
-                return target.content[:50] + "..." if len(target.content) > 50 else target.content
-            elif isinstance(target, Anime):
-                return f"番剧: {target.title}"
-            elif isinstance(target, Reply):
-                return target.content[:50] + "..." if len(target.content) > 50 else target.content
-            return "未知内容"
-        except:
-            return "内容已删除"
-
-    def _get_target_type_display(self, content_type):
-        """获取被举报类型的中文显示"""
-        type_map = {
-            'comment': '评论',
-            'anime': '番剧条目',
-            'reply': '回复'
-        }
-        return type_map.get(content_type.model, '未知类型')
-
 @method_decorator(csrf_exempt, name='dispatch')
 class ReportDetailView(APIView):
     """获取举报详情"""
     
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def get(self, request, report_id):
         try:
             # 获取举报记录
             report = Report.objects.select_related('reporter', 'moderator').get(id=report_id)
-            
+
+            # 举报人与处理人的头像一次取出
+            author_cards = get_author_cards([report.reporter_id, report.moderator_id])
+
             # 构建详细数据
             target_content = self._get_target_content(report)
             
@@ -147,7 +160,7 @@ class ReportDetailView(APIView):
                 "reporter": {
                     "user_id": report.reporter.id,
                     "username": report.reporter.username,
-                    "avatar": self._get_user_avatar(report.reporter)
+                    "avatar": self._get_user_avatar(report.reporter, author_cards)
                 },
                 "target_type": self._get_target_type_display(report.content_type),
                 "target_id": report.object_id,
@@ -157,7 +170,7 @@ class ReportDetailView(APIView):
                 "reason": report.reason,
                 "status": report.status,
                 "created_at": report.created_at.isoformat() if report.created_at else None,
-                "moderator": self._get_moderator_info(report.moderator) if report.moderator else None,
+                "moderator": self._get_moderator_info(report.moderator, author_cards) if report.moderator else None,
                 "handled_at": report.handled_at.isoformat() if report.handled_at else None,
                 "resolution": report.resolution
             }
@@ -227,23 +240,20 @@ class ReportDetailView(APIView):
         except Exception as e:
             return {"error": f"获取内容失败: {str(e)}"}
 
-    def _get_user_avatar(self, user):
+    def _get_user_avatar(self, user, author_cards=None):
         """获取用户头像"""
-        try:
-            if hasattr(user, 'userprofile') and user.userprofile.avatar:
-                return user.userprofile.avatar.url
-        except:
-            pass
-        return "/avatars/default.jpg"
+        if author_cards is None:
+            author_cards = get_author_cards([user.id])
+        return avatar_or_default(author_cards.get(user.id))
 
-    def _get_moderator_info(self, moderator):
+    def _get_moderator_info(self, moderator, author_cards=None):
         """获取处理人信息"""
         if not moderator:
             return None
         return {
             "user_id": moderator.id,
             "username": moderator.username,
-            "avatar": self._get_user_avatar(moderator)
+            "avatar": self._get_user_avatar(moderator, author_cards)
         }
 
     def _get_target_type_display(self, content_type):
@@ -259,7 +269,7 @@ class ReportDetailView(APIView):
 class ReportHandleView(APIView):
     """处理举报"""
     
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     @transaction.atomic
@@ -344,6 +354,8 @@ class ReportHandleView(APIView):
             if target:
                 # 软删除：标记为已删除或设置删除标志
                 if hasattr(target, 'is_banned'):
+                    if isinstance(target, Reply) and not target.is_banned:
+                        adjust_reply_count(target.review_id, -1)
                     target.is_banned = True
                     target.save()
                     return True
@@ -5,7 +5,7 @@ from django.utils.decorators import method_decorator
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -14,7 +14,7 @@ from wangumi_app.models import Comment, Report
 @method_decorator(csrf_exempt, name='dispatch')
 class ReportView(APIView):
     """举报功能接口 - 提交对评论的举报"""
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, comment_id):
@@ -5,9 +5,10 @@ from django.contrib.contenttypes.models import ContentType
 
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 
 from wangumi_app.models import Anime, Comment
+from wangumi_app.services.anime_detail import bump_anime_detail, bump_anime_list
 from wangumi_app.views.user_activities_view import create_activity
 
 
@@ -24,7 +25,7 @@ class CreateAnimeReviewView(APIView):
     UC12-2: 实现评论保存逻辑（支持同一用户多次评价时更新而非插入）
     UC12-3: 更新番剧评价与热度
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @transaction.atomic
@@ -105,6 +106,9 @@ class CreateAnimeReviewView(APIView):
         else:
             # 更新评价时只更新评分
             Anime.objects.filter(id=anime.id).update(rating=new_avg)
+        # update() 不触发信号，手动换掉详情与列表页的版本以刷新评分
+        bump_anime_detail([anime.id])
+        bump_anime_list()
 
         anime.refresh_from_db(fields=['rating', 'popularity'])
 
@@ -122,7 +126,7 @@ class GetAnimeReviewView(APIView):
     """
     获取用户番剧评价接口
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -171,7 +175,7 @@ class GetAnimeReviewView(APIView):
         })
 
 class UpdateReviewView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @transaction.atomic
@@ -206,6 +210,8 @@ class UpdateReviewView(APIView):
         agg = Comment.objects.filter(content_type=ct, object_id=review.object_id).aggregate(avg=Avg('score'))
         new_avg = float(agg['avg'] or 0.0)
         Anime.objects.filter(id=review.object_id).update(rating=new_avg)
+        bump_anime_detail([review.object_id])
+        bump_anime_list()
 
         anime = Anime.objects.get(id=review.object_id)
         return _json_ok({
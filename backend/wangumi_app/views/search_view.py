@@ -1,9 +1,11 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.core.paginator import Paginator
+from wangumi_app.services.rate_limiter import rate_limit
 from wangumi_app.services.search_service import search_all_types, search_single_type
 
 class SearchView(APIView):
+    @rate_limit("search")
     def get(self, request):
         query = request.GET.get("query", "").strip()
         search_type = request.GET.get("type")
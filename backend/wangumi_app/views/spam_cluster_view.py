@@ -0,0 +1,146 @@
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+from django.core.paginator import Paginator
+from django.db.models import Count, Max, Min
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from wangumi_app.models import ContentFingerprint
+from wangumi_app.services.generic_prefetch import prefetch_generic_targets
+from wangumi_app.authentication import CachedJWTAuthentication
+from wangumi_app.views.report_admin_views import IsAdminUser, ReportTargetDisplayMixin
+
+MAX_CLUSTER_MEMBERS = 200
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class SpamClusterListView(ReportTargetDisplayMixin, APIView):
+    """近似重复内容簇列表（默认只列出已自动标记的簇），按最近发布时间倒序"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            page = int(request.GET.get('page', 1))
+            page_size = min(int(request.GET.get('page_size', 20)), 50)
+            flagged_only = request.GET.get('all') not in ('1', 'true')
+
+            queryset = ContentFingerprint.objects.all()
+            if flagged_only:
+                queryset = queryset.filter(flagged=True)
+            clusters = (
+                queryset.values('cluster_id')
+                .annotate(
+                    size=Count('id'),
+                    user_count=Count('user_id', distinct=True),
+                    sample_id=Min('id'),
+                    first_posted_at=Min('created_at'),
+                    last_posted_at=Max('created_at'),
+                )
+                .filter(size__gt=1)
+                .order_by('-last_posted_at')
+            )
+            paginator = Paginator(clusters, page_size)
+            try:
+                clusters_page = paginator.page(page)
+            except:
+                clusters_page = paginator.page(1)
+
+            # 每个簇取最早的一条内容作为预览，被举报对象按内容类型批量取出
+            rows = list(clusters_page)
+            samples = {
+                sample.id: sample
+                for sample in ContentFingerprint.objects.select_related('content_type').filter(
+                    pk__in=[row['sample_id'] for row in rows]
+                )
+            }
+            prefetch_generic_targets(list(samples.values()))
+
+            clusters_data = []
+            for row in rows:
+                sample = samples.get(row['sample_id'])
+                clusters_data.append({
+                    "cluster_id": row['cluster_id'],
+                    "size": row['size'],
+                    "user_count": row['user_count'],
+                    "sample_preview": self._get_target_preview(sample) if sample else None,
+                    "first_posted_at": row['first_posted_at'].isoformat(),
+                    "last_posted_at": row['last_posted_at'].isoformat()
+                })
+
+            return Response({
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "clusters": clusters_data,
+                    "pagination": {
+                        "total": paginator.count,
+                        "page": page,
+                        "page_size": page_size,
+                        "total_pages": paginator.num_pages
+                    }
+                }
+            })
+
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class SpamClusterDetailView(ReportTargetDisplayMixin, APIView):
+    """查看簇内全部内容，并给出可直接用于批量操作接口的评论 ID 与用户 ID"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, cluster_id):
+        try:
+            members = list(
+                ContentFingerprint.objects.select_related('content_type', 'user')
+                .filter(cluster_id=cluster_id)
+                .order_by('created_at')[:MAX_CLUSTER_MEMBERS]
+            )
+            if not members:
+                return Response({
+                    "code": 404,
+                    "message": "内容簇不存在",
+                    "data": None
+                }, status=status.HTTP_404_NOT_FOUND)
+            prefetch_generic_targets(members)
+
+            members_data = [{
+                "target_type": self._get_target_type_display(member.content_type),
+                "target_id": member.object_id,
+                "preview": self._get_target_preview(member),
+                "user": {
+                    "user_id": member.user.id,
+                    "username": member.user.username
+                },
+                "flagged": member.flagged,
+                "created_at": member.created_at.isoformat()
+            } for member in members]
+
+            return Response({
+                "code": 200,
+                "message": "success",
+                "data": {
+                    "cluster_id": cluster_id,
+                    "members": members_data,
+                    # 可直接提交给 admin/moderation/bulk/ 的 hide_comments / ban_users
+                    "comment_ids": [m.object_id for m in members if m.content_type.model == 'comment'],
+                    "user_ids": sorted({m.user_id for m in members})
+                }
+            })
+
+        except Exception as e:
+            return Response({
+                "code": 500,
+                "message": f"服务器内部错误: {str(e)}",
+                "data": None
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
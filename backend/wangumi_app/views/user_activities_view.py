@@ -2,23 +2,31 @@ from django.http import JsonResponse
 from django.core.paginator import Paginator
 from rest_framework.views import APIView
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from wangumi_app.models import Activity,User,UserFollow,UserProfile,Comment,Like,WatchStatus,Anime,PrivacySetting,Episode,Character,Person
 from wangumi_app.utils import build_error_response
+from wangumi_app.services import visibility
+from wangumi_app.services.activity_payloads import build_activity_payload, build_payloads_for, hidden_activities
+from wangumi_app.services.home_timeline import fan_out_activity_safely
 
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 
 """
 用户动态自动生成
 """
 def create_activity(user, instance, action):
     content_type = ContentType.objects.get_for_model(instance.__class__)
-    Activity.objects.create(
+    activity = Activity.objects.create(
         user=user,
         content_type=content_type,
         object_id=instance.id,
-        action=action
+        action=action,
+        payload=build_activity_payload(instance)  # 快照展示数据，读取时无需关联目标对象
     )
+    # 事务提交后再写扩散到关注者的首页时间线，失败不影响主流程
+    transaction.on_commit(lambda: fan_out_activity_safely(activity))
+    return activity
 
 """
 部分工具函数
@@ -26,32 +34,40 @@ def create_activity(user, instance, action):
 
 def is_following(viewer, owner):
     """检查viewer是否关注了owner"""
-    return UserFollow.objects.filter(follower=viewer, following=owner).exists()
+    return visibility.is_following(viewer, owner)
 
 def is_mutual_follow(viewer, owner):
     """检查viewer和owner是否互相关注"""
-    return (
-        UserFollow.objects.filter(follower=viewer, following=owner).exists() and
-        UserFollow.objects.filter(follower=owner, following=viewer).exists()
-    )
+    return visibility.is_mutual_follow(viewer, owner)
 
 def can_view_activity(viewer, owner):
-    try:
-        privacy_setting = PrivacySetting.objects.get(user=owner)
-        privacy = privacy_setting.activities
-    except PrivacySetting.DoesNotExist:
-        # 如果没有隐私设置，默认为公开
-        privacy = "public"
-
-    if privacy == "public":
-        return True
-    if privacy == "self":
-        return viewer == owner
-    if privacy == "friends":
-        return viewer and(viewer==owner or is_following(viewer, owner))
-    if privacy == "mutual":
-        return viewer and (viewer==owner or is_mutual_follow(viewer, owner))
-    return False
+    # 没有隐私设置时默认为公开
+    return visibility.can_view(viewer, owner, "activities")
+
+
+def serialize_activities(activities):
+    """
+    序列化一页动态，供个人动态与首页时间线共用
+    有快照的动态直接读取 payload；没有快照的旧动态批量预加载目标对象后现场生成
+    """
+    legacy_payloads = build_payloads_for([act for act in activities if not act.payload])
+
+    results = []
+    for act in activities:
+        payload = act.payload or legacy_payloads.get(act.id, {})
+
+        results.append({
+            "id": act.id,
+            "action": act.action,
+            "created_at": act.created_at,
+            "target_id": act.object_id,
+            "target_type": ContentType.objects.get_for_id(act.content_type_id).model,
+            "target_title": payload.get("title") or "[对象已删除]",
+            "scope": payload.get("scope"),
+            "thumbnail": payload.get("thumbnail", ""),
+            "excerpt": payload.get("excerpt", ""),
+        })
+    return results
 
 
 class UserActivityView(APIView):
@@ -60,7 +76,7 @@ class UserActivityView(APIView):
     查询该用户发布的动态（评论、点赞、新增的追番等）。
     支持分页、隐私检查、按时间倒序排列。
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     def get(self,request):
         user_id = request.GET.get("user_id")
@@ -88,113 +104,14 @@ class UserActivityView(APIView):
 
         limit = min(limit, 100)
 
-        # 查询动态
-        queryset = Activity.objects.filter(user=target_user).order_by("-created_at")
+        # 查询动态（跳过关于已被隐藏评论的动态）
+        queryset = Activity.objects.filter(user=target_user).exclude(hidden_activities()).order_by("-created_at")
 
         paginator = Paginator(queryset, limit)
         page_obj = paginator.get_page(page)
 
-        # 预加载关联对象，避免循环里发SQL
-        comment_ct = ContentType.objects.get_for_model(Comment)
-        watch_ct = ContentType.objects.get_for_model(WatchStatus)
-        item_ct = ContentType.objects.get_for_model(Anime)
-        like_ct = ContentType.objects.get_for_model(Like)
-
-        comment_ids = [a.object_id for a in page_obj if a.content_type_id == comment_ct.id]
-        watch_ids = [a.object_id for a in page_obj if a.content_type_id == watch_ct.id]
-        item_ids = [a.object_id for a in page_obj if a.content_type_id == item_ct.id]
-        like_ids = [a.object_id for a in page_obj if a.content_type_id == like_ct.id]
-
-        comments = Comment.objects.filter(id__in=comment_ids).select_related('content_type')
-        comment_map = {c.id: c for c in comments}
-
-        # 预加载评论关联的不同类型的对象
-        anime_ids = set()
-        episode_ids = set()
-        character_ids = set()
-        person_ids = set()
-        item_ids_from_comments = set()
-
-        for comment in comments:
-            if comment.scope == 'ANIME':
-                anime_ids.add(comment.object_id)
-            elif comment.scope == 'EPISODE':
-                episode_ids.add(comment.object_id)
-            elif comment.scope == 'CHARACTER':
-                character_ids.add(comment.object_id)
-            elif comment.scope == 'PERSON':
-                person_ids.add(comment.object_id)
-            elif comment.scope == 'ITEM':
-                item_ids_from_comments.add(comment.object_id)
-
-        # 批量查询相关对象
-        anime_map = {a.id: a for a in Anime.objects.filter(id__in=anime_ids)} if anime_ids else {}
-        episode_map = {e.id: e for e in Episode.objects.filter(id__in=episode_ids).select_related('anime')} if episode_ids else {}
-        character_map = {c.id: c for c in Character.objects.filter(id__in=character_ids)} if character_ids else {}
-        person_map = {p.id: p for p in Person.objects.filter(id__in=person_ids)} if person_ids else {}
-        item_from_comments_map = {i.id: i for i in Anime.objects.filter(id__in=item_ids_from_comments)} if item_ids_from_comments else {}
-
-        watch_statuses = WatchStatus.objects.filter(id__in=watch_ids)
-        watch_map = {w.id: w for w in watch_statuses}
-
-        items = Anime.objects.filter(id__in=item_ids)
-        item_map = {i.id: i for i in items}
-
-        likes = Like.objects.filter(id__in=like_ids)
-        like_map = {l.id: l for l in likes}
-
-        # 序列化发送内容
-        results = []
-        for act in page_obj:
-            target = None
-            title = "[对象已删除]"
-
-            if act.action in ["创建了评论", "COMMENT"]:
-                target = comment_map.get(act.object_id)
-                if target:
-                    # 根据评论范围获取对应的标题
-                    if target.scope == 'ANIME':
-                        anime = anime_map.get(target.object_id)
-                        if anime:
-                            title = anime.title
-                    elif target.scope == 'EPISODE':
-                        episode = episode_map.get(target.object_id)
-                        if episode and episode.anime:
-                            title = f"{episode.anime.title} - {episode.title}"
-                    elif target.scope == 'CHARACTER':
-                        character = character_map.get(target.object_id)
-                        if character:
-                            title = character.name
-                    elif target.scope == 'PERSON':
-                        person = person_map.get(target.object_id)
-                        if person:
-                            title = person.pers_name
-                    elif target.scope == 'ITEM':
-                        item = item_from_comments_map.get(target.object_id)
-                        if item:
-                            title = item.title
-            elif act.action in ["WATCH", "新增追番"]:
-                target = watch_map.get(act.object_id)
-                if target and hasattr(target, "anime"):
-                    title = target.anime.title
-            elif act.action in ["ITEM", "新建了条目"]:
-                target = item_map.get(act.object_id)
-                if target:
-                    title = target.title
-            elif act.action in ["LIKE", "点赞了对象"]:
-                target = like_map.get(act.object_id)
-                if target:
-                    if hasattr(target.comment, "content"):
-                        title = target.comment.content[:50]
-
-            results.append({
-                "id": act.id,
-                "action": act.action,
-                "created_at": act.created_at,
-                "target_id": act.object_id,
-                "target_type": act.content_type.model,
-                "target_title": title,
-            })
+        # 批量预加载并序列化动态
+        results = serialize_activities(list(page_obj))
 
         # 返回 JSON 响应
         response_payload = {
@@ -9,18 +9,21 @@ from django.db.models import Q, Count
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
 
-from wangumi_app.models import User, UserBanLog, AdminLog, Comment, Reply, Anime, Report, UserProfile, PrivacySetting
+from wangumi_app.models import User, UserBanLog, AdminLog, Comment, Reply, Anime, Report, UserProfile, PrivacySetting, UserModerationStats, ContentSweepJob
+from wangumi_app.services.content_sweeps import cancel_sweeps, start_sweep, sweep_progress
+from wangumi_app.services.moderation_stats import get_stats
+from wangumi_app.services.token_versions import bump_token_version
 from wangumi_app.views.report_admin_views import IsAdminUser
 
 @method_decorator(csrf_exempt, name='dispatch')
 class UserListStatusView(APIView):
     """获取所有用户状态列表"""
     
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def get(self, request):
@@ -33,7 +36,8 @@ class UserListStatusView(APIView):
             order_by = request.GET.get('order_by', '-date_joined')
 
             # 构建查询条件
-            queryset = User.objects.all().select_related('userprofile')
+            # 资料与统计随用户一起 JOIN 查出，不再逐行查询
+            queryset = User.objects.all().select_related('userprofile', 'moderation_stats')
             
             # 搜索条件
             if search:
@@ -63,8 +67,11 @@ class UserListStatusView(APIView):
                 users_page = paginator.page(1)
 
             # 构建用户数据
+            users = list(users_page)
+            # 一次查询取出本页所有被封禁用户的最近封禁记录
+            recent_ban_logs = self._get_recent_ban_logs([user.id for user in users if not user.is_active])
             users_data = []
-            for user in users_page:
+            for user in users:
                 # 获取用户资料
                 profile_data = self._get_user_profile(user)
                 
@@ -72,7 +79,7 @@ class UserListStatusView(APIView):
                 stats = self._get_user_stats(user)
                 
                 # 获取最近的封禁记录
-                recent_ban_log = UserBanLog.objects.filter(user=user, action='BAN').order_by('-operated_at').first()
+                recent_ban_log = recent_ban_logs.get(user.id)
                 
                 users_data.append({
                     "user_id": user.id,
@@ -120,9 +127,9 @@ class UserListStatusView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def _get_user_profile(self, user):
-        """获取用户资料信息"""
+        """获取用户资料信息（已通过 select_related 取出）"""
         try:
-            profile = UserProfile.objects.get(user=user)
+            profile = user.userprofile
             return {
                 "nickname": profile.nickname,
                 "avatar": profile.avatar.url if profile.avatar else None
@@ -131,18 +138,34 @@ class UserListStatusView(APIView):
             return {}
 
     def _get_user_stats(self, user):
-        """获取用户统计数据"""
+        """获取用户统计数据，读取信号维护的统计表；缺失时按零展示，由校正命令补建"""
+        try:
+            stats = user.moderation_stats
+        except UserModerationStats.DoesNotExist:
+            stats = UserModerationStats(user_id=user.id)
         return {
-            "total_comments": Comment.objects.filter(user=user).count(),
-            "total_replies": Reply.objects.filter(user=user).count(),
-            "animes_created": Anime.objects.filter(created_by=user).count()
+            "total_comments": stats.comments,
+            "total_replies": stats.replies,
+            "animes_created": stats.items_created
         }
 
+    def _get_recent_ban_logs(self, user_ids):
+        """批量获取每个用户最近一次封禁记录（DISTINCT ON user）"""
+        if not user_ids:
+            return {}
+        logs = (
+            UserBanLog.objects.filter(user_id__in=user_ids, action='BAN')
+            .select_related('operated_by')
+            .order_by('user_id', '-operated_at')
+            .distinct('user_id')
+        )
+        return {log.user_id: log for log in logs}
+
 @method_decorator(csrf_exempt, name='dispatch')
 class UserStatusView(APIView):
     """获取单个用户状态"""
     
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def get(self, request, user_id):
@@ -226,29 +249,33 @@ class UserStatusView(APIView):
             return {}
 
     def _get_user_stats(self, user):
-        """获取用户统计数据"""
+        """获取用户统计数据（读取统计表，一次查询）"""
+        stats = get_stats(user.id)
         return {
-            "total_comments": Comment.objects.filter(user=user).count(),
-            "total_replies": Reply.objects.filter(user=user).count(),
-            "animes_created": Anime.objects.filter(created_by=user).count(),
-            "reports_created": Report.objects.filter(reporter=user).count(),
-            "reports_against": Report.objects.filter(
-                content_type=ContentType.objects.get_for_model(Comment),
-                object_id__in=Comment.objects.filter(user=user).values_list('id', flat=True)
-            ).count() + Report.objects.filter(
-                content_type=ContentType.objects.get_for_model(Anime),
-                object_id__in=Anime.objects.filter(created_by=user).values_list('id', flat=True)
-            ).count() + Report.objects.filter(
-                content_type=ContentType.objects.get_for_model(Reply),
-                object_id__in=Reply.objects.filter(user=user).values_list('id', flat=True)
-            ).count()
+            "total_comments": stats.comments,
+            "total_replies": stats.replies,
+            "animes_created": stats.items_created,
+            "reports_created": stats.reports_filed,
+            "reports_against": stats.reports_received
         }
 
+def _schedule_content_sweep(target_user, action, admin_log, requested):
+    """
+    安排后台分批处理用户内容，返回 (是否已安排, 任务进度)。
+    无论是否需要处理内容，新的封禁/解封都会取消该用户仍在进行的旧任务，避免旧任务覆盖新结果
+    """
+    if not requested or admin_log is None:
+        cancel_sweeps(target_user.id)
+        return False, None
+    job = start_sweep(target_user.id, action, admin_log)
+    return True, sweep_progress(job)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class BanUserView(APIView):
     """封禁用户 - 使用 is_active=False"""
     
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     @transaction.atomic
@@ -285,6 +312,8 @@ class BanUserView(APIView):
             # 执行封禁：设置 is_active = False
             target_user.is_active = False
             target_user.save()
+            # 令牌版本号自增：已签发的 token 全部失效，解封后也需要重新登录
+            bump_token_version(target_user.id)
 
             # 记录封禁日志
             ban_log = UserBanLog.objects.create(
@@ -296,19 +325,17 @@ class BanUserView(APIView):
                 operated_by=request.user
             )
 
-            # 如果需要删除用户内容
-            content_deleted = False
-            if delete_content:
-                content_deleted = self._delete_user_content(target_user)
-
             # 记录管理员操作日志
-            self._log_admin_action(
+            admin_log = self._log_admin_action(
                 admin=request.user,
                 action_type='BAN_USER',
                 target_user=target_user,
                 description=f"封禁用户 {target_user.username}，理由：{reason}" + (f"，时长：{ban_duration}天" if ban_duration else "")
             )
 
+            # 如果需要删除用户内容：改为后台分批软删除，content_deleted 表示已安排处理
+            content_deleted, content_sweep = _schedule_content_sweep(target_user, 'HIDE', admin_log, delete_content)
+
             response_data = {
                 "user_id": target_user.id,
                 "username": target_user.username,
@@ -322,6 +349,7 @@ class BanUserView(APIView):
                 },
                 "delete_content": delete_content,
                 "content_deleted": content_deleted,
+                "content_sweep": content_sweep,
                 "ban_log_id": ban_log.id
             }
 
@@ -344,39 +372,18 @@ class BanUserView(APIView):
                 "data": None
             }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
+            # 异常已被捕获，需显式回滚，避免半完成的封禁（及令牌版本号）被提交
+            transaction.set_rollback(True)
             return Response({
                 "code": 500,
                 "message": f"服务器内部错误: {str(e)}",
                 "data": None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _delete_user_content(self, user):
-        """删除用户内容（软删除）"""
-        try:
-            deleted_count = 0
-            
-            # 标记用户的评论为已删除
-            comments_updated = Comment.objects.filter(user=user).update(is_banned=True)
-            deleted_count += comments_updated
-            
-            # 标记用户的回复为已删除
-            replies_updated = Reply.objects.filter(user=user).update(is_banned=True)
-            deleted_count += replies_updated
-            
-            # 标记用户创建的番剧条目为已删除
-            animes_updated = Anime.objects.filter(created_by=user).update(is_banned=True)
-            deleted_count += animes_updated
-            
-            print(f"已软删除用户 {user.username} 的 {deleted_count} 条内容")
-            return deleted_count > 0
-        except Exception as e:
-            print(f"删除用户内容失败: {e}")
-            return False
-
     def _log_admin_action(self, admin, action_type, target_user, description):
         """记录管理员操作日志"""
         try:
-            AdminLog.objects.create(
+            return AdminLog.objects.create(
                 admin=admin,
                 action_type=action_type,
                 target_user=target_user,
@@ -386,6 +393,7 @@ class BanUserView(APIView):
             )
         except Exception as e:
             print(f"记录管理员日志失败: {e}")
+            return None
 
     def _get_client_ip(self, request):
         """获取客户端IP"""
@@ -400,7 +408,7 @@ class BanUserView(APIView):
 class UnbanUserView(APIView):
     """解封用户 - 使用 is_active=True"""
     
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     @transaction.atomic
@@ -434,19 +442,17 @@ class UnbanUserView(APIView):
                 operated_by=request.user
             )
 
-            # 如果需要恢复用户内容
-            content_restored = False
-            if restore_content:
-                content_restored = self._restore_user_content(target_user)
-
             # 记录管理员操作日志
-            self._log_admin_action(
+            admin_log = self._log_admin_action(
                 admin=request.user,
                 action_type='UNBAN_USER',
                 target_user=target_user,
                 description=f"解封用户 {target_user.username}，理由：{reason}"
             )
 
+            # 如果需要恢复用户内容：改为后台分批恢复，content_restored 表示已安排处理
+            content_restored, content_sweep = _schedule_content_sweep(target_user, 'RESTORE', admin_log, restore_content)
+
             response_data = {
                 "user_id": target_user.id,
                 "username": target_user.username,
@@ -459,6 +465,7 @@ class UnbanUserView(APIView):
                 "reason": reason,
                 "restore_content": restore_content,
                 "content_restored": content_restored,
+                "content_sweep": content_sweep,
                 "unban_log_id": unban_log.id
             }
 
@@ -487,33 +494,10 @@ class UnbanUserView(APIView):
                 "data": None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _restore_user_content(self, user):
-        """恢复用户内容"""
-        try:
-            restored_count = 0
-            
-            # 恢复用户的评论
-            comments_restored = Comment.objects.filter(user=user, is_banned=True).update(is_banned=False)
-            restored_count += comments_restored
-            
-            # 恢复用户的回复
-            replies_restored = Reply.objects.filter(user=user, is_banned=True).update(is_banned=False)
-            restored_count += replies_restored
-            
-            # 恢复用户创建的番剧条目
-            animes_restored = Anime.objects.filter(created_by=user, is_banned=True).update(is_banned=False)
-            restored_count += animes_restored
-            
-            print(f"已恢复用户 {user.username} 的 {restored_count} 条内容")
-            return restored_count > 0
-        except Exception as e:
-            print(f"恢复用户内容失败: {e}")
-            return False
-
     def _log_admin_action(self, admin, action_type, target_user, description):
         """记录管理员操作日志"""
         try:
-            AdminLog.objects.create(
+            return AdminLog.objects.create(
                 admin=admin,
                 action_type=action_type,
                 target_user=target_user,
@@ -523,6 +507,7 @@ class UnbanUserView(APIView):
             )
         except Exception as e:
             print(f"记录管理员日志失败: {e}")
+            return None
 
     def _get_client_ip(self, request):
         """获取客户端IP"""
@@ -531,4 +516,26 @@ class UnbanUserView(APIView):
             ip = x_forwarded_for.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return ip
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ContentSweepStatusView(APIView):
+    """按管理员操作日志查询封禁/解封内容处理任务的进度"""
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, log_id):
+        job = ContentSweepJob.objects.filter(admin_log_id=log_id).first()
+        if job is None:
+            return Response({
+                "code": 404,
+                "message": "该操作没有内容处理任务",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "code": 200,
+            "message": "success",
+            "data": sweep_progress(job)
+        })
@@ -1,5 +1,39 @@
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
 def get_client_ip(request) -> str:
     forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
     if forwarded_for:
         return forwarded_for.split(",")[0].strip()
     return request.META.get("REMOTE_ADDR", "")
+
+
+def conditional_on_versions(versions_func):
+    """
+    条件请求装饰器：按内容版本生成 ETag / Last-Modified。
+
+    versions_func(request, *args, **kwargs) 返回 [(token, changed_at), ...]（见
+    services.content_versions）。客户端携带的 If-None-Match / If-Modified-Since 与之匹配时
+    直接返回 304，视图本身（查询与序列化）不会执行。可用于函数视图、@api_view 内层函数，
+    以及配合 method_decorator 用于 APIView 的 get。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            versions = versions_func(request, *args, **kwargs)
+            etag = quote_etag("-".join(token for token, _ in versions))
+            last_modified = int(max(changed_at for _, changed_at in versions))
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault("ETag", etag)
+                response.headers.setdefault("Last-Modified", http_date(last_modified))
+            return response
+        return wrapper
+    return decorator
@@ -4,7 +4,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from wangumi_app.authentication import CachedJWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -15,7 +15,7 @@ from wangumi_app.views.user_activities_view import create_activity
 @method_decorator(csrf_exempt, name='dispatch')
 class WatchStatusView(APIView):
     """追番状态接口 - 设置/更新和获取追番状态"""
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -68,7 +68,7 @@ class WatchStatusView(APIView):
             # 更新番剧的热度
             if created:
                 anime.popularity += 1
-                anime.save()
+                anime.save(update_fields=['popularity'])
 
             if status_value=="WATCHING" and created:
                 create_activity(request.user,watch_status, "新增追番")
@@ -269,7 +269,7 @@ class WatchStatusView(APIView):
             
             # 更新番剧的热度
             anime.popularity = max(0, anime.popularity - 1)
-            anime.save()
+            anime.save(update_fields=['popularity'])
             
             return Response({
                 "code": 200,